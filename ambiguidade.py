@@ -0,0 +1,438 @@
+import math
+import threading
+
+from reconhecedor import arvore_vazia
+
+# Contagem de uma cadeia com infinitas árvores (ciclos como A: B, B: A)
+INFINITAS = math.inf
+
+
+def _componentes(vertices, vizinhos):
+    """
+    Componentes fortemente conexas do grafo (Tarjan, iterativo), em ordem de
+    dependência: cada componente vem depois de todas as que ela alcança.
+
+    Retorna uma lista de pares (vértices da componente, cíclica), em que cíclica
+    indica se há algum ciclo dentro dela (mais de um vértice ou um laço).
+    """
+    indices = {}
+    menores = {}
+    pilha = []
+    na_pilha = set()
+    componentes = []
+
+    for origem in vertices:
+        if origem in indices:
+            continue
+        indices[origem] = menores[origem] = len(indices)
+        pilha.append(origem)
+        na_pilha.add(origem)
+        caminho = [(origem, iter(vizinhos(origem)))]
+        while caminho:
+            vertice, proximos = caminho[-1]
+            for vizinho in proximos:
+                if vizinho not in indices:
+                    indices[vizinho] = menores[vizinho] = len(indices)
+                    pilha.append(vizinho)
+                    na_pilha.add(vizinho)
+                    caminho.append((vizinho, iter(vizinhos(vizinho))))
+                    break
+                if vizinho in na_pilha:
+                    menores[vertice] = min(menores[vertice], indices[vizinho])
+            else:
+                caminho.pop()
+                if caminho:
+                    anterior = caminho[-1][0]
+                    menores[anterior] = min(menores[anterior], menores[vertice])
+                if menores[vertice] == indices[vertice]:
+                    componente = []
+                    while True:
+                        w = pilha.pop()
+                        na_pilha.discard(w)
+                        componente.append(w)
+                        if w == vertice:
+                            break
+                    ciclica = len(componente) > 1 or vertice in vizinhos(vertice)
+                    componentes.append((componente, ciclica))
+
+    return componentes
+
+
+class AnalisadorAmbiguidade:
+    """
+    Conta as árvores de derivação (ou seja, as derivações mais à esquerda) de cada
+    cadeia até um comprimento dado, sem enumerar as derivações uma a uma.
+
+    As tabelas formam uma floresta compactada: cada nó é um par (símbolo, cadeia)
+    e guarda só o número de árvores daquele símbolo com aquela cadeia,
+
+        arvores[A][n][w]        = árvores de A com a cadeia w, |w| = n
+        sequencias[s][n][w]     = árvores da sequência de símbolos s com a cadeia w
+
+    em que as sequências são os sufixos com dois ou mais símbolos dos corpos úteis.
+    Diferente da contagem por comprimento (ContadorCadeias), a gramática usada é a
+    original, porque remover produções vazias e unitárias muda o número de árvores.
+
+    As tabelas são preenchidas um comprimento n por vez. As árvores em que pelo
+    menos dois símbolos do corpo produzem partes não vazias só usam cadeias mais
+    curtas; as demais passam por produções "unitárias" (um símbolo produz a cadeia
+    toda e os outros a cadeia vazia), que ligam variáveis no mesmo comprimento.
+    Esse sistema é resolvido pelas componentes fortemente conexas do grafo das
+    produções unitárias: uma cadeia que chega a uma componente com ciclo tem
+    infinitas árvores (INFINITAS). A cadeia vazia é tratada do mesmo modo sobre o
+    grafo das produções anuláveis.
+    """
+
+    def __init__(self, gramatica):
+        self.gramatica = gramatica
+        analises = gramatica.analisar()
+        producoes = gramatica.producoes
+        # Produções repetidas (mesma variável e mesmo corpo) são uma só alternativa;
+        # contá-las duas vezes criaria árvores "distintas" com o mesmo texto
+        self.producoes_uteis = {}
+        for variavel, indices in analises['producoes_uteis'].items():
+            corpos = {}
+            for indice in indices:
+                corpos.setdefault(producoes[indice][1], indice)
+            self.producoes_uteis[variavel] = list(corpos.values())
+        e_variavel = gramatica.e_variavel
+
+        # Árvores da cadeia vazia por variável anulável
+        self.vazias = self._contar_vazias(analises['anulaveis'])
+
+        # Produções unitárias com o peso das árvores vazias dos outros símbolos:
+        # variável -> [(variável do corpo, peso)] e variável -> [(terminal, peso)]
+        self.unitarias = {v: [] for v in self.producoes_uteis}
+        self.diretas = {v: [] for v in self.producoes_uteis}
+        for variavel, indices in self.producoes_uteis.items():
+            for indice in indices:
+                corpo = producoes[indice][1]
+                for i, simbolo in enumerate(corpo):
+                    peso = self._vazias_sequencia(corpo[:i] + corpo[i + 1:])
+                    if not peso:
+                        continue
+                    if e_variavel[simbolo]:
+                        self.unitarias[variavel].append((simbolo, peso))
+                    else:
+                        self.diretas[variavel].append((simbolo, peso))
+        self.componentes = _componentes(
+            list(self.producoes_uteis), lambda v: [alvo for alvo, _ in self.unitarias[v]])
+
+        self.sequencias = {}
+        for indices in self.producoes_uteis.values():
+            for indice in indices:
+                corpo = producoes[indice][1]
+                for i in range(len(corpo) - 1):
+                    self.sequencias.setdefault(corpo[i:], [])
+        # As sequências mais curtas primeiro: cada uma usa o próprio sufixo
+        self._ordem_sequencias = sorted(self.sequencias, key=len)
+
+        # Comprimento 0: só a cadeia vazia
+        self.arvores = {
+            v: [{(): self.vazias[v]} if v in self.vazias else {}] for v in self.producoes_uteis
+        }
+        for sequencia, niveis in self.sequencias.items():
+            peso = self._vazias_sequencia(sequencia)
+            niveis.append({(): peso} if peso else {})
+
+        self.comprimento = 0            # maior comprimento já calculado
+        self.cadeias_armazenadas = 0    # entradas nas tabelas, para limitar a memória
+        # As tabelas podem ser compartilhadas entre sessões; só uma as estende por vez
+        self._trava = threading.Lock()
+
+    def _contar_vazias(self, anulaveis):
+        """
+        Retorna {variável anulável útil: número de árvores da cadeia vazia}.
+        """
+        producoes = self.gramatica.producoes
+        corpos = {
+            v: [producoes[i][1] for i in indices if all(s in anulaveis for s in producoes[i][1])]
+            for v, indices in self.producoes_uteis.items() if v in anulaveis
+        }
+        vazias = {}
+        for componente, ciclica in _componentes(list(corpos), lambda v: [s for corpo in corpos[v] for s in corpo]):
+            for variavel in componente:
+                if ciclica:
+                    vazias[variavel] = INFINITAS
+                else:
+                    vazias[variavel] = sum(math.prod(vazias[s] for s in corpo) for corpo in corpos[variavel])
+        return vazias
+
+    def _vazias_sequencia(self, sequencia):
+        """
+        Número de árvores da cadeia vazia para a sequência (0 se ela não é anulável).
+        """
+        total = 1
+        for simbolo in sequencia:
+            vazias = self.vazias.get(simbolo, 0)
+            if not vazias:
+                return 0
+            total *= vazias
+        return total
+
+    def _nivel(self, simbolo, n):
+        """
+        Tabela {cadeia: árvores} do símbolo no comprimento n (já calculado).
+        """
+        if self.gramatica.e_variavel[simbolo]:
+            return self.arvores[simbolo][n]
+        return {(simbolo,): 1} if n == 1 else {}
+
+    def _nivel_sequencia(self, sequencia, n):
+        if len(sequencia) == 1:
+            return self._nivel(sequencia[0], n)
+        return self.sequencias[sequencia][n]
+
+    def calcular(self, comprimento, max_cadeias=None):
+        """
+        Estende as tabelas até o comprimento dado, parando antes se elas passarem de
+        max_cadeias entradas. Retorna o maior comprimento calculado.
+        """
+        if comprimento > self.comprimento:
+            with self._trava:
+                while self.comprimento < comprimento and self._calcular_nivel(self.comprimento + 1, max_cadeias):
+                    pass
+        return min(comprimento, self.comprimento)
+
+    def _calcular_nivel(self, n, max_cadeias):
+        """
+        Calcula as tabelas do comprimento n; retorna False (sem alterá-las) se o
+        limite de entradas for atingido.
+        """
+        producoes = self.gramatica.producoes
+        armazenadas = self.cadeias_armazenadas
+
+        def acrescentar(destino, origem, peso):
+            for cadeia, arvores in origem.items():
+                destino[cadeia] = destino.get(cadeia, 0) + peso * arvores
+
+        # Árvores próprias: pelo menos dois símbolos da sequência produzem partes não vazias
+        proprias = {}
+        for sequencia in self._ordem_sequencias:
+            primeiro, resto = sequencia[0], sequencia[1:]
+            tabela = {}
+            for l in range(1, n):
+                esquerda = self._nivel(primeiro, l)
+                if not esquerda:
+                    continue
+                direita = self._nivel_sequencia(resto, n - l)
+                for x, a in esquerda.items():
+                    for y, b in direita.items():
+                        cadeia = x + y
+                        tabela[cadeia] = tabela.get(cadeia, 0) + a * b
+            vazias = self.vazias.get(primeiro, 0)
+            if vazias and len(resto) > 1:
+                acrescentar(tabela, proprias[resto], vazias)
+            proprias[sequencia] = tabela
+            armazenadas += len(tabela)
+            if max_cadeias is not None and armazenadas > max_cadeias:
+                return False
+
+        # Variáveis, componente por componente do grafo das produções unitárias
+        novas = {}
+        for componente, ciclica in self.componentes:
+            for variavel in componente:
+                tabela = {}
+                for indice in self.producoes_uteis[variavel]:
+                    corpo = producoes[indice][1]
+                    if len(corpo) > 1:
+                        acrescentar(tabela, proprias[corpo], 1)
+                if n == 1:
+                    for terminal, peso in self.diretas[variavel]:
+                        acrescentar(tabela, {(terminal,): 1}, peso)
+                for alvo, peso in self.unitarias[variavel]:
+                    if alvo not in componente:
+                        acrescentar(tabela, novas[alvo], peso)
+                novas[variavel] = tabela
+            if ciclica:
+                # Toda cadeia que chega à componente circula nela indefinidamente
+                infinitas = {cadeia: INFINITAS for v in componente for cadeia in novas[v]}
+                for variavel in componente:
+                    novas[variavel] = infinitas
+            armazenadas += sum(len(novas[v]) for v in componente)
+            if max_cadeias is not None and armazenadas > max_cadeias:
+                return False
+
+        # Sequências completas: as próprias mais as de um só símbolo não vazio
+        completas = {}
+        for sequencia in self._ordem_sequencias:
+            tabela = dict(proprias[sequencia])
+            for i, simbolo in enumerate(sequencia):
+                peso = self._vazias_sequencia(sequencia[:i] + sequencia[i + 1:])
+                if peso:
+                    nivel = novas[simbolo] if self.gramatica.e_variavel[simbolo] else self._nivel(simbolo, n)
+                    acrescentar(tabela, nivel, peso)
+            completas[sequencia] = tabela
+
+        for variavel, tabela in novas.items():
+            self.arvores[variavel].append(tabela)
+        for sequencia, tabela in completas.items():
+            self.sequencias[sequencia].append(tabela)
+        self.cadeias_armazenadas = armazenadas
+        self.comprimento = n
+        return True
+
+    def contagem(self, simbolo, cadeia):
+        """
+        Número de árvores do símbolo com a cadeia (tupla de ids, comprimento já calculado).
+        """
+        if not self.gramatica.e_variavel[simbolo]:
+            return 1 if cadeia == (simbolo,) else 0
+        if simbolo not in self.arvores:
+            return 0
+        return self.arvores[simbolo][len(cadeia)].get(cadeia, 0)
+
+    def _contagem_sequencia(self, sequencia, cadeia):
+        if len(sequencia) == 1:
+            return self.contagem(sequencia[0], cadeia)
+        return self.sequencias[sequencia][len(cadeia)].get(cadeia, 0)
+
+    def ambiguas(self, comprimento):
+        """
+        Lista de (cadeia, árvores) das cadeias com mais de uma árvore a partir do
+        símbolo inicial, até o comprimento dado (já calculado), por comprimento.
+        """
+        inicial = self.gramatica.inicial
+        if inicial not in self.arvores:
+            return []
+        resultado = []
+        for n in range(comprimento + 1):
+            resultado.extend(sorted((c, k) for c, k in self.arvores[inicial][n].items() if k > 1))
+        return resultado
+
+    def _divisoes(self, sequencia, cadeia):
+        """
+        Gera as divisões da cadeia em uma parte por símbolo da sequência, todas com
+        árvores (partes vazias incluídas).
+        """
+        if not sequencia:
+            if not cadeia:
+                yield ()
+            return
+        if len(sequencia) == 1:
+            if self.contagem(sequencia[0], cadeia):
+                yield (cadeia,)
+            return
+        if not self._contagem_sequencia(sequencia, cadeia):
+            return
+        for l in range(len(cadeia) + 1):
+            if self.contagem(sequencia[0], cadeia[:l]):
+                for resto in self._divisoes(sequencia[1:], cadeia[l:]):
+                    yield (cadeia[:l],) + resto
+
+    def _alternativas(self, variavel, cadeia):
+        """
+        Gera as alternativas (produção, partes) para a raiz das árvores da variável com a cadeia.
+        """
+        for indice in self.producoes_uteis[variavel]:
+            for partes in self._divisoes(self.gramatica.producoes[indice][1], cadeia):
+                yield indice, partes
+
+    def _unitaria(self, indice, partes):
+        """
+        Variável do corpo que produz a cadeia toda nesta alternativa, ou None.
+        """
+        corpo = self.gramatica.producoes[indice][1]
+        for simbolo, parte in zip(corpo, partes):
+            if parte and self.gramatica.e_variavel[simbolo] and sum(map(len, partes)) == len(parte):
+                return simbolo
+        return None
+
+    def _postos(self, cadeia):
+        """
+        Para as variáveis com árvores da cadeia (não vazia), o menor número de
+        produções unitárias até uma alternativa que reduz a cadeia. Seguir sempre o
+        posto menor garante uma árvore finita mesmo com ciclos.
+        """
+        candidatas = [v for v in self.arvores if self.contagem(v, cadeia)]
+        postos = {}
+        posto = 0
+        while True:
+            novas = []
+            for variavel in candidatas:
+                if variavel in postos:
+                    continue
+                for alternativa in self._alternativas(variavel, cadeia):
+                    alvo = self._unitaria(*alternativa)
+                    if (alvo is None and posto == 0) or (alvo is not None and postos.get(alvo) == posto - 1):
+                        novas.append(variavel)
+                        break
+            if not novas:
+                return postos
+            for variavel in novas:
+                postos[variavel] = posto
+            posto += 1
+
+    def _primeira(self, variavel, cadeia, postos):
+        """
+        Alternativa usada na primeira árvore da variável com a cadeia.
+        """
+        if not cadeia:
+            indice = self.gramatica.analisar()['producao_minima'][variavel]
+            return indice, ((),) * len(self.gramatica.producoes[indice][1])
+        if cadeia not in postos:
+            postos[cadeia] = self._postos(cadeia)
+        posto = postos[cadeia][variavel]
+        for alternativa in self._alternativas(variavel, cadeia):
+            alvo = self._unitaria(*alternativa)
+            if (alvo is None and posto == 0) or (alvo is not None and postos[cadeia].get(alvo) == posto - 1):
+                return alternativa
+        raise AssertionError("variável sem alternativa bem fundada")
+
+    def _preencher(self, no, indice, partes):
+        """
+        Preenche o nó com a produção e retorna os filhos pendentes (nó, variável, parte).
+        """
+        corpo = self.gramatica.producoes[indice][1]
+        no[0] = indice
+        no[1] = []
+        pendentes = []
+        for simbolo, parte in zip(corpo, partes):
+            if self.gramatica.e_variavel[simbolo]:
+                sub = [None, None]
+                pendentes.append((sub, simbolo, parte))
+                no[1].append(sub)
+            else:
+                no[1].append(None)
+        return pendentes
+
+    def _completar(self, pendentes, postos):
+        """
+        Constrói a primeira árvore de cada nó pendente (iterativo, como no reconhecedor).
+        """
+        while pendentes:
+            no, variavel, cadeia = pendentes.pop()
+            if not cadeia:
+                no[:] = arvore_vazia(self.gramatica, variavel)
+                continue
+            pendentes.extend(self._preencher(no, *self._primeira(variavel, cadeia, postos)))
+
+    def testemunha(self, cadeia):
+        """
+        Retorna duas árvores de derivação distintas da cadeia a partir do símbolo
+        inicial, no formato do reconhecedor, ou None se ela tem menos de duas.
+        """
+        if self.contagem(self.gramatica.inicial, cadeia) < 2:
+            return None
+        postos = {}
+        primeira = [None, None]
+        self._completar([(primeira, self.gramatica.inicial, cadeia)], postos)
+
+        # Desce pela primeira árvore até um nó com outra alternativa; os nós em que
+        # só há uma alternativa têm algum filho com duas ou mais árvores
+        segunda = [None, None]
+        pendentes = []
+        no, variavel, parte = segunda, self.gramatica.inicial, cadeia
+        while True:
+            escolhida = self._primeira(variavel, parte, postos)
+            outra = next((a for a in self._alternativas(variavel, parte) if a != escolhida), None)
+            if outra is not None:
+                pendentes.extend(self._preencher(no, *outra))
+                break
+            filhos = self._preencher(no, *escolhida)
+            i = next(i for i, (_, s, p) in enumerate(filhos) if self.contagem(s, p) > 1)
+            no, variavel, parte = filhos.pop(i)
+            pendentes.extend(filhos)
+        self._completar(pendentes, postos)
+
+        return primeira, segunda
@@ -0,0 +1,279 @@
+import random
+import threading
+
+from ambiguidade import INFINITAS, AnalisadorAmbiguidade
+
+
+def _produto(a, b):
+    """
+    Produto de duas contagens, com 0 absorvendo INFINITAS (0 * inf seria nan).
+    """
+    return a * b if a and b else 0
+
+
+class ContadorCadeias:
+    """
+    Contagem exata e amostragem uniforme de árvores de derivação por comprimento.
+
+    As árvores contadas são as da gramática original, as mesmas de
+    GeradorGLC.verificar_ambiguidade(): a soma das contagens das cadeias de
+    comprimento n do AnalisadorAmbiguidade é contar(n). Numa gramática não ambígua
+    esse é o número de cadeias de comprimento n; numa ambígua, cada cadeia conta
+    tantas vezes quanto as suas derivações mais à esquerda. Ciclos de produções
+    unitárias ou anuláveis (A: B, B: A; S: SS, S: epsilon) dão infinitas árvores
+    às cadeias que passam por eles, e a contagem desses comprimentos é INFINITAS.
+
+    As tabelas seguem a decomposição do analisador de ambiguidade, agregada por
+    comprimento em vez de por cadeia, com inteiros exatos:
+
+        contagens[A][n]     = árvores de A com cadeia de comprimento n
+        proprias[s][n]      = árvores da sequência s em que pelo menos dois
+                              símbolos produzem partes não vazias
+        completas[s][n]     = todas as árvores da sequência s
+
+    para as sequências s que são sufixos com dois ou mais símbolos dos corpos úteis.
+    As próprias só usam comprimentos menores que n; as demais árvores passam por
+    produções "unitárias" (um símbolo produz a cadeia toda e os outros a cadeia
+    vazia, com o peso das árvores vazias deles), resolvidas pelas componentes do
+    grafo dessas produções, como no analisador.
+
+    A amostragem escolhe cada alternativa com peso igual ao seu número de árvores,
+    então é uniforme sobre as árvores de derivação de cada comprimento. As árvores
+    da cadeia vazia não influenciam a cadeia sorteada, só os pesos.
+
+    Depois de uma edição da gramática (ver GramaticaCompilada.adicionar_producao),
+    as tabelas das variáveis não afetadas e das sequências que só usam essas
+    variáveis são copiadas da versão anterior do contador em vez de recalculadas.
+    """
+
+    def __init__(self, gramatica):
+        self.gramatica = gramatica
+        # Árvores vazias, produções unitárias e componentes do mesmo modelo da análise de ambiguidade
+        self.analisador = gramatica.derivado('ambiguidade', AnalisadorAmbiguidade)
+        analisador = self.analisador
+        producoes = gramatica.producoes
+
+        self.contagens = {v: [analisador.vazias.get(v, 0)] for v in analisador.producoes_uteis}
+        self.proprias = {}
+        self.completas = {}
+        for indices in analisador.producoes_uteis.values():
+            for indice in indices:
+                corpo = producoes[indice][1]
+                for i in range(len(corpo) - 1):
+                    sequencia = corpo[i:]
+                    if sequencia not in self.proprias:
+                        self.proprias[sequencia] = [0]
+                        self.completas[sequencia] = [self._vazias_sequencia(sequencia)]
+        # As sequências mais curtas primeiro: cada uma usa o próprio sufixo
+        self._ordem_sequencias = sorted(self.proprias, key=len)
+        self._aproveitar(gramatica.derivado_anterior('contador'))
+
+        # Maior comprimento já calculado nas tabelas
+        self.comprimento = 0
+        # As tabelas podem ser compartilhadas entre sessões; só uma as estende por vez
+        self._trava = threading.Lock()
+
+    def _aproveitar(self, anterior):
+        """
+        Copia as tabelas ainda válidas do contador anterior às edições: as das
+        variáveis não afetadas e as das sequências sem nenhuma variável afetada. As
+        demais começam vazias e são preenchidas por _calcular().
+        """
+        if anterior is None:
+            return
+        contador, afetadas = anterior
+        for variavel, tabela in contador.contagens.items():
+            if variavel in self.contagens and variavel not in afetadas:
+                self.contagens[variavel] = list(tabela)
+        for sequencia, tabela in contador.proprias.items():
+            if sequencia in self.proprias and not afetadas.intersection(sequencia):
+                self.proprias[sequencia] = list(tabela)
+                self.completas[sequencia] = list(contador.completas[sequencia])
+
+    def _vazias_sequencia(self, sequencia):
+        """
+        Número de árvores da cadeia vazia para a sequência (0 se ela não é anulável).
+        """
+        vazias = self.analisador.vazias
+        total = 1
+        for simbolo in sequencia:
+            total = _produto(total, vazias.get(simbolo, 0))
+        return total
+
+    def _contagem(self, simbolo, n):
+        """
+        Número de árvores do símbolo com cadeia de comprimento n (n já calculado).
+        """
+        if not self.gramatica.e_variavel[simbolo]:
+            return 1 if n == 1 else 0
+        tabela = self.contagens.get(simbolo)
+        return tabela[n] if tabela is not None else 0
+
+    def _contagem_sequencia(self, sequencia, n):
+        """
+        Número de árvores da sequência com cadeia de comprimento n (n já calculado).
+        """
+        if len(sequencia) == 1:
+            return self._contagem(sequencia[0], n)
+        return self.completas[sequencia][n]
+
+    def _divisoes(self, sequencia, n):
+        """
+        Alternativas das árvores próprias da sequência com comprimento n: pares
+        (peso, l), com l o comprimento não vazio do primeiro símbolo, ou l = 0 para
+        o primeiro símbolo vazio e pelo menos dois não vazios no restante.
+        """
+        primeiro, resto = sequencia[0], sequencia[1:]
+        for l in range(1, n):
+            esquerda = self._contagem(primeiro, l)
+            if esquerda:
+                yield _produto(esquerda, self._contagem_sequencia(resto, n - l)), l
+        if len(resto) > 1:
+            yield _produto(self.analisador.vazias.get(primeiro, 0), self.proprias[resto][n]), 0
+
+    def _unitarias(self, sequencia, n):
+        """
+        Alternativas das árvores da sequência em que só um símbolo produz a cadeia
+        de comprimento n: pares (peso, posição do símbolo).
+        """
+        for i, simbolo in enumerate(sequencia):
+            peso = self._vazias_sequencia(sequencia[:i] + sequencia[i + 1:])
+            if peso:
+                yield _produto(peso, self._contagem(simbolo, n)), i
+
+    def calcular(self, comprimento):
+        """
+        Estende as tabelas até o comprimento dado.
+        """
+        if comprimento <= self.comprimento:
+            return
+        with self._trava:
+            self._calcular(comprimento)
+
+    def _calcular(self, comprimento):
+        analisador = self.analisador
+        producoes = self.gramatica.producoes
+        for n in range(self.comprimento + 1, comprimento + 1):
+            # As tabelas aproveitadas de antes de uma edição já podem ter o nível n
+            for sequencia in self._ordem_sequencias:
+                tabela = self.proprias[sequencia]
+                if len(tabela) <= n:
+                    tabela.append(sum(peso for peso, _ in self._divisoes(sequencia, n)))
+
+            # Variáveis, componente por componente do grafo das produções unitárias
+            for componente, ciclica in analisador.componentes:
+                if all(len(self.contagens[v]) > n for v in componente):
+                    continue
+                for variavel in componente:
+                    total = 0
+                    for indice in analisador.producoes_uteis[variavel]:
+                        corpo = producoes[indice][1]
+                        if len(corpo) > 1:
+                            total += self.proprias[corpo][n]
+                    if n == 1:
+                        total += sum(peso for _, peso in analisador.diretas[variavel])
+                    for alvo, peso in analisador.unitarias[variavel]:
+                        if alvo not in componente:
+                            total += _produto(peso, self.contagens[alvo][n])
+                    self.contagens[variavel].append(total)
+                if ciclica and any(self.contagens[v][n] for v in componente):
+                    # Toda árvore que chega à componente circula nela indefinidamente
+                    for variavel in componente:
+                        self.contagens[variavel][n] = INFINITAS
+
+            # Sequências completas: as próprias mais as de um só símbolo não vazio
+            for sequencia in self._ordem_sequencias:
+                tabela = self.completas[sequencia]
+                if len(tabela) <= n:
+                    tabela.append(self.proprias[sequencia][n] + sum(p for p, _ in self._unitarias(sequencia, n)))
+
+            self.comprimento = n
+
+    def contar(self, comprimento, variavel=None):
+        """
+        Número de árvores de derivação de cadeias com o comprimento dado a partir
+        da variável (por padrão, o símbolo inicial), ou INFINITAS. Não é o número
+        de cadeias distintas se a gramática for ambígua.
+        """
+        if variavel is None:
+            variavel = self.gramatica.inicial
+        if variavel not in self.contagens:
+            return 0  # Variável inútil
+        self.calcular(comprimento)
+        return self.contagens[variavel][comprimento]
+
+    def amostrar(self, comprimento, gerador_aleatorio=random):
+        """
+        Sorteia uma cadeia (tupla de ids de terminais) com o comprimento dado, ou
+        retorna None se a gramática não gera cadeias desse comprimento. O sorteio é
+        uniforme sobre as árvores, então cada cadeia sai com peso igual ao seu
+        número de árvores. Levanta ValueError se elas são infinitas.
+
+        O sorteio é iterativo: uma pilha de tarefas substitui a recursão, de modo que
+        cadeias longas não esbarram no limite de recursão do Python.
+        """
+        total = self.contar(comprimento)
+        if total == INFINITAS:
+            raise ValueError(f"As cadeias de comprimento {comprimento} têm infinitas árvores de derivação "
+                             "(ciclos de produções unitárias ou anuláveis); o sorteio uniforme não é definido")
+        if not total:
+            return None
+
+        analisador = self.analisador
+        producoes = self.gramatica.producoes
+        e_variavel = self.gramatica.e_variavel
+        cadeia = []
+
+        def escolher(alternativas):
+            # Alternativas (peso, valor): escolhe um valor com probabilidade proporcional ao peso
+            alternativas = [a for a in alternativas if a[0]]
+            sorteio = gerador_aleatorio.randrange(sum(peso for peso, _ in alternativas))
+            for peso, valor in alternativas:
+                if sorteio < peso:
+                    return valor
+                sorteio -= peso
+
+        # Tarefas: (símbolo, n), ('propria', sequência, n) ou ('completa', sequência, n)
+        pilha = [(self.gramatica.inicial, comprimento)]
+        while pilha:
+            tarefa = pilha.pop()
+
+            if len(tarefa) == 2:
+                simbolo, n = tarefa
+                if n == 0:
+                    continue  # Árvore vazia: não acrescenta nada à cadeia
+                if not e_variavel[simbolo]:
+                    cadeia.append(simbolo)
+                    continue
+                alternativas = []
+                for indice in analisador.producoes_uteis[simbolo]:
+                    corpo = producoes[indice][1]
+                    if len(corpo) > 1:
+                        alternativas.append((self.proprias[corpo][n], ('propria', corpo, n)))
+                if n == 1:
+                    alternativas.extend((peso, (terminal, 1)) for terminal, peso in analisador.diretas[simbolo])
+                alternativas.extend((_produto(peso, self.contagens[alvo][n]), (alvo, n))
+                                    for alvo, peso in analisador.unitarias[simbolo])
+                pilha.append(escolher(alternativas))
+                continue
+
+            tipo, sequencia, n = tarefa
+            if tipo == 'completa':
+                if len(sequencia) == 1:
+                    pilha.append((sequencia[0], n))
+                elif n:
+                    alternativas = [(self.proprias[sequencia][n], ('propria', sequencia, n))]
+                    alternativas.extend((peso, (sequencia[i], n)) for peso, i in self._unitarias(sequencia, n))
+                    pilha.append(escolher(alternativas))
+                continue
+
+            # Árvore própria: o restante é empilhado antes para que o primeiro símbolo
+            # seja processado primeiro
+            l = escolher(list(self._divisoes(sequencia, n)))
+            if l == 0:
+                pilha.append(('propria', sequencia[1:], n))
+            else:
+                pilha.append(('completa', sequencia[1:], n - l))
+                pilha.append((sequencia[0], l))
+
+        return tuple(cadeia)
@@ -0,0 +1,345 @@
+"""
+Benchmarks do GeradorGLC sobre famílias sintéticas de gramáticas.
+
+Uso:
+    python benchmark.py                               # roda todos os casos
+    python benchmark.py --casos ambigua_3 gramatica.txt
+    python benchmark.py --saida atual.json --comparar anterior.json
+
+Cada caso roda num processo novo, para que o pico de memória (RSS) medido seja
+só dele. A memória também é medida por fase (carga, modo rápido, derivação mais
+à esquerda): o quanto cada uma aumentou o pico de RSS e, com --tracemalloc, o
+quanto alocou. Os resultados são gravados em JSON e podem ser comparados entre
+execuções.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import random
+import resource
+import sys
+import time
+import tracemalloc
+
+DIRETORIO = os.path.dirname(os.path.abspath(__file__))
+
+# Cadeias usadas para medir o tempo até as primeiras k cadeias
+MARCOS_PRIMEIRAS = (1, 10, 100, 1000)
+
+
+def _gramatica(variaveis, terminais, producoes, inicial=None):
+    """
+    Monta o texto de uma gramática no formato aceito por ler_gramatica.
+    Os corpos são listas de símbolos, separados por espaço no texto.
+    """
+    linhas = [
+        "variaveis:" + ",".join(variaveis),
+        "inicial:" + (inicial or variaveis[0]),
+        "terminais:" + ",".join(terminais),
+        "producoes",
+    ]
+    for variavel, corpo in producoes:
+        linhas.append(f"{variavel}: {' '.join(corpo) if corpo else 'epsilon'}")
+    return "\n".join(linhas) + "\n"
+
+
+def recursao_direita(profundidade):
+    """
+    Cadeia de variáveis com recursão à direita: V0: a V1 | a, ..., Vk: a V0 | a.
+    """
+    variaveis = [f"V{i}" for i in range(profundidade)]
+    producoes = []
+    for i, v in enumerate(variaveis):
+        proxima = variaveis[(i + 1) % profundidade]
+        producoes += [(v, ["a", proxima]), (v, ["b"])]
+    return _gramatica(variaveis, ["a", "b"], producoes)
+
+
+def recursao_esquerda(profundidade):
+    """
+    Cadeia de variáveis com recursão à esquerda: V0: V1 a | b, ..., Vk: V0 a | b.
+    """
+    variaveis = [f"V{i}" for i in range(profundidade)]
+    producoes = []
+    for i, v in enumerate(variaveis):
+        proxima = variaveis[(i + 1) % profundidade]
+        producoes += [(v, [proxima, "a"]), (v, ["b"])]
+    return _gramatica(variaveis, ["a", "b"], producoes)
+
+
+def epsilon_pesada(largura):
+    """
+    S: A0 A1 ... Ak, com cada Ai: ai Ai | epsilon (muitas derivações vazias).
+    """
+    variaveis = ["S"] + [f"A{i}" for i in range(largura)]
+    terminais = [f"a{i}" for i in range(largura)]
+    producoes = [("S", variaveis[1:])]
+    for i in range(largura):
+        producoes += [(f"A{i}", [f"a{i}", f"A{i}"]), (f"A{i}", [])]
+    return _gramatica(variaveis, terminais, producoes)
+
+
+def ambigua(operadores):
+    """
+    Expressões altamente ambíguas: E: E op E | x, com vários operadores.
+    """
+    ops = ["+", "*", "-", "/", "^", "%"][:operadores]
+    producoes = [("E", ["E", op, "E"]) for op in ops] + [("E", ["x"])]
+    return _gramatica(["E"], ["x"] + ops, producoes)
+
+
+def alfabeto_largo(tamanho):
+    """
+    S: t S | t para cada um de muitos terminais.
+    """
+    terminais = [f"t{i}" for i in range(tamanho)]
+    producoes = [("S", [t, "S"]) for t in terminais] + [("S", [t]) for t in terminais]
+    return _gramatica(["S"], terminais, producoes)
+
+
+def muitas_producoes(quantidade, semente=0):
+    """
+    Gramática aleatória (com semente fixa) com a quantidade de produções pedida.
+    """
+    aleatorio = random.Random(semente)
+    n_variaveis = max(2, quantidade // 10)
+    variaveis = [f"V{i}" for i in range(n_variaveis)]
+    terminais = [f"t{i}" for i in range(20)]
+    producoes = []
+    # Garante que toda variável termina
+    for v in variaveis:
+        producoes.append((v, [aleatorio.choice(terminais)]))
+    while len(producoes) < quantidade:
+        corpo = [aleatorio.choice(terminais + variaveis) for _ in range(aleatorio.randint(1, 4))]
+        producoes.append((aleatorio.choice(variaveis), corpo))
+    return _gramatica(variaveis, terminais, producoes)
+
+
+def casos_padrao():
+    """
+    Retorna o dicionário nome -> texto da gramática dos casos do benchmark.
+    """
+    casos = {}
+    for nome in ("gramatica.txt", "gramatica_temp.txt"):
+        with open(os.path.join(DIRETORIO, nome)) as f:
+            casos[nome] = f.read()
+    for k in (10, 100):
+        casos[f"recursao_direita_{k}"] = recursao_direita(k)
+        casos[f"recursao_esquerda_{k}"] = recursao_esquerda(k)
+    for k in (4, 8):
+        casos[f"epsilon_pesada_{k}"] = epsilon_pesada(k)
+    for k in (1, 3, 6):
+        casos[f"ambigua_{k}"] = ambigua(k)
+    for k in (50, 500):
+        casos[f"alfabeto_largo_{k}"] = alfabeto_largo(k)
+    for k in (1000, 5000):
+        casos[f"muitas_producoes_{k}"] = muitas_producoes(k)
+    return casos
+
+
+def _pico_rss():
+    """
+    Pico de memória residente do processo, em KB.
+    """
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # No macOS ru_maxrss é dado em bytes
+    if sys.platform == "darwin":
+        pico //= 1024
+    return pico
+
+
+def _inicio_fase():
+    """
+    Marca o início de uma fase para _memoria_fase().
+    """
+    if tracemalloc.is_tracing():
+        tracemalloc.reset_peak()
+        alocada = tracemalloc.get_traced_memory()[0]
+    else:
+        alocada = None
+    return _pico_rss(), alocada
+
+
+def _memoria_fase(inicio):
+    """
+    Memória gasta pela fase iniciada em inicio, em KB: o quanto ela aumentou o
+    pico de RSS e, se o tracemalloc estiver ligado, o quanto ficou alocado ao fim
+    dela e o pico alocado durante ela (ambos relativos ao início da fase).
+    """
+    rss, alocada = inicio
+    memoria = {"rss_kb": _pico_rss() - rss}
+    if alocada is not None:
+        atual, pico = tracemalloc.get_traced_memory()
+        memoria["alocada_kb"] = (atual - alocada) // 1024
+        memoria["pico_alocado_kb"] = (pico - alocada) // 1024
+    return memoria
+
+
+def medir_caso(texto, tempo_maximo, max_cadeias, rastrear=False):
+    """
+    Mede um caso no processo atual e retorna o dicionário de métricas. Com rastrear,
+    liga o tracemalloc para medir as alocações de cada fase (o que deixa os tempos
+    mais lentos).
+    """
+    sys.path.insert(0, DIRETORIO)
+    from gerador import GeradorGLC
+    from gramatica import ler_gramatica
+
+    resultado = {}
+    memoria = resultado["memoria"] = {}
+    if rastrear:
+        tracemalloc.start()
+
+    # Carga da gramática (leitura, compilação e análises)
+    fase = _inicio_fase()
+    inicio = time.perf_counter()
+    gramatica = ler_gramatica(texto=texto)
+    resultado["carga_s"] = time.perf_counter() - inicio
+    resultado["producoes"] = len(gramatica.producoes)
+    memoria["carga"] = _memoria_fase(fase)
+
+    # Modo rápido: tempo até as primeiras k cadeias, vazão e pico da fronteira
+    gerador = GeradorGLC(gramatica=gramatica, max_iteracoes=None)
+    enumerador = gerador.enumerador
+    primeiras = {}
+    cadeias = 0
+    fase = _inicio_fase()
+    inicio = time.perf_counter()
+    while cadeias < max_cadeias and time.perf_counter() - inicio < tempo_maximo:
+        if enumerador.proxima(1000) is not None:
+            cadeias += 1
+            if cadeias in MARCOS_PRIMEIRAS:
+                primeiras[str(cadeias)] = time.perf_counter() - inicio
+        elif enumerador.esgotado:
+            break
+    decorrido = time.perf_counter() - inicio
+    resultado["rapido"] = {
+        "cadeias": cadeias,
+        "expansoes": enumerador.expansoes,
+        "cadeias_por_s": cadeias / decorrido if decorrido else None,
+        "tempo_ate_primeiras_s": primeiras,
+        "duplicadas": enumerador.duplicadas,
+        "pico_fronteira": enumerador.pico_fronteira,
+        "memoria_estimada_bytes": enumerador.memoria_estimada(),
+    }
+    memoria["rapido"] = _memoria_fase(fase)
+
+    # Derivação aleatória mais à esquerda
+    derivacoes = 0
+    passos = 0
+    fase = _inicio_fase()
+    inicio = time.perf_counter()
+    while derivacoes < max_cadeias and time.perf_counter() - inicio < tempo_maximo:
+        _, derivacao = gerador._gerar_mais_a_esquerda(gerador.inicial)
+        derivacoes += 1
+        passos += len(derivacao) - 1
+    decorrido = time.perf_counter() - inicio
+    resultado["mais_a_esquerda"] = {
+        "cadeias": derivacoes,
+        "cadeias_por_s": derivacoes / decorrido if decorrido else None,
+        "passos_por_s": passos / decorrido if decorrido else None,
+    }
+    memoria["mais_a_esquerda"] = _memoria_fase(fase)
+
+    if rastrear:
+        tracemalloc.stop()
+    resultado["pico_rss_kb"] = _pico_rss()
+    return resultado
+
+
+def _medir_em_subprocesso(argumentos):
+    nome, texto, tempo_maximo, max_cadeias, rastrear = argumentos
+    try:
+        return nome, medir_caso(texto, tempo_maximo, max_cadeias, rastrear)
+    except Exception as e:
+        return nome, {"erro": repr(e)}
+
+
+def comparar(atual, anterior):
+    """
+    Imprime a razão entre as métricas principais de duas execuções (atual / anterior).
+    """
+    metricas = [
+        ("carga_s", lambda r: r.get("carga_s")),
+        ("rapido/s", lambda r: r.get("rapido", {}).get("cadeias_por_s")),
+        ("esquerda/s", lambda r: r.get("mais_a_esquerda", {}).get("cadeias_por_s")),
+        ("fronteira", lambda r: r.get("rapido", {}).get("pico_fronteira")),
+        ("rss_kb", lambda r: r.get("pico_rss_kb")),
+        ("rss_rapido", lambda r: r.get("memoria", {}).get("rapido", {}).get("rss_kb")),
+    ]
+    print(f"{'caso':28}" + "".join(f"{nome:>14}" for nome, _ in metricas))
+    for caso, resultado in atual["casos"].items():
+        base = anterior["casos"].get(caso)
+        if base is None:
+            continue
+        linha = f"{caso:28}"
+        for _, extrair in metricas:
+            a, b = extrair(resultado), extrair(base)
+            linha += f"{a / b:>13.2f}x" if a is not None and b else f"{'-':>14}"
+        print(linha)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks do gerador de cadeias.")
+    parser.add_argument("--casos", nargs="*", help="nomes dos casos a rodar (padrão: todos)")
+    parser.add_argument("--tempo", type=float, default=2.0,
+                        help="tempo máximo de cada medição, em segundos (padrão: 2)")
+    parser.add_argument("--max-cadeias", type=int, default=5000,
+                        help="número máximo de cadeias por medição (padrão: 5000)")
+    parser.add_argument("--tracemalloc", action="store_true",
+                        help="mede também as alocações de cada fase (deixa os tempos mais lentos)")
+    parser.add_argument("--saida", help="arquivo JSON para gravar os resultados")
+    parser.add_argument("--comparar", help="arquivo JSON de uma execução anterior")
+    args = parser.parse_args(argv)
+
+    casos = casos_padrao()
+    if args.casos:
+        desconhecidos = [nome for nome in args.casos if nome not in casos]
+        if desconhecidos:
+            parser.error(f"casos desconhecidos: {', '.join(desconhecidos)}")
+        casos = {nome: casos[nome] for nome in args.casos}
+
+    resultados = {
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "data": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "tempo_maximo_s": args.tempo,
+        "max_cadeias": args.max_cadeias,
+        "tracemalloc": args.tracemalloc,
+        "casos": {},
+    }
+
+    # Um processo novo por caso (maxtasksperchild=1) para isolar o pico de RSS
+    contexto = multiprocessing.get_context("spawn")
+    with contexto.Pool(1, maxtasksperchild=1) as pool:
+        argumentos = [(nome, texto, args.tempo, args.max_cadeias, args.tracemalloc)
+                      for nome, texto in casos.items()]
+        for nome, resultado in pool.imap(_medir_em_subprocesso, argumentos):
+            resultados["casos"][nome] = resultado
+            if "erro" in resultado:
+                print(f"{nome:28} erro: {resultado['erro']}")
+                continue
+            rapido = resultado["rapido"]
+            fases = "/".join(f"+{m['rss_kb']}" for m in resultado["memoria"].values())
+            print(f"{nome:28} carga {resultado['carga_s'] * 1000:8.1f} ms"
+                  f"  rápido {rapido['cadeias_por_s'] or 0:10.1f} cadeias/s"
+                  f"  fronteira {rapido['pico_fronteira']:8d}"
+                  f"  RSS {resultado['pico_rss_kb']:8d} KB ({fases})")
+
+    if args.saida:
+        with open(args.saida, "w") as f:
+            json.dump(resultados, f, indent=2, ensure_ascii=False)
+
+    if args.comparar:
+        with open(args.comparar) as f:
+            anterior = json.load(f)
+        print()
+        comparar(resultados, anterior)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
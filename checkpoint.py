@@ -0,0 +1,329 @@
+"""
+Pontos de restauração (checkpoints) da enumeração do modo rápido.
+
+Um checkpoint guarda num arquivo binário compacto todo o estado da enumeração:
+a fronteira, as células dos prefixos, a árvore de derivações, as estruturas de
+deduplicação e os contadores, além da configuração do gerador. Formato:
+
+    MAGICO (8 bytes) | tamanho do cabeçalho (8 bytes, little-endian) |
+    cabeçalho JSON | seções
+
+As seções são arrays binários alinhados em 8 bytes, na ordem de bytes da máquina
+que gravou (registrada no cabeçalho, junto com a posição, o tipo e o número de
+itens de cada seção). Na carga o arquivo é mapeado em memória (mmap com
+ACCESS_COPY, então as páginas só são lidas quando usadas e as escritas não voltam
+para o arquivo): a árvore de derivações e as tabelas de hashes ou de bits da
+deduplicação são usadas direto do mapeamento, e só a fronteira e os conjuntos
+exatos viram objetos Python. Numa máquina com outra ordem de bytes as seções são
+copiadas e convertidas.
+
+A enumeração em ordem shortlex não guarda tabelas: elas são determinadas pela
+gramática e são recalculadas até o comprimento em que a enumeração parou, aos
+poucos e sob o orçamento das chamadas seguintes (ver EnumeradorShortlex.retomar()).
+"""
+import array
+import collections
+import contextlib
+import gc
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+import tempfile
+
+from deduplicacao import BLOOM, EXATO, HASH, ConjuntoHash, FiltroBloom, criar_conjunto
+from enumerador import EnumeradorCadeias
+from enumerador_shortlex import EnumeradorShortlex
+
+MAGICO = b'GLCCKPT\x01'
+VERSAO = 3  # 2: número de cadeias geradas no lugar do conjunto delas; 3: impressões blake2b
+
+# Contadores gravados de cada tipo de enumerador
+CONTADORES = {
+    EnumeradorCadeias: ('expansoes', 'emitidas', 'duplicadas', 'pico_fronteira', 'simbolos_armazenados'),
+    EnumeradorShortlex: ('expansoes', 'emitidas', 'duplicadas', 'pico_fronteira'),
+}
+
+
+def impressao_gramatica(gramatica):
+    """
+    Hash SHA-256 dos símbolos e das produções da gramática compilada. O estado da
+    enumeração usa ids de símbolos e índices de produções, então só pode ser
+    retomado numa gramática com exatamente a mesma compilação.
+    """
+    conteudo = [gramatica.simbolos, list(gramatica.e_variavel), gramatica.inicial, gramatica.producoes]
+    return hashlib.sha256(json.dumps(conteudo).encode('utf-8')).hexdigest()
+
+
+class _Escritor:
+    """
+    Acumula as seções de um checkpoint e grava o arquivo.
+    """
+
+    def __init__(self):
+        self.secoes = []  # (nome, tipo, partes), cada parte com o protocolo de buffer
+
+    def secao(self, nome, tipo, *partes):
+        self.secoes.append((nome, tipo, partes))
+
+    def gravar(self, caminho, cabecalho):
+        """
+        Grava o arquivo num temporário e o troca pelo destino de uma vez, de modo
+        que um checkpoint antigo no mesmo caminho (possivelmente mapeado por uma
+        enumeração retomada dele) nunca fica pela metade.
+        """
+        tamanho_item = {tipo: array.array(tipo).itemsize for _, tipo, _ in self.secoes}
+        posicoes = {}
+        for nome, tipo, partes in self.secoes:
+            itens = sum(len(memoryview(parte).cast('B')) for parte in partes) // tamanho_item[tipo]
+            posicoes[nome] = [0, tipo, itens]
+
+        # A posição das seções depende do tamanho do cabeçalho, que contém as posições;
+        # o cabeçalho é reservado com folga e completado com espaços
+        cabecalho = dict(cabecalho, ordem_bytes=sys.byteorder, secoes=posicoes)
+        reservado = len(json.dumps(cabecalho).encode('utf-8')) + 32 * len(posicoes) + 64
+        inicio = _alinhar(len(MAGICO) + 8 + reservado)
+        posicao = inicio
+        for nome, tipo, partes in self.secoes:
+            posicoes[nome][0] = posicao
+            posicao = _alinhar(posicao + posicoes[nome][2] * tamanho_item[tipo])
+        texto = json.dumps(cabecalho).encode('utf-8')
+        texto += b' ' * (inicio - len(MAGICO) - 8 - len(texto))
+
+        diretorio = os.path.dirname(os.path.abspath(caminho))
+        descritor, temporario = tempfile.mkstemp(dir=diretorio, suffix='.tmp')
+        try:
+            with os.fdopen(descritor, 'wb') as f:
+                f.write(MAGICO)
+                f.write(struct.pack('<Q', len(texto)))
+                f.write(texto)
+                for nome, tipo, partes in self.secoes:
+                    for parte in partes:
+                        f.write(parte)
+                    f.write(bytes(_alinhar(f.tell()) - f.tell()))
+            os.replace(temporario, caminho)
+        except BaseException:
+            os.unlink(temporario)
+            raise
+
+
+def _alinhar(posicao):
+    return (posicao + 7) & ~7
+
+
+def _gravar_formas(escritor, nome, formas):
+    """
+    Grava uma coleção de pares (célula do prefixo, resto) como três arrays; os
+    restos, que são a maior parte, usam inteiros de 32 bits.
+    """
+    prefixos = array.array('q')
+    tamanhos = array.array('i')
+    simbolos = array.array('i')
+    for prefixo, resto in formas:
+        prefixos.append(prefixo)
+        tamanhos.append(len(resto))
+        simbolos.extend(resto)
+    escritor.secao(nome + '_prefixos', 'q', prefixos)
+    escritor.secao(nome + '_tamanhos', 'i', tamanhos)
+    escritor.secao(nome + '_simbolos', 'i', simbolos)
+
+
+def _gravar_conjunto(escritor, nome, conjunto, modo, itens):
+    """
+    Grava uma estrutura de deduplicação e retorna os seus metadados. Os itens de
+    um conjunto exato são gravados por itens(escritor, nome, conjunto).
+    """
+    if modo == EXATO:
+        itens(escritor, nome, conjunto)
+        return {}
+    metadados, dados = conjunto.exportar()
+    escritor.secao(nome, 'Q' if modo == HASH else 'B', dados)
+    return metadados
+
+
+@contextlib.contextmanager
+def _sem_coletor():
+    """
+    Suspende o coletor de ciclos enquanto milhões de tuplas são recriadas: nenhuma
+    delas forma ciclos, e as coletas disparadas pelas alocações dominariam o tempo
+    da carga.
+    """
+    ativo = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if ativo:
+            gc.enable()
+
+
+def salvar(caminho, gerador):
+    """
+    Grava o estado da enumeração do modo rápido do gerador no caminho dado.
+    """
+    enumerador = gerador.enumerador
+    escritor = _Escritor()
+    cabecalho = {
+        'versao': VERSAO,
+        'gramatica': impressao_gramatica(gerador.gramatica),
+        'ordem': gerador.ordem,
+        'comprimento_maximo': gerador.comprimento_maximo,
+        'deduplicacao': gerador.deduplicacao,
+        'opcoes_deduplicacao': gerador.opcoes_deduplicacao,
+        'cadeias_geradas': gerador.cadeias_geradas,
+        'contadores': {nome: getattr(enumerador, nome) for nome in CONTADORES[type(enumerador)]},
+    }
+
+    if isinstance(enumerador, EnumeradorShortlex):
+        comprimento, restantes = enumerador.posicao()
+        cabecalho['shortlex'] = {'comprimento': comprimento, 'restantes': restantes}
+    else:
+        escritor.secao('cel_simbolo', 'q', enumerador.cel_simbolo)
+        escritor.secao('cel_proxima', 'q', enumerador.cel_proxima)
+        escritor.secao('cel_comprimento', 'q', enumerador.cel_comprimento)
+
+        # Os nós mapeados de um checkpoint anterior vêm antes dos nós novos
+        mapeados = enumerador.arvore_mapeada or (b'', b'', b'')
+        escritor.secao('pais', 'q', mapeados[0], enumerador.pais)
+        escritor.secao('producoes_aplicadas', 'q', mapeados[1], enumerador.producoes_aplicadas)
+        escritor.secao('posicoes', 'q', mapeados[2], enumerador.posicoes)
+
+        fila = enumerador.fila
+        _gravar_formas(escritor, 'fila', ((prefixo, resto) for prefixo, resto, _, _ in fila))
+        escritor.secao('fila_nos', 'q', array.array('q', (item[2] for item in fila)))
+        escritor.secao('fila_rendimentos', 'q', array.array('q', (item[3] for item in fila)))
+
+        cabecalho['visitados'] = _gravar_conjunto(
+            escritor, 'visitados', enumerador.visitados, gerador.deduplicacao, _gravar_formas)
+
+    escritor.gravar(caminho, cabecalho)
+
+
+class Checkpoint:
+    """
+    Checkpoint aberto para leitura, com o arquivo mapeado em memória.
+
+    configuracao tem a ordem, o comprimento máximo e a deduplicação com que a
+    enumeração foi gravada; enumerador() os usa, e o gerador só os adota depois
+    que o enumerador foi recriado.
+    """
+
+    def __init__(self, caminho):
+        with open(caminho, 'rb') as f:
+            if f.read(len(MAGICO)) != MAGICO:
+                raise ValueError(f"{caminho} não é um checkpoint do gerador")
+            tamanho, = struct.unpack('<Q', f.read(8))
+            self.cabecalho = json.loads(f.read(tamanho))
+            if self.cabecalho['versao'] != VERSAO:
+                raise ValueError(f"Versão de checkpoint não suportada: {self.cabecalho['versao']}")
+            # O mapeamento continua válido depois que o arquivo é fechado
+            self._mapa = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+        self._dados = memoryview(self._mapa)
+        self._trocar_bytes = self.cabecalho['ordem_bytes'] != sys.byteorder
+        self.configuracao = {
+            chave: self.cabecalho[chave]
+            for chave in ('ordem', 'comprimento_maximo', 'deduplicacao', 'opcoes_deduplicacao')
+        }
+        self.cadeias_geradas = self.cabecalho['cadeias_geradas']  # cadeias já mostradas pelo modo rápido
+
+    def verificar(self, gramatica):
+        """
+        Levanta ValueError se o checkpoint foi gravado com outra gramática.
+        """
+        if self.cabecalho['gramatica'] != impressao_gramatica(gramatica):
+            raise ValueError("O checkpoint foi gravado com outra gramática")
+
+    def _secao(self, nome):
+        """
+        Retorna a seção como um memoryview gravável do mapeamento, sem cópia (ou
+        como um array convertido, se a ordem de bytes da máquina for outra).
+        """
+        posicao, tipo, itens = self.cabecalho['secoes'][nome]
+        tamanho = array.array(tipo).itemsize * itens
+        dados = self._dados[posicao:posicao + tamanho]
+        if not self._trocar_bytes:
+            return dados.cast(tipo)
+        copia = array.array(tipo, dados.tobytes())
+        copia.byteswap()
+        return copia
+
+    def _array(self, nome):
+        """
+        Retorna a seção copiada para um array, que pode crescer.
+        """
+        secao = self._secao(nome)
+        if isinstance(secao, array.array):
+            return secao
+        copia = array.array(secao.format)
+        copia.frombytes(secao.cast('B'))
+        return copia
+
+    def _formas(self, nome):
+        """
+        Itera pelos pares (célula do prefixo, resto) gravados por _gravar_formas().
+        """
+        simbolos = self._secao(nome + '_simbolos')
+        inicio = 0
+        for prefixo, tamanho in zip(self._secao(nome + '_prefixos'), self._secao(nome + '_tamanhos')):
+            yield prefixo, tuple(simbolos[inicio:inicio + tamanho])
+            inicio += tamanho
+
+    def _conjunto(self, nome, itens):
+        """
+        Recria uma estrutura de deduplicação no modo do checkpoint. As tabelas de
+        hashes e de bits são usadas direto do mapeamento.
+        """
+        modo = self.configuracao['deduplicacao']
+        if modo == HASH:
+            return ConjuntoHash.importar(self.cabecalho[nome], self._secao(nome))
+        if modo == BLOOM:
+            return FiltroBloom.importar(self.cabecalho[nome], self._secao(nome))
+        conjunto = criar_conjunto(modo, **self.configuracao['opcoes_deduplicacao'])
+        with _sem_coletor():
+            conjunto.update(itens(nome))
+        return conjunto
+
+    def enumerador(self, gerador):
+        """
+        Recria o enumerador do modo rápido para o gerador no ponto em que ele foi
+        gravado, com a configuração do checkpoint (configuracao). Não altera o
+        gerador, que pode estar em outra ordem ou com outra deduplicação.
+        """
+        self.verificar(gerador.gramatica)
+        comprimento_maximo = self.configuracao['comprimento_maximo']
+
+        if 'shortlex' in self.cabecalho:
+            enumerador = EnumeradorShortlex(gerador, comprimento_maximo)
+            enumerador.retomar(self.cabecalho['shortlex']['comprimento'], self.cabecalho['shortlex']['restantes'])
+        else:
+            enumerador = EnumeradorCadeias(gerador, comprimento_maximo)
+            enumerador.cel_simbolo = self._array('cel_simbolo')
+            enumerador.cel_proxima = self._array('cel_proxima')
+            enumerador.cel_comprimento = self._array('cel_comprimento')
+            enumerador.celulas = None  # Remontado na primeira expansão
+
+            enumerador.arvore_mapeada = (
+                self._secao('pais'), self._secao('producoes_aplicadas'), self._secao('posicoes'))
+            enumerador.nos_mapeados = len(enumerador.arvore_mapeada[0])
+            enumerador.pais = array.array('q')
+            enumerador.producoes_aplicadas = array.array('q')
+            enumerador.posicoes = array.array('q')
+
+            with _sem_coletor():
+                enumerador.fila = collections.deque(
+                    (prefixo, resto, no, rendimento) for (prefixo, resto), no, rendimento
+                    in zip(self._formas('fila'), self._secao('fila_nos'), self._secao('fila_rendimentos')))
+            enumerador.visitados = self._conjunto('visitados', self._formas)
+
+        for nome, valor in self.cabecalho['contadores'].items():
+            setattr(enumerador, nome, valor)
+        return enumerador
+
+
+def carregar(caminho):
+    """
+    Abre o checkpoint gravado por salvar().
+    """
+    return Checkpoint(caminho)
@@ -0,0 +1,249 @@
+import array
+import hashlib
+import math
+import struct
+import sys
+
+# Modos de deduplicação aceitos por criar_conjunto()
+EXATO = "exato"
+HASH = "hash"
+BLOOM = "bloom"
+MODOS = (EXATO, HASH, BLOOM)
+
+_MASCARA_64 = (1 << 64) - 1
+_MULTIPLICADOR = 0x9E3779B97F4A7C15  # mistura de Fibonacci para derivar um segundo hash
+
+
+def _bytes_item(item):
+    """
+    Bytes que identificam o item: o texto em UTF-8 (cadeias geradas em lote) ou,
+    para o par (célula do prefixo, resto) do enumerador, os ids empacotados em
+    little-endian, para que a representação não dependa da máquina.
+    """
+    if isinstance(item, str):
+        return item.encode('utf-8')
+    prefixo, resto = item
+    return struct.pack(f'<q{len(resto)}i', prefixo, *resto)
+
+
+def _impressao(item):
+    """
+    Hash de 64 bits do item, nunca zero (zero marca posição vazia na tabela).
+
+    É um resumo blake2b dos bytes do item, e não hash(): o hash de um texto muda
+    a cada processo (PYTHONHASHSEED), e as tabelas gravadas num checkpoint precisam
+    dar as mesmas impressões quando a enumeração é retomada em outro processo, em
+    outra versão do Python ou em outra máquina.
+    """
+    resumo = hashlib.blake2b(_bytes_item(item), digest_size=8).digest()
+    return int.from_bytes(resumo, 'little') or 1
+
+
+class ConjuntoExato(set):
+    """
+    Conjunto Python comum: guarda os próprios itens e nunca erra.
+    """
+
+    guarda_itens = True
+
+    def memoria(self):
+        """
+        Bytes da tabela do conjunto (sem contar os itens, que são compartilhados).
+        """
+        return sys.getsizeof(self)
+
+
+class ConjuntoHash:
+    """
+    Guarda apenas um hash de 64 bits de cada item, numa tabela de endereçamento
+    aberto (array de inteiros sem sinal), a 8 bytes por posição.
+
+    Dois itens distintos com o mesmo hash são tratados como iguais; com n itens
+    a chance de alguma colisão é de cerca de n² / 2⁶⁵ (menos de 1 em 10⁷ para um
+    milhão de itens). A tabela dobra quando passa da metade da ocupação.
+    """
+
+    guarda_itens = False
+
+    def __init__(self, capacidade=1024):
+        tamanho = 16
+        while tamanho < 2 * capacidade:
+            tamanho *= 2
+        self._tabela = array.array('Q', bytes(8 * tamanho))
+        self._mascara = tamanho - 1
+        self._quantidade = 0
+
+    def __len__(self):
+        return self._quantidade
+
+    def _posicao(self, impressao):
+        """
+        Posição da impressão na tabela, ou da posição vazia onde ela entraria.
+        """
+        tabela = self._tabela
+        mascara = self._mascara
+        i = (impressao ^ (impressao >> 29)) & mascara
+        while True:
+            valor = tabela[i]
+            if valor == 0 or valor == impressao:
+                return i
+            i = (i + 1) & mascara
+
+    def __contains__(self, item):
+        impressao = _impressao(item)
+        return self._tabela[self._posicao(impressao)] == impressao
+
+    def add(self, item):
+        self.adicionar(item)
+
+    def adicionar(self, item):
+        """
+        Adiciona o item e retorna True se ele ainda não estava no conjunto.
+        """
+        impressao = _impressao(item)
+        i = self._posicao(impressao)
+        if self._tabela[i] == impressao:
+            return False
+        self._tabela[i] = impressao
+        self._quantidade += 1
+        if 2 * self._quantidade > len(self._tabela):
+            self._crescer()
+        return True
+
+    def _crescer(self):
+        antiga = self._tabela
+        self._tabela = array.array('Q', bytes(16 * len(antiga)))
+        self._mascara = len(self._tabela) - 1
+        for impressao in antiga:
+            if impressao:
+                self._tabela[self._posicao(impressao)] = impressao
+
+    def memoria(self):
+        return self._tabela.itemsize * len(self._tabela)
+
+    def exportar(self):
+        """
+        Retorna (metadados, tabela) para gravar o conjunto num checkpoint.
+        """
+        return {'quantidade': self._quantidade}, self._tabela
+
+    @classmethod
+    def importar(cls, metadados, tabela):
+        """
+        Recria o conjunto a partir de exportar(). A tabela pode ser um memoryview
+        gravável de inteiros sem sinal de 64 bits (por exemplo, de um arquivo mapeado
+        em memória): ela é usada sem cópia até o conjunto precisar crescer.
+        """
+        conjunto = cls.__new__(cls)
+        conjunto._tabela = tabela
+        conjunto._mascara = len(tabela) - 1
+        conjunto._quantidade = metadados['quantidade']
+        return conjunto
+
+
+class FiltroBloom:
+    """
+    Filtro de Bloom: memória fixa, definida na criação, e nenhum falso negativo.
+
+    O número de bits e de funções de hash é calculado para a capacidade e a taxa
+    de falsos positivos pedidas; memoria_maxima (em bytes) limita o tamanho do
+    filtro, à custa de uma taxa maior. Passada a capacidade, a memória continua a
+    mesma e a taxa de falsos positivos cresce (ver taxa_estimada()).
+
+    Um falso positivo faz um item novo ser tratado como repetido: na enumeração,
+    a forma sentencial correspondente é descartada e as cadeias que só ela geraria
+    podem não aparecer.
+    """
+
+    guarda_itens = False
+
+    def __init__(self, capacidade=1000000, taxa_falsos_positivos=0.001, memoria_maxima=None):
+        if not 0 < taxa_falsos_positivos < 1:
+            raise ValueError("A taxa de falsos positivos deve estar entre 0 e 1")
+        bits = math.ceil(-capacidade * math.log(taxa_falsos_positivos) / math.log(2) ** 2)
+        if memoria_maxima is not None:
+            bits = min(bits, 8 * memoria_maxima)
+        self.bits = max(bits, 64)
+        self.funcoes = max(1, round(self.bits / capacidade * math.log(2)))
+        self._bits = bytearray((self.bits + 7) // 8)
+        self._quantidade = 0
+
+    def __len__(self):
+        return self._quantidade
+
+    def _posicoes(self, item):
+        # Hash duplo: h1 + i * h2, com h2 ímpar derivado de h1
+        h1 = _impressao(item)
+        h2 = ((h1 * _MULTIPLICADOR) & _MASCARA_64) | 1
+        bits = self.bits
+        return [(h1 + i * h2) % bits for i in range(self.funcoes)]
+
+    def __contains__(self, item):
+        filtro = self._bits
+        return all(filtro[p >> 3] & (1 << (p & 7)) for p in self._posicoes(item))
+
+    def add(self, item):
+        self.adicionar(item)
+
+    def adicionar(self, item):
+        """
+        Adiciona o item e retorna True se ele não parecia estar no filtro.
+        """
+        filtro = self._bits
+        novo = False
+        for p in self._posicoes(item):
+            mascara = 1 << (p & 7)
+            if not filtro[p >> 3] & mascara:
+                filtro[p >> 3] |= mascara
+                novo = True
+        if novo:
+            self._quantidade += 1
+        return novo
+
+    def taxa_estimada(self):
+        """
+        Taxa de falsos positivos esperada com os itens adicionados até agora.
+        """
+        return (1 - math.exp(-self.funcoes * self._quantidade / self.bits)) ** self.funcoes
+
+    def memoria(self):
+        return len(self._bits)
+
+    def exportar(self):
+        """
+        Retorna (metadados, bits) para gravar o filtro num checkpoint.
+        """
+        return {'bits': self.bits, 'funcoes': self.funcoes, 'quantidade': self._quantidade}, self._bits
+
+    @classmethod
+    def importar(cls, metadados, bits):
+        """
+        Recria o filtro a partir de exportar(); bits pode ser um memoryview gravável
+        de bytes, usado sem cópia.
+        """
+        filtro = cls.__new__(cls)
+        filtro.bits = metadados['bits']
+        filtro.funcoes = metadados['funcoes']
+        filtro._bits = bits
+        filtro._quantidade = metadados['quantidade']
+        return filtro
+
+
+def criar_conjunto(modo=EXATO, **opcoes):
+    """
+    Cria a estrutura de deduplicação do modo dado:
+
+        'exato' - conjunto Python com os próprios itens
+        'hash'  - hashes de 64 bits numa tabela compacta (opções: capacidade)
+        'bloom' - filtro de Bloom de memória fixa (opções: capacidade,
+                  taxa_falsos_positivos, memoria_maxima)
+
+    Todas aceitam item in conjunto, conjunto.add(item), len() e memoria().
+    """
+    if modo == EXATO:
+        return ConjuntoExato()
+    if modo == HASH:
+        return ConjuntoHash(**opcoes)
+    if modo == BLOOM:
+        return FiltroBloom(**opcoes)
+    raise ValueError(f"Modo de deduplicação desconhecido: {modo}")
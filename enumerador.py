@@ -0,0 +1,362 @@
+import array
+import collections
+
+from formas import Derivacao
+
+# Estimativas de memória (em bytes) usadas por memoria_estimada()
+BYTES_POR_FORMA = 150   # item da fila e chave no conjunto de visitados
+BYTES_POR_SIMBOLO = 8   # referência a um id dentro da tupla do resto
+BYTES_POR_CELULA = 100  # três inteiros de 64 bits e a entrada no dicionário de células
+BYTES_POR_NO = 24       # três inteiros de 64 bits na árvore de derivações
+
+# Célula que representa o prefixo vazio
+VAZIA = 0
+
+
+class EnumeradorCadeias:
+    """
+    Enumerador persistente das cadeias terminais de uma gramática.
+
+    Faz uma busca em largura sobre as formas sentenciais (derivação mais à esquerda)
+    e mantém a fronteira e o conjunto de visitados entre as chamadas, de modo que
+    cada nova cadeia continua a busca de onde a anterior parou.
+
+    Numa derivação mais à esquerda, tudo o que vem antes da variável mais à esquerda
+    é um prefixo de terminais que não muda mais. Cada forma é guardada como esse
+    prefixo mais o resto, a tupla de símbolos que começa na variável mais à esquerda.
+    O prefixo é uma lista encadeada persistente de células internadas, em ordem
+    inversa (o último terminal na cabeça): a célula (símbolo, próxima) é criada uma
+    única vez e compartilhada por todas as formas com aquele prefixo. Assim:
+
+        - a variável mais à esquerda é resto[0], sem varrer a forma;
+        - aplicar uma produção copia só o resto, nunca o prefixo, que é a parte
+          que cresce sem parar em gramáticas com recursão à direita;
+        - duas formas são iguais se e só se têm a mesma célula de prefixo e o mesmo
+          resto, então a chave em visitados é o par (prefixo, resto).
+
+    O resto continua uma tupla porque copiá-la é feito em C e, nas gramáticas
+    usuais, ela é curta; trocá-la por células deixaria cada passo mais lento.
+
+    As derivações ficam numa árvore compartilhada: cada nó guarda apenas o nó pai,
+    o índice da produção aplicada e a posição do não-terminal substituído. A lista
+    de passos só é reconstruída quando uma cadeia terminal é retornada. Numa
+    enumeração retomada de um checkpoint (ver checkpoint.py), os primeiros
+    nos_mapeados nós continuam no arquivo, mapeado em memória, e só os nós novos
+    ficam nos arrays.
+
+    Só são usadas as produções úteis da gramática, então toda forma na fronteira
+    ainda pode terminar. Com comprimento_maximo, as formas cujo rendimento mínimo
+    (comprimento da menor cadeia que ainda podem gerar) passa desse limite são
+    descartadas, e a enumeração produz todas as cadeias de comprimento até ele.
+    Gramáticas com recursão por variáveis anuláveis (ex.: B: BB, B: epsilon) podem
+    gerar infinitas formas dentro do limite; o orçamento de proxima() continua valendo.
+
+    A estrutura de deduplicação do gerador (exata, hashes ou filtro de Bloom) limita
+    só a memória de visitados. A fronteira, a árvore de derivações e as células dos
+    prefixos continuam crescendo com a busca: numa busca em largura a fronteira
+    cresce junto com as cadeias emitidas, e os nós da árvore são mantidos enquanto
+    alguma forma pode reconstruir a sua derivação a partir deles. Em nenhum modo a
+    memória total da enumeração fica fixa.
+    """
+
+    def __init__(self, gerador, comprimento_maximo=None):
+        self.gerador = gerador
+        self.gramatica = gerador.gramatica
+        self.comprimento_maximo = comprimento_maximo
+
+        # Células dos prefixos: símbolo, célula anterior e comprimento do prefixo que
+        # termina nela; a célula 0 é o prefixo vazio. celulas mapeia
+        # anterior * base + símbolo para a célula já criada.
+        self.base = len(self.gramatica.simbolos)
+        self.cel_simbolo = array.array('q', [-1])
+        self.cel_proxima = array.array('q', [-1])
+        self.cel_comprimento = array.array('q', [0])
+        self.celulas = {}
+
+        # Árvore de derivações; o nó 0 é a raiz (símbolo inicial)
+        self.pais = array.array('q', [-1])
+        self.producoes_aplicadas = array.array('q', [-1])
+        self.posicoes = array.array('q', [-1])
+        # Nós lidos de um checkpoint: (pais, produções, posições) como memoryviews
+        # do arquivo mapeado, e quantos são (os nós dos arrays vêm depois deles)
+        self.arvore_mapeada = None
+        self.nos_mapeados = 0
+
+        # Fila para busca em largura
+        # Cada item da fila é uma tupla (prefixo, resto, nó da árvore de derivações,
+        # rendimento mínimo da forma), com o prefixo dado pela sua última célula
+        inicial = (self.gramatica.inicial,)
+        analises = self.gramatica.analisar()
+        self.fila = collections.deque()
+        rendimento = analises['rendimento'][self.gramatica.inicial]
+        prefixo, resto = self.dividir(inicial)
+        if (self.gramatica.inicial in analises['alcancaveis']
+                and (comprimento_maximo is None or rendimento <= comprimento_maximo)):
+            self.fila.append((prefixo, resto, 0, rendimento))
+
+        # Conjunto para rastrear formas sentenciais já visitadas; a estrutura
+        # (conjunto exato, hashes ou filtro de Bloom) é escolhida pelo gerador
+        self.visitados = gerador.criar_conjunto()
+        self.visitados.add((prefixo, resto))
+
+        # Contadores da enumeração
+        self.expansoes = 0
+        self.emitidas = 0
+        self.duplicadas = 0             # formas descartadas por já estarem em visitados
+        self.pico_fronteira = len(self.fila)
+        self.simbolos_armazenados = len(resto)   # soma dos tamanhos dos restos visitados
+
+    @property
+    def nos(self):
+        """
+        Número de nós da árvore de derivações, incluindo os mapeados.
+        """
+        return self.nos_mapeados + len(self.pais)
+
+    def _indexar_celulas(self):
+        """
+        Retorna o dicionário de células, remontando-o a partir dos arrays se ele
+        foi descartado (checkpoints guardam só os arrays).
+        """
+        if self.celulas is None:
+            base = self.base
+            self.celulas = {
+                proxima * base + simbolo: celula
+                for celula, (simbolo, proxima) in enumerate(zip(self.cel_simbolo, self.cel_proxima)) if celula
+            }
+        return self.celulas
+
+    def celula(self, simbolo, proxima):
+        """
+        Retorna a célula (internada) do prefixo formado pelo prefixo que termina na
+        célula proxima seguido do símbolo.
+        """
+        chave = proxima * self.base + simbolo
+        celula = self._indexar_celulas().get(chave)
+        if celula is None:
+            celula = self.celulas[chave] = len(self.celulas) + 1
+            self.cel_simbolo.append(simbolo)
+            self.cel_proxima.append(proxima)
+            self.cel_comprimento.append(self.cel_comprimento[proxima] + 1)
+        return celula
+
+    def dividir(self, forma):
+        """
+        Converte uma forma (tupla de ids) no par (célula do prefixo, resto).
+        """
+        pos = self.gramatica.posicao_variavel(forma)
+        if pos == -1:
+            pos = len(forma)
+        prefixo = VAZIA
+        for simbolo in forma[:pos]:
+            prefixo = self.celula(simbolo, prefixo)
+        return prefixo, tuple(forma[pos:])
+
+    def simbolos(self, prefixo, resto=()):
+        """
+        Converte o par (célula do prefixo, resto) de volta na tupla de ids da forma.
+        """
+        cel_simbolo = self.cel_simbolo
+        cel_proxima = self.cel_proxima
+        inicio = []
+        while prefixo != VAZIA:
+            inicio.append(cel_simbolo[prefixo])
+            prefixo = cel_proxima[prefixo]
+        inicio.reverse()
+        return tuple(inicio) + resto
+
+    def memoria_estimada(self):
+        """
+        Estimativa, em bytes, da memória ocupada pelas formas visitadas, pela fila,
+        pelas células dos prefixos e pela árvore de derivações. É calculada em tempo
+        constante a partir dos contadores.
+
+        Quando visitados guarda só hashes, apenas as formas da fila continuam na
+        memória; o tamanho dos seus restos é estimado pela média.
+        """
+        memoria = len(self.cel_simbolo) * BYTES_POR_CELULA + len(self.pais) * BYTES_POR_NO
+        if self.visitados.guarda_itens:
+            return (memoria + len(self.visitados) * BYTES_POR_FORMA
+                    + self.simbolos_armazenados * BYTES_POR_SIMBOLO)
+        media_simbolos = self.simbolos_armazenados / self.nos
+        return (memoria + len(self.fila) * (BYTES_POR_FORMA + media_simbolos * BYTES_POR_SIMBOLO)
+                + self.visitados.memoria())
+
+    def contadores(self):
+        """
+        Retorna os contadores da enumeração (usados por GeradorGLC.stats()).
+        """
+        return {
+            'expansoes': self.expansoes,
+            'duplicadas': self.duplicadas,
+            'emitidas': self.emitidas,
+            'fronteira': len(self.fila),
+            'pico_fronteira': self.pico_fronteira,
+            'visitados': len(self.visitados),
+            'memoria_estimada': self.memoria_estimada(),
+        }
+
+    @property
+    def esgotado(self):
+        """
+        True se a fronteira está vazia, ou seja, todas as cadeias já foram enumeradas.
+        """
+        return not self.fila
+
+    def proxima(self, max_iteracoes=None):
+        """
+        Continua a busca até encontrar a próxima cadeia terminal.
+
+        Retorna a tupla (cadeia, derivacao), ou None se a fronteira se esgotou ou se
+        o orçamento de max_iteracoes expansões foi atingido (None = sem limite).
+        No segundo caso a busca pode ser retomada numa nova chamada.
+        """
+        estatisticas = self.gerador.estatisticas
+        with estatisticas.fase('busca'):
+            resultado = self.proxima_terminal(max_iteracoes)
+        if resultado is None:
+            return None
+        forma, no = resultado
+        with estatisticas.fase('reconstrucao'):
+            return self.gramatica.decodificar(forma), self.reconstruir_derivacao(no)
+
+    def proxima_terminal(self, max_iteracoes=None):
+        """
+        Como proxima(), mas retorna a forma terminal (tupla de ids) e o seu nó na
+        árvore de derivações, sem decodificar nem reconstruir a derivação.
+        """
+        analises = self.gramatica.analisar()
+        e_variavel = self.gramatica.e_variavel
+        producoes = self.gramatica.producoes
+        indices_producoes = analises['producoes_uteis']
+        rendimento = analises['rendimento']
+        rendimento_producoes = analises['rendimento_producoes']
+        primeira_variavel = analises['primeira_variavel']
+        comprimento_maximo = self.comprimento_maximo
+        fila = self.fila
+        visitados = self.visitados
+        pais = self.pais
+        producoes_aplicadas = self.producoes_aplicadas
+        posicoes = self.posicoes
+        cel_simbolo = self.cel_simbolo
+        cel_proxima = self.cel_proxima
+        cel_comprimento = self.cel_comprimento
+        celulas = self._indexar_celulas()
+        base = self.base
+        nos_mapeados = self.nos_mapeados
+
+        # Contadores locais, gravados nos atributos ao sair
+        contador = 0
+        duplicadas = 0
+        simbolos_armazenados = 0
+        pico_fronteira = self.pico_fronteira
+        while fila and (max_iteracoes is None or contador < max_iteracoes):
+            # Obtém a próxima forma sentencial e seu nó na árvore de derivações
+            prefixo, resto, no_atual, rendimento_atual = fila.popleft()
+            contador += 1
+            self.expansoes += 1
+
+            if not resto:
+                # Forma sentencial só com terminais: cada forma é visitada uma única
+                # vez, portanto esta cadeia ainda não foi emitida
+                self.emitidas += 1
+                self.duplicadas += duplicadas
+                self.simbolos_armazenados += simbolos_armazenados
+                self.pico_fronteira = pico_fronteira
+                return self.simbolos(prefixo), no_atual
+
+            # O não-terminal mais à esquerda é o primeiro símbolo do resto
+            simbolo = resto[0]
+            cauda = resto[1:]
+            pos_nao_terminal = cel_comprimento[prefixo]
+
+            # Para cada produção possível, gera uma nova forma sentencial
+            rendimento_restante = rendimento_atual - rendimento[simbolo]
+            for indice in indices_producoes.get(simbolo, ()):
+                # Descarta formas que só podem gerar cadeias maiores que o limite
+                novo_rendimento = rendimento_restante + rendimento_producoes[indice]
+                if comprimento_maximo is not None and novo_rendimento > comprimento_maximo:
+                    continue
+
+                # Os terminais do início do corpo passam para o prefixo e o restante
+                # do corpo é colocado antes da cauda (epsilon é a tupla vazia). Se o
+                # corpo só tem terminais, os terminais do início da cauda também
+                # passam para o prefixo. As células são criadas aqui mesmo, sem
+                # chamar celula(), porque este é o trecho mais executado da busca.
+                corpo = producoes[indice][1]
+                primeira = primeira_variavel[indice]
+                if primeira < len(corpo):
+                    novo_resto = corpo[primeira:] + cauda if primeira else corpo + cauda
+                    terminais = corpo[:primeira]
+                else:
+                    j = 0
+                    while j < len(cauda) and not e_variavel[cauda[j]]:
+                        j += 1
+                    novo_resto = cauda[j:]
+                    terminais = corpo + cauda[:j] if j else corpo
+                novo_prefixo = prefixo
+                for s in terminais:
+                    chave = novo_prefixo * base + s
+                    c = celulas.get(chave)
+                    if c is None:
+                        c = celulas[chave] = len(celulas) + 1
+                        cel_simbolo.append(s)
+                        cel_proxima.append(novo_prefixo)
+                        cel_comprimento.append(cel_comprimento[novo_prefixo] + 1)
+                    novo_prefixo = c
+
+                # Se esta forma sentencial ainda não foi visitada, adiciona à fila
+                chave = (novo_prefixo, novo_resto)
+                if chave not in visitados:
+                    visitados.add(chave)
+                    simbolos_armazenados += len(novo_resto)
+
+                    # Registra o passo como um novo nó filho do nó atual
+                    pais.append(no_atual)
+                    producoes_aplicadas.append(indice)
+                    posicoes.append(pos_nao_terminal)
+
+                    fila.append((novo_prefixo, novo_resto, nos_mapeados + len(pais) - 1, novo_rendimento))
+                else:
+                    duplicadas += 1
+
+            if len(fila) > pico_fronteira:
+                pico_fronteira = len(fila)
+
+        self.duplicadas += duplicadas
+        self.simbolos_armazenados += simbolos_armazenados
+        self.pico_fronteira = pico_fronteira
+        return None
+
+    def reconstruir_derivacao(self, no):
+        """
+        Reconstrói a Derivacao (passos forma_antiga, simbolo, producao, forma_nova)
+        do símbolo inicial até o nó dado, percorrendo os ponteiros para o pai.
+        """
+        # Coleta as produções aplicadas da folha até a raiz
+        caminho = []
+        while no >= self.nos_mapeados and no > 0:
+            i = no - self.nos_mapeados
+            caminho.append((self.producoes_aplicadas[i], self.posicoes[i]))
+            no = self.pais[i]
+        if no > 0:
+            pais, producoes_aplicadas, posicoes = self.arvore_mapeada
+            while no > 0:
+                caminho.append((producoes_aplicadas[no], posicoes[no]))
+                no = pais[no]
+        caminho.reverse()
+
+        # Reaplica as produções a partir do símbolo inicial, decodificando cada passo
+        gramatica = self.gramatica
+        derivacao = Derivacao()
+        forma = (gramatica.inicial,)
+        texto = gramatica.decodificar(forma)
+        for indice, pos in caminho:
+            simbolo, corpo = gramatica.producoes[indice]
+            nova_forma = forma[:pos] + corpo + forma[pos+1:]
+            novo_texto = gramatica.decodificar(nova_forma)
+            derivacao.adicionar(texto, gramatica.simbolos[simbolo], gramatica.decodificar_corpo(corpo), novo_texto,
+                                gramatica.posicao_texto(forma, pos))
+            forma, texto = nova_forma, novo_texto
+
+        return derivacao
@@ -0,0 +1,469 @@
+import collections
+
+from normalizacao import forma_normal
+from reconhecedor import derivacao_da_arvore, reconhecer
+
+# Estimativas de memória (em bytes) usadas por memoria_estimada()
+BYTES_POR_CADEIA = 100  # tupla e entrada no conjunto
+BYTES_POR_SIMBOLO = 8   # referência a um id dentro da tupla
+
+# Concatenações feitas de uma vez por _combinar() antes de devolver o controle,
+# para que o orçamento, o cancelamento e o limite de memória sejam conferidos
+PEDACO_COMBINACAO = 10000
+
+
+class EnumeradorShortlex:
+    """
+    Enumera a linguagem da gramática em ordem shortlex: por comprimento e, entre
+    cadeias do mesmo comprimento, em ordem lexicográfica dos nomes dos terminais.
+    Cada cadeia aparece uma única vez, por mais derivações que tenha.
+
+    Trabalha sobre a forma reduzida da gramática (sem produções vazias, unitárias
+    nem símbolos inúteis, a mesma usada pela contagem), na qual todo corpo com dois ou mais
+    símbolos divide o comprimento em partes estritamente menores. Os conjuntos
+
+        linguagens[A][n]    = cadeias de comprimento n deriváveis de A
+        sequencias[s][n]    = cadeias de comprimento n da sequência de símbolos s
+
+    são calculados de baixo para cima, um comprimento por vez, e memorizados. As
+    sequências são os corpos e os seus sufixos com dois ou mais símbolos, cada uma
+    calculada uma só vez mesmo quando aparece em várias produções (a remoção das
+    produções unitárias copia muitos corpos); a linguagem de uma variável é a
+    união das dos seus corpos. O cálculo de cada comprimento é retomável: proxima()
+    gasta no máximo o orçamento dado (em concatenações, conferido a cada
+    PEDACO_COMBINACAO concatenações, mesmo no meio de uma sequência) e continua de
+    onde parou na chamada seguinte.
+
+    Se a linguagem é finita (a forma normal não tem ciclos entre as variáveis
+    alcançáveis), o maior comprimento é conhecido de antemão e o enumerador se
+    declara esgotado assim que passa dele.
+    """
+
+    def __init__(self, gerador, comprimento_maximo=None):
+        self.gerador = gerador
+        self.gramatica = gerador.gramatica
+        self.comprimento_maximo = comprimento_maximo
+        self.normal = forma_normal(self.gramatica, 'reduzida')
+
+        # Ordem lexicográfica dos terminais pelos seus nomes
+        nomes = self.gramatica.simbolos
+        self._posto = {t: i for i, t in enumerate(sorted(self.gramatica.terminais, key=lambda t: nomes[t]))}
+
+        # Variáveis que aparecem nos corpos de cada variável
+        e_variavel = self.normal.e_variavel
+        self._filhas = {
+            v: {s for i in self.normal.producoes_por_variavel[v] for s in self.normal.producoes[i][1] if e_variavel[s]}
+            for v in self.normal.variaveis
+        }
+        self.linguagens = {v: [set()] for v in self._filhas}
+        self.sequencias = {}
+        for variavel in self._filhas:
+            for indice in self.normal.producoes_por_variavel.get(variavel, []):
+                corpo = self.normal.producoes[indice][1]
+                for i in range(len(corpo) - 1):
+                    self.sequencias.setdefault(corpo[i:], [set()])
+
+        # Maior comprimento da linguagem (None se ela é infinita)
+        self.comprimento_linguagem = self._maior_comprimento()
+
+        # Cadeias do último comprimento calculado que ainda não foram emitidas
+        self.fila = collections.deque()
+        if self.gramatica.inicial in self.gramatica.analisar()['anulaveis']:
+            self.fila.append(())
+
+        self.comprimento = 0    # maior comprimento já calculado
+        self._nivel = None      # cálculo em andamento do comprimento seguinte
+        self._em_calculo = ()   # conjunto sendo preenchido pelo cálculo em andamento
+        self._esquerdas = (None, [])  # lista usada por cadeias_da_divisao()
+        self._retomada = None   # (comprimento, restantes) de um checkpoint ainda não alcançado
+
+        # Contadores da enumeração
+        self.expansoes = 0              # concatenações feitas
+        self.emitidas = 0
+        self.duplicadas = 0             # cadeias obtidas de novo por outra derivação
+        self.pico_fronteira = len(self.fila)
+        self.cadeias_armazenadas = 0
+        self.simbolos_armazenados = 0
+
+    def _maior_comprimento(self):
+        """
+        Comprimento da maior cadeia da linguagem, ou None se ela é infinita.
+        """
+        normal = self.normal
+        e_variavel = normal.e_variavel
+        filhas = self._filhas
+
+        # Ordem topológica (filhas antes das mães); se sobrar variável, há ciclo.
+        # Na forma reduzida todas as variáveis são alcançáveis a partir do símbolo inicial
+        maes = collections.defaultdict(list)
+        pendentes = {}
+        for variavel, conjunto in filhas.items():
+            pendentes[variavel] = len(conjunto)
+            for filha in conjunto:
+                maes[filha].append(variavel)
+        prontas = [v for v, n in pendentes.items() if n == 0]
+        maior = {}
+        while prontas:
+            variavel = prontas.pop()
+            maior[variavel] = max(
+                (sum(maior[s] if e_variavel[s] else 1 for s in normal.producoes[indice][1])
+                 for indice in normal.producoes_por_variavel.get(variavel, [])),
+                default=0,
+            )
+            for mae in maes[variavel]:
+                pendentes[mae] -= 1
+                if pendentes[mae] == 0:
+                    prontas.append(mae)
+
+        if len(maior) < len(filhas):
+            return None
+        return maior[normal.inicial]
+
+    @property
+    def limite(self):
+        """
+        Maior comprimento a enumerar (None = sem limite).
+        """
+        limites = [l for l in (self.comprimento_maximo, self.comprimento_linguagem) if l is not None]
+        return min(limites) if limites else None
+
+    @property
+    def linguagem_finita(self):
+        """
+        True se a enumeração termina por a linguagem ser finita (e não pelo limite de comprimento).
+        """
+        return (self.comprimento_linguagem is not None
+                and (self.comprimento_maximo is None or self.comprimento_linguagem <= self.comprimento_maximo))
+
+    @property
+    def esgotado(self):
+        """
+        True se todas as cadeias até o limite já foram emitidas.
+        """
+        return not self.fila and self._nivel is None and self.limite is not None and self.comprimento >= self.limite
+
+    def memoria_estimada(self):
+        """
+        Estimativa, em bytes, da memória ocupada pelos conjuntos memorizados e pela fila.
+        """
+        em_calculo = len(self._em_calculo)
+        return ((self.cadeias_armazenadas + len(self.fila) + em_calculo) * BYTES_POR_CADEIA
+                + (self.simbolos_armazenados + em_calculo * (self.comprimento + 1)) * BYTES_POR_SIMBOLO)
+
+    def contadores(self):
+        """
+        Retorna os contadores da enumeração (usados por GeradorGLC.stats()).
+        """
+        return {
+            'expansoes': self.expansoes,
+            'duplicadas': self.duplicadas,
+            'emitidas': self.emitidas,
+            'fronteira': len(self.fila),
+            'pico_fronteira': self.pico_fronteira,
+            'visitados': self.cadeias_armazenadas,  # cadeias memorizadas em todos os conjuntos
+            'comprimento_calculado': self.comprimento,
+            'memoria_estimada': self.memoria_estimada(),
+        }
+
+    def _linguagem(self, simbolo, n):
+        """
+        Cadeias de comprimento n do símbolo (n já calculado).
+        """
+        if self.normal.e_variavel[simbolo]:
+            return self.linguagens[simbolo][n]
+        return {(simbolo,)} if n == 1 else ()
+
+    def _sequencia(self, sequencia, n):
+        """
+        Cadeias de comprimento n da sequência de símbolos (n já calculado).
+        """
+        if len(sequencia) == 1:
+            return self._linguagem(sequencia[0], n)
+        return self.sequencias[sequencia][n]
+
+    def _combinar(self, destino, sequencia, n):
+        """
+        Acrescenta ao destino as cadeias de comprimento n da sequência, dividindo o
+        comprimento entre o primeiro símbolo e o restante. É um gerador que produz o
+        número de concatenações de cada pedaço, com no máximo PEDACO_COMBINACAO cada.
+        """
+        primeiro = sequencia[0]
+        restante = sequencia[1:]
+        for l in range(1, n - len(restante) + 1):
+            esquerda = self._linguagem(primeiro, l)
+            if not esquerda:
+                continue
+            direita = self._sequencia(restante, n - l)
+            if not direita:
+                continue
+            # Blocos de esquerda x direita com até PEDACO_COMBINACAO concatenações
+            esquerda = list(esquerda)
+            direita = list(direita)
+            passo_esquerda = max(1, PEDACO_COMBINACAO // len(direita))
+            passo_direita = min(len(direita), PEDACO_COMBINACAO)
+            for i in range(0, len(esquerda), passo_esquerda):
+                prefixos = esquerda[i:i + passo_esquerda]
+                for j in range(0, len(direita), passo_direita):
+                    sufixos = direita[j:j + passo_direita]
+                    antes = len(destino)
+                    destino.update([x + y for x in prefixos for y in sufixos])
+                    concatenacoes = len(prefixos) * len(sufixos)
+                    self.duplicadas += concatenacoes - (len(destino) - antes)
+                    yield concatenacoes
+
+    def _guardar(self, niveis, conjunto, n):
+        """
+        Memoriza o conjunto de comprimento n e atualiza os contadores de memória.
+        """
+        niveis.append(conjunto)
+        self.cadeias_armazenadas += len(conjunto)
+        self.simbolos_armazenados += n * len(conjunto)
+
+    def _calcular_nivel(self, n):
+        """
+        Calcula os conjuntos de comprimento n. É um gerador que produz o trabalho
+        feito a cada passo, para que o cálculo possa ser interrompido.
+        """
+        normal = self.normal
+        producoes = normal.producoes
+
+        # Primeiro as sequências: as suas partes têm comprimentos menores que n
+        for sequencia, niveis in self.sequencias.items():
+            conjunto = self._em_calculo = set()
+            yield from self._combinar(conjunto, sequencia, n)
+            self._guardar(niveis, conjunto, n)
+        self._em_calculo = ()
+
+        # Depois as variáveis, como união das linguagens dos seus corpos
+        for variavel, niveis in self.linguagens.items():
+            conjunto = set()
+            trabalho = 0
+            for indice in normal.producoes_por_variavel.get(variavel, []):
+                corpo = producoes[indice][1]
+                if len(corpo) == 1:
+                    if n == 1:
+                        conjunto.add(corpo)
+                    continue
+                parte = self.sequencias[corpo][n]
+                antes = len(conjunto)
+                conjunto |= parte
+                self.duplicadas += len(parte) - (len(conjunto) - antes)
+                trabalho += len(parte)
+            yield trabalho
+            self._guardar(niveis, conjunto, n)
+
+    def proxima_terminal(self, max_iteracoes=None):
+        """
+        Retorna a próxima cadeia (tupla de ids) em ordem shortlex, ou None se a
+        enumeração terminou ou se o orçamento de max_iteracoes concatenações foi
+        atingido (None = sem limite).
+        """
+        contador = 0
+        while not self.fila:
+            if self._nivel is None:
+                if self.limite is not None and self.comprimento >= self.limite:
+                    return None
+                self._nivel = self._calcular_nivel(self.comprimento + 1)
+            if max_iteracoes is not None and contador >= max_iteracoes:
+                return None
+            duplicadas = self.duplicadas
+            try:
+                trabalho = next(self._nivel)
+            except StopIteration:
+                self._concluir_nivel()
+                continue
+            contador += trabalho + 1
+            if self._retomada is None:
+                self.expansoes += trabalho
+            else:
+                # Trabalho refeito ao retomar um checkpoint: já está nos contadores gravados
+                self.duplicadas = duplicadas
+
+        self.emitidas += 1
+        return self.fila.popleft()
+
+    def _concluir_nivel(self):
+        """
+        Comprimento concluído: as cadeias do símbolo inicial vão para a fila, em ordem.
+        """
+        self._nivel = None
+        self.comprimento += 1
+        self.fila.extend(self.em_ordem(self.linguagens[self.normal.inicial][self.comprimento]))
+        self.pico_fronteira = max(self.pico_fronteira, len(self.fila))
+        if self._retomada is not None:
+            comprimento, restantes = self._retomada
+            if self.comprimento < comprimento:
+                self.fila.clear()  # Cadeias já emitidas antes do checkpoint
+            else:
+                self._descartar_emitidas(restantes)
+
+    def _descartar_emitidas(self, restantes):
+        """
+        Deixa na fila só as últimas `restantes` cadeias e encerra a retomada.
+        """
+        while len(self.fila) > restantes:
+            self.fila.popleft()
+        self._retomada = None
+
+    def retomar(self, comprimento, restantes):
+        """
+        Prepara um enumerador novo para continuar do ponto em que o comprimento dado
+        já foi calculado e só restavam na fila as últimas `restantes` cadeias dele.
+        Usado para retomar uma enumeração de um checkpoint: como as tabelas são
+        determinadas pela gramática, elas são recalculadas em vez de guardadas.
+
+        O recálculo não é feito aqui: ele acontece nas chamadas seguintes de
+        proxima_terminal(), sob o mesmo orçamento (e, no modo rápido em segundo
+        plano, o mesmo tempo máximo e cancelamento) que o cálculo de qualquer outro
+        comprimento, e as cadeias dos comprimentos já emitidos são descartadas.
+        """
+        self._retomada = (comprimento, restantes)
+        if comprimento == 0:
+            self._descartar_emitidas(restantes)
+        else:
+            self.fila.clear()
+
+    def posicao(self):
+        """
+        Retorna (comprimento calculado, cadeias restantes na fila) do ponto da
+        enumeração, o que um checkpoint grava; durante uma retomada, o ponto retomado.
+        """
+        if self._retomada is not None:
+            return self._retomada
+        return self.comprimento, len(self.fila)
+
+    def calcular_ate(self, comprimento):
+        """
+        Calcula os conjuntos de todos os comprimentos até o dado, sem pôr as cadeias
+        na fila (usado pela geração em lote, que divide o último comprimento por
+        produção e divisão; ver cadeias_da_divisao()). É um gerador que produz o
+        trabalho de cada passo, para que quem chama possa impor um orçamento.
+        """
+        while self.comprimento < comprimento:
+            for trabalho in self._calcular_nivel(self.comprimento + 1):
+                self.expansoes += trabalho
+                yield trabalho
+            self.comprimento += 1
+
+    def divisoes(self, indice, n):
+        """
+        Divisões do comprimento n entre o primeiro símbolo do corpo da produção de
+        índice dado (da forma reduzida) e o restante do corpo. Produz triplas (l,
+        esquerda, direita): o comprimento l do primeiro símbolo e os tamanhos dos
+        dois conjuntos, só para as divisões em que ambos não são vazios. Só usa os
+        conjuntos de comprimentos menores que n (ver calcular_ate()).
+        """
+        corpo = self.normal.producoes[indice][1]
+        if len(corpo) == 1:
+            # Na forma reduzida, os corpos de um símbolo são terminais
+            if n == 1:
+                yield 1, 1, 1
+            return
+        restante = corpo[1:]
+        for l in range(1, n - len(restante) + 1):
+            esquerda = len(self._linguagem(corpo[0], l))
+            direita = len(self._sequencia(restante, n - l))
+            if esquerda and direita:
+                yield l, esquerda, direita
+
+    def cadeias_da_divisao(self, indice, n, l, inicio=0, fim=None):
+        """
+        Gera, uma a uma, as cadeias de comprimento n da produção de índice dado em
+        que o primeiro símbolo tem comprimento l, só para as cadeias do primeiro
+        símbolo de posições inicio a fim (a ordem é a mesma em todos os processos,
+        já que os conjuntos são construídos da mesma maneira). Numa mesma divisão
+        as cadeias são distintas, mas podem se repetir em outras divisões.
+        """
+        corpo = self.normal.producoes[indice][1]
+        if len(corpo) == 1:
+            yield corpo
+            return
+        # Lista do último conjunto dividido, reaproveitada pelas fatias seguintes
+        chave = (corpo[0], l)
+        if self._esquerdas[0] != chave:
+            self._esquerdas = (chave, list(self._linguagem(corpo[0], l)))
+        esquerda = self._esquerdas[1][inicio:fim]
+        direita = self._sequencia(corpo[1:], n - l)
+        self.expansoes += len(esquerda) * len(direita)
+        for prefixo in esquerda:
+            for sufixo in direita:
+                yield prefixo + sufixo
+
+    def em_ordem(self, cadeias):
+        """
+        Retorna as cadeias (tuplas de ids) em ordem lexicográfica dos nomes dos terminais.
+        """
+        posto = self._posto
+        return sorted(cadeias, key=lambda c: [posto[s] for s in c])
+
+    def arvore(self, cadeia, indice=None):
+        """
+        Árvore de derivação da cadeia na forma reduzida, no formato do reconhecedor
+        ([produção, filhos]), obtida dos conjuntos memorizados sem reconhecer a cadeia
+        de novo: em cada nó, a primeira produção e a primeira divisão do corpo cujas
+        partes pertencem aos conjuntos dos seus símbolos. O comprimento da cadeia já
+        precisa estar calculado ou, dada a produção do símbolo inicial que a deriva,
+        ser o seguinte. Para levá-la à gramática original, ver normalizacao.arvore_original().
+        """
+        producoes = self.normal.producoes
+        e_variavel = self.normal.e_variavel
+        if indice is None:
+            indice = self._producao(self.normal.inicial, cadeia)
+        raiz = [indice, None]
+        pendentes = [(raiz, cadeia)]
+        while pendentes:
+            no, cadeia = pendentes.pop()
+            corpo = producoes[no[0]][1]
+            filhos = []
+            for simbolo, parte in zip(corpo, self._dividir(corpo, cadeia)):
+                if e_variavel[simbolo]:
+                    sub = [self._producao(simbolo, parte), None]
+                    pendentes.append((sub, parte))
+                    filhos.append(sub)
+                else:
+                    filhos.append(None)
+            no[1] = filhos
+        return raiz
+
+    def _producao(self, variavel, cadeia):
+        """
+        Primeira produção da variável que deriva a cadeia (de comprimento já calculado).
+        """
+        producoes = self.normal.producoes
+        for indice in self.normal.producoes_por_variavel[variavel]:
+            corpo = producoes[indice][1]
+            if corpo == cadeia if len(corpo) == 1 else cadeia in self.sequencias[corpo][len(cadeia)]:
+                return indice
+        raise ValueError("A cadeia não é derivada pela variável")
+
+    def _dividir(self, corpo, cadeia):
+        """
+        Divide a cadeia entre os símbolos do corpo, uma parte por símbolo.
+        """
+        partes = []
+        inicio = 0
+        for i in range(len(corpo) - 1):
+            restante = corpo[i + 1:]
+            n = len(cadeia) - inicio
+            for l in range(1, n - len(restante) + 1):
+                if (cadeia[inicio:inicio + l] in self._linguagem(corpo[i], l)
+                        and cadeia[inicio + l:] in self._sequencia(restante, n - l)):
+                    break
+            partes.append(cadeia[inicio:inicio + l])
+            inicio += l
+        partes.append(cadeia[inicio:])
+        return partes
+
+    def proxima(self, max_iteracoes=None):
+        """
+        Como proxima_terminal(), mas retorna a tupla (cadeia, derivacao), com a
+        derivação mais à esquerda obtida pelo reconhecedor na gramática original.
+        """
+        estatisticas = self.gerador.estatisticas
+        with estatisticas.fase('busca'):
+            cadeia = self.proxima_terminal(max_iteracoes)
+        if cadeia is None:
+            return None
+        with estatisticas.fase('reconstrucao'):
+            arvore = reconhecer(self.gramatica, cadeia)
+            return self.gramatica.decodificar(cadeia), derivacao_da_arvore(self.gramatica, arvore)
@@ -0,0 +1,109 @@
+import collections
+import time
+
+
+class _SemMedicao:
+    """
+    Gerenciador de contexto vazio, usado quando a instrumentação está desligada.
+    """
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excecao):
+        return False
+
+
+# Instância única: com a instrumentação desligada, medir uma fase não aloca nada
+_SEM_MEDICAO = _SemMedicao()
+
+
+class _Medicao:
+    """
+    Mede o tempo de uma fase e o registra ao sair do bloco with.
+    """
+
+    __slots__ = ('estatisticas', 'fase', 'inicio')
+
+    def __init__(self, estatisticas, fase):
+        self.estatisticas = estatisticas
+        self.fase = fase
+
+    def __enter__(self):
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *excecao):
+        self.estatisticas.registrar(self.fase, time.perf_counter() - self.inicio)
+        return False
+
+
+class Estatisticas:
+    """
+    Tempos por fase do gerador e ganchos de profiling.
+
+    As fases são blocos nomeados ('carga', 'busca', 'reconstrucao', ...) medidos com
+
+        with estatisticas.fase('busca'):
+            ...
+
+    Com a instrumentação desligada, fase() devolve um gerenciador de contexto vazio
+    compartilhado, então o custo é o de uma chamada de método por bloco. Os blocos
+    ficam fora dos laços internos; os contadores desses laços são mantidos pelo
+    próprio enumerador em variáveis locais.
+
+    Um gancho é qualquer função gancho(fase, duracao), chamada ao fim de cada fase
+    medida. Adicionar um gancho liga a instrumentação.
+    """
+
+    def __init__(self, ativa=False):
+        self.ativa = ativa
+        self.tempos = collections.defaultdict(float)    # fase -> segundos acumulados
+        self.chamadas = collections.defaultdict(int)    # fase -> número de medições
+        self.ganchos = []
+
+    def fase(self, nome):
+        """
+        Retorna o gerenciador de contexto que mede a fase dada.
+        """
+        if not self.ativa:
+            return _SEM_MEDICAO
+        return _Medicao(self, nome)
+
+    def registrar(self, fase, duracao):
+        """
+        Acumula a duração de uma fase e repassa a medição aos ganchos.
+        """
+        self.tempos[fase] += duracao
+        self.chamadas[fase] += 1
+        for gancho in self.ganchos:
+            gancho(fase, duracao)
+
+    def adicionar_gancho(self, gancho):
+        """
+        Registra um gancho gancho(fase, duracao) e liga a instrumentação.
+        """
+        self.ganchos.append(gancho)
+        self.ativa = True
+
+    def remover_gancho(self, gancho):
+        """
+        Remove um gancho registrado anteriormente.
+        """
+        self.ganchos.remove(gancho)
+
+    def zerar(self):
+        """
+        Descarta os tempos acumulados (os ganchos são mantidos).
+        """
+        self.tempos.clear()
+        self.chamadas.clear()
+
+    def resumo(self):
+        """
+        Retorna {fase: {'segundos': ..., 'chamadas': ...}}.
+        """
+        return {
+            fase: {'segundos': self.tempos[fase], 'chamadas': self.chamadas[fase]}
+            for fase in self.tempos
+        }
@@ -0,0 +1,221 @@
+from gramatica import INFINITO
+
+
+class FormaSentencial:
+    """
+    Forma sentencial de uma derivação mais à esquerda.
+
+    Tudo o que vem antes da variável mais à esquerda é um prefixo de terminais que
+    não muda mais. A forma guarda esse prefixo e os símbolos restantes como listas
+    encadeadas persistentes de pares (símbolo, próximo): o prefixo em ordem inversa
+    (o último terminal primeiro) e o resto em ordem, começando pela variável mais à
+    esquerda. Assim a variável mais à esquerda é obtida sem varrer a forma, e
+    aplicar uma produção custa O(|corpo|) mais os terminais que passam para o
+    prefixo, sem copiar a forma.
+
+    As formas são imutáveis: aplicar() devolve uma nova forma que compartilha as
+    listas com a anterior, então as formas dos passos anteriores continuam válidas.
+    O texto da forma (str()) é montado só quando é pedido, para exibição, e o
+    rendimento mínimo, na primeira consulta; depois disso, aplicar() o atualiza em
+    O(1) a partir do da forma anterior.
+    """
+
+    __slots__ = ('gramatica', 'prefixo', 'resto', 'comprimento_prefixo', 'comprimento', '_rendimento')
+
+    def __init__(self, gramatica, simbolos=None):
+        """
+        Cria a forma com os símbolos dados (tupla de ids); por padrão, o símbolo inicial.
+        """
+        if simbolos is None:
+            simbolos = (gramatica.inicial,)
+        pos = gramatica.posicao_variavel(simbolos)
+        if pos == -1:
+            pos = len(simbolos)
+
+        prefixo = None
+        for simbolo in simbolos[:pos]:
+            prefixo = (simbolo, prefixo)
+        resto = None
+        for simbolo in reversed(simbolos[pos:]):
+            resto = (simbolo, resto)
+
+        self.gramatica = gramatica
+        self.prefixo = prefixo
+        self.resto = resto
+        self.comprimento_prefixo = pos
+        self.comprimento = len(simbolos)
+        self._rendimento = None
+
+    @property
+    def variavel(self):
+        """
+        Id da variável mais à esquerda, ou None se a forma só tem terminais.
+        """
+        return self.resto[0] if self.resto is not None else None
+
+    @property
+    def posicao_variavel(self):
+        """
+        Posição (em símbolos) da variável mais à esquerda, ou -1 se não houver.
+        """
+        return self.comprimento_prefixo if self.resto is not None else -1
+
+    @property
+    def terminal(self):
+        """
+        True se a forma só contém terminais.
+        """
+        return self.resto is None
+
+    @property
+    def rendimento_minimo(self):
+        """
+        Comprimento da menor cadeia terminal derivável da forma (INFINITO se ela
+        contém uma variável que não gera cadeias).
+        """
+        if self._rendimento is None:
+            rendimento = self.gramatica.analisar()['rendimento']
+            total = self.comprimento_prefixo
+            no = self.resto
+            while no is not None:
+                total += rendimento[no[0]]
+                no = no[1]
+            self._rendimento = total
+        return self._rendimento
+
+    def aplicar(self, indice):
+        """
+        Retorna a forma obtida substituindo a variável mais à esquerda pelo corpo
+        da produção de índice dado.
+        """
+        variavel, corpo = self.gramatica.producoes[indice]
+        if variavel != self.variavel:
+            raise ValueError(
+                f"A produção {self.gramatica.simbolos[variavel]} -> {self.gramatica.decodificar_corpo(corpo)} "
+                f"não se aplica à variável mais à esquerda de {self}")
+        e_variavel = self.gramatica.e_variavel
+
+        # Empilha o corpo sobre o que vinha depois da variável
+        resto = self.resto[1]
+        for simbolo in reversed(corpo):
+            resto = (simbolo, resto)
+
+        # Os terminais do início do resto passam para o prefixo
+        prefixo = self.prefixo
+        comprimento_prefixo = self.comprimento_prefixo
+        while resto is not None and not e_variavel[resto[0]]:
+            prefixo = (resto[0], prefixo)
+            resto = resto[1]
+            comprimento_prefixo += 1
+
+        nova = object.__new__(FormaSentencial)
+        nova.gramatica = self.gramatica
+        nova.prefixo = prefixo
+        nova.resto = resto
+        nova.comprimento_prefixo = comprimento_prefixo
+        nova.comprimento = self.comprimento - 1 + len(corpo)
+        # Sem variáveis que não geram cadeias, a troca da variável pelo corpo muda o
+        # rendimento só pela diferença entre os dois
+        nova._rendimento = self._rendimento
+        if self._rendimento is not None and self._rendimento != INFINITO:
+            analises = self.gramatica.analisar()
+            nova._rendimento += analises['rendimento_producoes'][indice] - analises['rendimento'][variavel]
+        return nova
+
+    def simbolos(self):
+        """
+        Retorna a forma como tupla de ids.
+        """
+        ids = []
+        no = self.prefixo
+        while no is not None:
+            ids.append(no[0])
+            no = no[1]
+        ids.reverse()
+        no = self.resto
+        while no is not None:
+            ids.append(no[0])
+            no = no[1]
+        return tuple(ids)
+
+    def inicio_variavel(self):
+        """
+        Posição, no texto da forma (str()), da variável mais à esquerda, ou -1 se não houver.
+        """
+        if self.resto is None:
+            return -1
+        simbolos = self.gramatica.simbolos
+        inicio = len(self.gramatica.separador) * self.comprimento_prefixo
+        no = self.prefixo
+        while no is not None:
+            inicio += len(simbolos[no[0]])
+            no = no[1]
+        return inicio
+
+    def destacada(self):
+        """
+        Texto da forma com a variável mais à esquerda entre colchetes.
+        """
+        if self.resto is None:
+            return str(self)
+        return self.gramatica.destacar(self.simbolos(), self.comprimento_prefixo)
+
+    def __str__(self):
+        return self.gramatica.decodificar(self.simbolos())
+
+    def __repr__(self):
+        return f"FormaSentencial({str(self)!r})"
+
+    def __len__(self):
+        return self.comprimento
+
+    def __eq__(self, outra):
+        if not isinstance(outra, FormaSentencial):
+            return NotImplemented
+        return self.gramatica is outra.gramatica and self.simbolos() == outra.simbolos()
+
+    def __hash__(self):
+        return hash(self.simbolos())
+
+
+class Derivacao(list):
+    """
+    Derivação mais à esquerda: a lista de passos (forma_antiga, simbolo, producao,
+    forma_nova), em texto, usada em todo o gerador.
+
+    Guarda também, para cada passo, a posição (em caracteres) da variável
+    substituída dentro de forma_antiga, de modo que ela possa ser destacada sem
+    procurar o nome no texto (o que acharia a ocorrência errada quando o mesmo nome
+    aparece antes, por exemplo dentro de outro símbolo).
+    """
+
+    def __init__(self, passos=(), inicios=()):
+        super().__init__(passos)
+        self.inicios = list(inicios)
+
+    def adicionar(self, forma_antiga, simbolo, producao, forma_nova, inicio):
+        """
+        Acrescenta um passo; inicio é a posição de simbolo em forma_antiga.
+        """
+        self.append((forma_antiga, simbolo, producao, forma_nova))
+        self.inicios.append(inicio)
+
+    def destacada(self, i, abrir='[', fechar=']'):
+        """
+        Texto da forma antiga do passo i com a variável substituída entre os marcadores.
+        """
+        forma_antiga, simbolo = self[i][0], self[i][1]
+        inicio = self.inicios[i]
+        return forma_antiga[:inicio] + abrir + simbolo + fechar + forma_antiga[inicio + len(simbolo):]
+
+
+def passo_destacado(derivacao, i):
+    """
+    Como Derivacao.destacada(), também para listas comuns de passos, nas quais a
+    variável é a primeira ocorrência do seu nome na forma antiga.
+    """
+    if isinstance(derivacao, Derivacao):
+        return derivacao.destacada(i)
+    forma_antiga, simbolo = derivacao[i][0], derivacao[i][1]
+    inicio = forma_antiga.find(simbolo)
+    return forma_antiga[:inicio] + '[' + simbolo + ']' + forma_antiga[inicio + len(simbolo):]
@@ -1,230 +1,611 @@
-import streamlit as st
+import random
+import sys
+
+import checkpoint
+
+from ambiguidade import AnalisadorAmbiguidade
+from amostragem import ContadorCadeias
+from deduplicacao import EXATO, criar_conjunto
+from enumerador import EnumeradorCadeias
+from enumerador_shortlex import EnumeradorShortlex
+from estatisticas import Estatisticas
+from formas import Derivacao, FormaSentencial, passo_destacado
+from gramatica import INFINITO, RESERVADOS, ler_gramatica
+from normalizacao import forma_normal
+from reconhecedor import derivacao_da_arvore, reconhecer
+
+# Mensagens retornadas pelo modo rápido quando nenhuma nova cadeia é encontrada
+MENSAGEM_ESGOTADO = "Todas as derivações possíveis já foram mostradas."
+MENSAGEM_FINITA = "A linguagem é finita: todas as suas {} cadeias já foram mostradas."
+MENSAGEM_LIMITE = "Limite de {} iterações atingido sem encontrar uma nova cadeia. Gere novamente para continuar a busca."
+
+# Ordens de enumeração do modo rápido
+ORDEM_DERIVACOES = "derivacoes"  # busca em largura pelas derivações mais à esquerda
+ORDEM_SHORTLEX = "shortlex"      # por comprimento e, no mesmo comprimento, em ordem alfabética
+ORDENS = (ORDEM_DERIVACOES, ORDEM_SHORTLEX)
+
+# Valor padrão de max_iteracoes em gerar_cadeia_rapido(): usa o orçamento do
+# gerador (None já significa "sem limite", como nos enumeradores)
+PADRAO = object()
+
 
 class GeradorGLC:
-    def __init__(self, arquivo):
+    def __init__(self, arquivo=None, max_iteracoes=1000, comprimento_maximo=None, texto=None, gramatica=None,
+                 instrumentar=False, deduplicacao=EXATO, opcoes_deduplicacao=None, ordem=ORDEM_DERIVACOES):
+        self.estatisticas = Estatisticas(instrumentar)  # Tempos por fase e ganchos de profiling
+        self.deduplicacao = deduplicacao  # Modo das estruturas de deduplicação ('exato', 'hash' ou 'bloom')
+        self.opcoes_deduplicacao = opcoes_deduplicacao or {}
         self.variaveis = []
         self.terminais = []
         self.producoes = {}
         self.inicial = None
-        self.derivacoes_geradas = set()  # Conjunto para armazenar derivações já geradas
+        self.gramatica = None  # Gramática compilada usada pelos algoritmos
+        self._gramatica_propria = False  # False se a gramática pode ser compartilhada (ver _gramatica_editavel)
+        self.cadeias_geradas = 0  # Número de cadeias já mostradas pelo modo rápido
+        self.max_iteracoes = max_iteracoes  # Orçamento de expansões por chamada do modo rápido
+        self.comprimento_maximo = comprimento_maximo  # Limite de comprimento das cadeias do modo rápido
+        self.ordem = ordem  # Ordem de enumeração do modo rápido ('derivacoes' ou 'shortlex')
+        
+        if gramatica is not None:
+            # Gramática já compilada (possivelmente compartilhada com outras sessões)
+            self._usar_gramatica(gramatica)
+        else:
+            self.ler_gramatica(arquivo, texto)
         
-        self.ler_gramatica(arquivo)
+        # Enumerador persistente usado pelo modo rápido
+        self.enumerador = self._criar_enumerador()
         
-    def ler_gramatica(self, arquivo):
+    def ler_gramatica(self, arquivo=None, texto=None):
         """
         Lê a gramática a partir de um arquivo com o formato especificado.
+        O arquivo pode ser um caminho ou um objeto de arquivo; texto recebe o conteúdo diretamente.
+        Compila a gramática e mantém as listas de nomes usadas para exibição.
         """
-        with open(arquivo, 'r') as f:
-            lines = [line.strip() for line in f.readlines()]
-            
-            # Parse das variáveis, terminais e produção inicial
-            for line in lines:
-                if line.startswith('variaveis:'):
-                    self.variaveis = line.split(':', 1)[1].split(',')
-                elif line.startswith('inicial:'):
-                    self.inicial = line.split(':', 1)[1].strip()
-                elif line.startswith('terminais:'):
-                    self.terminais = line.split(':', 1)[1].split(',')
-                elif line == 'producoes':
-                    # Marca o início das produções
-                    continue
-                elif ':' in line:
-                    # Linha de produção
-                    left, right = line.split(':', 1)
-                    left = left.strip()
-                    
-                    # Cada produção deve estar em uma linha diferente
-                    if left not in self.producoes:
-                        self.producoes[left] = []
-                    
-                    # Separa as produções por vírgula e adiciona cada uma individualmente
-                    producoes_separadas = right.strip().split(',')
-                    for producao in producoes_separadas:
-                        self.producoes[left].append(producao.strip())
-
-    def gerar_cadeia_rapido(self):
+        with self.estatisticas.fase('carga'):
+            self._usar_gramatica(ler_gramatica(arquivo, texto))
+        self._gramatica_propria = True
+        return self.gramatica
+
+    def _usar_gramatica(self, gramatica):
+        """
+        Passa a usar a gramática compilada dada e monta as visões textuais usadas para exibição.
+        """
+        self.gramatica = gramatica
+        self._gramatica_propria = False
+        self._anotacoes = None  # (forma, alvo, anotações) da última consulta a anotar_opcoes()
+        
+        # Visões textuais da gramática compilada
+        self.variaveis = [gramatica.simbolos[v] for v in gramatica.variaveis]
+        self.terminais = [gramatica.simbolos[t] for t in gramatica.terminais]
+        self.inicial = gramatica.simbolos[gramatica.inicial]
+        self.producoes = {}
+        for variavel in gramatica.variaveis:
+            indices = gramatica.producoes_por_variavel.get(variavel, [])
+            if indices:
+                self.producoes[gramatica.simbolos[variavel]] = [
+                    gramatica.decodificar_corpo(gramatica.producoes[i][1]) for i in indices
+                ]
+        
+        return self.gramatica
+
+    def _gramatica_editavel(self):
+        """
+        Retorna a gramática para edição, copiando-a antes da primeira alteração se
+        ela pode estar compartilhada com outras sessões (cópia na escrita).
+        """
+        if not self._gramatica_propria:
+            self.gramatica = self.gramatica.copiar()
+            self._gramatica_propria = True
+        self._anotacoes = None
+        return self.gramatica
+
+    def adicionar_producao(self, variavel, producao):
+        """
+        Adiciona a produção variavel -> producao (texto, "epsilon" para a vazia) à
+        gramática do gerador. A variável pode ser nova; símbolos desconhecidos no
+        corpo viram terminais.
+
+        Só as análises da variável e das que dependem dela são recalculadas, e as
+        tabelas de contagem das demais são aproveitadas. A enumeração do modo rápido
+        recomeça, já que a linguagem pode ter mudado; as demais configurações do
+        gerador são mantidas.
+        """
+        nome = variavel.strip()
+        if not nome or any(c.isspace() or c in RESERVADOS for c in nome):
+            raise ValueError(f"Nome de variável inválido: '{variavel}'")
+        indice = self.gramatica.indices.get(nome)
+        if indice is not None and not self.gramatica.e_variavel[indice]:
+            raise ValueError(f"{nome} é um terminal da gramática")
+        if any(c in RESERVADOS for c in producao):
+            raise ValueError(f"A produção {producao} contém ':', ',' ou '|'")
+
+        with self.estatisticas.fase('edicao'):
+            gramatica = self._gramatica_editavel()
+            id_variavel = gramatica.simbolo(nome, variavel=True)
+            # Os símbolos internados pela tokenização (ids a partir de novos) são os terminais novos
+            novos = len(gramatica.simbolos)
+            corpo = gramatica.tokenizar(producao)
+            if any(gramatica.producoes[i][1] == corpo for i in gramatica.producoes_por_variavel[id_variavel]):
+                raise ValueError(f"A produção {nome} -> {producao.strip()} já existe na gramática")
+            for simbolo in range(novos, len(gramatica.simbolos)):
+                gramatica.terminais.append(simbolo)
+                self.terminais.append(gramatica.simbolos[simbolo])
+            gramatica.adicionar_producao(id_variavel, corpo)
+
+        if nome not in self.variaveis:
+            self.variaveis.append(nome)
+        self.producoes.setdefault(nome, []).append(gramatica.decodificar_corpo(corpo))
+        self.reiniciar_enumeracao()
+
+    def remover_producao(self, variavel, producao):
+        """
+        Remove a produção variavel -> producao (texto) da gramática do gerador. Como
+        em adicionar_producao(), só as variáveis afetadas são reanalisadas e a
+        enumeração do modo rápido recomeça.
+        """
+        nome = variavel.strip()
+        id_variavel = self.gramatica.indices.get(nome)
+        if id_variavel is None or not self.gramatica.e_variavel[id_variavel]:
+            raise ValueError(f"A variável {nome} não existe na gramática")
+        indice = self._producao_por_texto(id_variavel, producao)
+        texto = self.gramatica.decodificar_corpo(self.gramatica.producoes[indice][1])
+
+        with self.estatisticas.fase('edicao'):
+            # A cópia mantém os índices das produções
+            self._gramatica_editavel().remover_producao(indice)
+
+        self.producoes[nome].remove(texto)
+        if not self.producoes[nome]:
+            del self.producoes[nome]
+        self.reiniciar_enumeracao()
+
+    def _codificar(self, forma_sentencial):
+        """
+        Converte uma forma sentencial em texto para a tupla de ids da gramática compilada.
+        Tuplas de ids são aceitas e retornadas como estão.
+        """
+        if isinstance(forma_sentencial, tuple):
+            return forma_sentencial
+        if isinstance(forma_sentencial, FormaSentencial):
+            return forma_sentencial.simbolos()
+        # A gramática pode ser compartilhada, então a tokenização não interna símbolos novos
+        forma = self.gramatica.tokenizar(forma_sentencial, internar=False)
+        if -1 in forma:
+            raise ValueError(f"A forma sentencial {forma_sentencial} contém símbolos que não pertencem à gramática")
+        return forma
+
+    def _producao_por_texto(self, variavel, producao):
+        """
+        Encontra o índice da produção da variável (id) cujo corpo corresponde ao texto dado.
+        """
+        gramatica = self.gramatica
+        corpo = gramatica.tokenizar(producao, internar=False)
+        for indice in gramatica.producoes_por_variavel.get(variavel, []):
+            if gramatica.producoes[indice][1] == corpo:
+                return indice
+        raise ValueError(f"A produção {gramatica.simbolos[variavel]} -> {producao} não existe na gramática")
+
+    def forma_inicial(self):
+        """
+        Retorna a FormaSentencial com o símbolo inicial, ponto de partida do modo detalhado.
+        """
+        return FormaSentencial(self.gramatica)
+
+    def _forma(self, forma_sentencial):
+        """
+        Converte texto ou tupla de ids em FormaSentencial; FormaSentencial é retornada como está.
+        """
+        if isinstance(forma_sentencial, FormaSentencial):
+            return forma_sentencial
+        return FormaSentencial(self.gramatica, self._codificar(forma_sentencial))
+
+    def contem_variaveis(self, forma_sentencial):
+        """
+        Retorna True se a forma sentencial ainda contém algum não-terminal.
+        """
+        if isinstance(forma_sentencial, FormaSentencial):
+            return not forma_sentencial.terminal
+        return self.gramatica.posicao_variavel(self._codificar(forma_sentencial)) != -1
+
+    def gerar_cadeia_rapido(self, max_iteracoes=PADRAO):
         """
         Gera uma cadeia no modo rápido, mostrando a derivação mais à esquerda.
         Usa uma abordagem de busca em largura para gerar cadeias em ordem crescente de complexidade.
         Não repete derivações já mostradas anteriormente.
+
+        A busca é retomada de onde a chamada anterior parou. max_iteracoes limita o
+        número de expansões desta chamada (por padrão, self.max_iteracoes; None = sem
+        limite, o mesmo significado que tem nos enumeradores).
         """
-        import collections
-        
-        # Fila para busca em largura
-        fila = collections.deque()
-        
-        # Adiciona o símbolo inicial à fila
-        # Cada item da fila é uma tupla (forma_sentencial, derivação)
-        fila.append((self.inicial, []))
-        
-        # Conjunto para rastrear formas sentenciais já visitadas
-        visitados = set([self.inicial])
+        if max_iteracoes is PADRAO:
+            max_iteracoes = self.max_iteracoes
+        
+        resultado = self.enumerador.proxima(max_iteracoes)
+        
+        if resultado is None:
+            if self.enumerador.esgotado:
+                if self.ordem == ORDEM_SHORTLEX and self.enumerador.linguagem_finita:
+                    return MENSAGEM_FINITA.format(self.enumerador.emitidas), []
+                return MENSAGEM_ESGOTADO, []
+            # O orçamento acabou, mas a fronteira continua disponível para a próxima chamada
+            return MENSAGEM_LIMITE.format(max_iteracoes), []
+        
+        cadeia, derivacao = resultado
+        self.cadeias_geradas += 1
+        return cadeia, derivacao
+
+    def reiniciar_enumeracao(self):
+        """
+        Descarta o estado da enumeração do modo rápido e recomeça a partir do símbolo inicial.
+        """
+        self.enumerador = self._criar_enumerador()
+        self.cadeias_geradas = 0
+
+    def _criar_enumerador(self):
+        """
+        Cria o enumerador do modo rápido para a ordem configurada.
+        """
+        if self.ordem == ORDEM_SHORTLEX:
+            return EnumeradorShortlex(self, self.comprimento_maximo)
+        if self.ordem == ORDEM_DERIVACOES:
+            return EnumeradorCadeias(self, self.comprimento_maximo)
+        raise ValueError(f"Ordem de enumeração desconhecida: {self.ordem}")
+
+    def definir_ordem(self, ordem):
+        """
+        Escolhe a ordem do modo rápido e reinicia a enumeração:
+
+            'derivacoes' - busca em largura pelas derivações mais à esquerda
+            'shortlex'   - cada cadeia uma vez, por comprimento e depois em ordem
+                           alfabética dos terminais; numa linguagem finita, informa
+                           quando todas as cadeias já foram mostradas
+        """
+        if ordem not in ORDENS:
+            raise ValueError(f"Ordem de enumeração desconhecida: {ordem}")
+        self.ordem = ordem
+        self.reiniciar_enumeracao()
+
+    def salvar_checkpoint(self, caminho):
+        """
+        Grava o estado da enumeração do modo rápido (fronteira, deduplicação,
+        contadores e configuração) num arquivo binário, para continuar a enumeração
+        depois, em outro processo ou em outra máquina (ver carregar_checkpoint()).
+        """
+        with self.estatisticas.fase('checkpoint'):
+            checkpoint.salvar(caminho, self)
+
+    def carregar_checkpoint(self, caminho):
+        """
+        Retoma a enumeração do modo rápido gravada por salvar_checkpoint(), adotando
+        a ordem, o comprimento máximo e a deduplicação do checkpoint. O arquivo é
+        mapeado em memória e lido sob demanda; ele não deve ser alterado enquanto a
+        enumeração retomada estiver em uso (salvar_checkpoint() no mesmo caminho
+        substitui o arquivo sem alterar o mapeado). Levanta ValueError se o
+        checkpoint foi gravado com outra gramática.
+        """
+        with self.estatisticas.fase('checkpoint'):
+            ponto = checkpoint.carregar(caminho)
+            # O enumerador é recriado antes de o gerador mudar: se falhar, nada é alterado
+            enumerador = ponto.enumerador(self)
+            configuracao = ponto.configuracao
+            self.ordem = configuracao['ordem']
+            self.comprimento_maximo = configuracao['comprimento_maximo']
+            self.deduplicacao = configuracao['deduplicacao']
+            self.opcoes_deduplicacao = configuracao['opcoes_deduplicacao']
+            self.enumerador = enumerador
+            self.cadeias_geradas = ponto.cadeias_geradas
+
+    def criar_conjunto(self):
+        """
+        Cria uma estrutura de deduplicação vazia no modo configurado no gerador.
+        """
+        return criar_conjunto(self.deduplicacao, **self.opcoes_deduplicacao)
+
+    def definir_deduplicacao(self, modo, **opcoes):
+        """
+        Troca a estrutura usada para as formas visitadas e as cadeias geradas e
+        reinicia a enumeração. Com 'hash' são guardados só hashes de 64 bits; com
+        'bloom' a memória do conjunto é fixa (opções: capacidade,
+        taxa_falsos_positivos, memoria_maxima), mas falsos positivos podem omitir
+        algumas cadeias. Só o conjunto de visitados fica limitado: a fronteira e a
+        árvore de derivações da busca continuam crescendo (ver EnumeradorCadeias).
+        """
+        criar_conjunto(modo, **opcoes)  # Valida o modo e as opções antes de trocar
+        self.deduplicacao = modo
+        self.opcoes_deduplicacao = opcoes
+        self.reiniciar_enumeracao()
+
+    def definir_comprimento_maximo(self, comprimento_maximo):
+        """
+        Restringe o modo rápido às cadeias de comprimento até comprimento_maximo
+        (None = sem limite) e reinicia a enumeração.
+        """
+        self.comprimento_maximo = comprimento_maximo
+        self.reiniciar_enumeracao()
+
+    def gerar_cadeias_ate(self, comprimento_maximo, max_iteracoes=None):
+        """
+        Gera as tuplas (cadeia, derivacao) de todas as cadeias de comprimento até
+        comprimento_maximo, em ordem de busca em largura. max_iteracoes limita o total
+        de expansões (None = sem limite). Não altera o estado do modo rápido.
+        """
+        enumerador = EnumeradorCadeias(self, comprimento_maximo)
+        while max_iteracoes is None or enumerador.expansoes < max_iteracoes:
+            restante = None if max_iteracoes is None else max_iteracoes - enumerador.expansoes
+            resultado = enumerador.proxima(restante)
+            if resultado is None:
+                return
+            yield resultado
+
+    def reconhecer(self, cadeia):
+        """
+        Verifica se a cadeia pertence à linguagem da gramática (algoritmo de Earley).
         
-        # Contador para limitar o número de iterações
-        contador = 0
-        max_iteracoes = 1000
+        Retorna:
+            - pertence: True se a cadeia é gerada pela gramática
+            - derivacao: A derivação mais à esquerda da cadeia, no mesmo formato do
+              modo rápido (lista vazia se a cadeia não pertence à linguagem)
+        """
+        with self.estatisticas.fase('reconhecimento'):
+            tokens = self.gramatica.tokenizar(cadeia, internar=False)
+            arvore = reconhecer(self.gramatica, tokens)
+            if arvore is None:
+                return False, []
+            return True, derivacao_da_arvore(self.gramatica, arvore)
+
+    def contar_cadeias(self, comprimento):
+        """
+        Retorna o número exato de árvores de derivação (derivações mais à esquerda)
+        de cadeias com o comprimento dado na gramática original, as mesmas contadas
+        por verificar_ambiguidade(). É igual ao número de cadeias só se a gramática
+        não for ambígua; numa gramática ambígua cada cadeia conta tantas vezes quanto
+        as suas árvores. É math.inf se ciclos de produções unitárias ou anuláveis
+        dão infinitas árvores a alguma cadeia desse comprimento.
+        """
+        return self._obter_contador().contar(comprimento)
+
+    def amostrar_cadeia(self, comprimento, gerador_aleatorio=random):
+        """
+        Sorteia uma cadeia com o comprimento dado, uniformemente sobre as árvores
+        de derivação (ver contar_cadeias()). Numa gramática não ambígua o sorteio é
+        uniforme sobre as cadeias; numa ambígua, favorece as cadeias com mais
+        derivações. Retorna None se a gramática não gera cadeias desse comprimento e
+        levanta ValueError se elas têm infinitas árvores.
+        """
+        with self.estatisticas.fase('amostragem'):
+            cadeia = self._obter_contador().amostrar(comprimento, gerador_aleatorio)
+        if cadeia is None:
+            return None
+        return self.gramatica.decodificar(cadeia)
+
+    def verificar_ambiguidade(self, comprimento_maximo=8, max_cadeias=200000, max_exemplos=20):
+        """
+        Procura cadeias de comprimento até comprimento_maximo com mais de uma
+        derivação mais à esquerda, contando as árvores de cada cadeia por programação
+        dinâmica (ver AnalisadorAmbiguidade). max_cadeias limita as entradas das
+        tabelas; se ele for atingido, a verificação para num comprimento menor.
+
+        Retorna um dicionário com:
+            - ambigua: True se alguma cadeia verificada tem duas ou mais derivações
+            - comprimento_verificado: maior comprimento coberto pela verificação
+            - cadeias: até max_exemplos pares (cadeia, derivações), as mais curtas
+              primeiro; derivações é math.inf quando há infinitas (ciclos)
+            - total_ambiguas: número de cadeias ambíguas encontradas
+            - testemunha: None ou (cadeia, derivação, outra derivação) para a
+              cadeia ambígua mais curta, no formato do modo rápido
+        """
+        with self.estatisticas.fase('ambiguidade'):
+            analisador = self.gramatica.derivado('ambiguidade', AnalisadorAmbiguidade)
+            comprimento = analisador.calcular(comprimento_maximo, max_cadeias)
+            ambiguas = analisador.ambiguas(comprimento)
+
+            testemunha = None
+            if ambiguas:
+                cadeia = ambiguas[0][0]
+                primeira, segunda = analisador.testemunha(cadeia)
+                testemunha = (
+                    self.gramatica.decodificar(cadeia),
+                    derivacao_da_arvore(self.gramatica, primeira),
+                    derivacao_da_arvore(self.gramatica, segunda),
+                )
+
+        return {
+            'ambigua': bool(ambiguas),
+            'comprimento_verificado': comprimento,
+            'cadeias': [(self.gramatica.decodificar(c), k) for c, k in ambiguas[:max_exemplos]],
+            'total_ambiguas': len(ambiguas),
+            'testemunha': testemunha,
+        }
+
+    def forma_normal(self, etapa):
+        """
+        Retorna as produções da gramática transformada até a etapa dada (ver
+        normalizacao.ETAPAS), como uma lista de (variável, corpo, produção original),
+        todos em texto. A produção original é None para as produções auxiliares
+        (T_a -> a). Os símbolos do corpo são separados por espaço, já que os nomes das
+        variáveis auxiliares têm vários caracteres. Levanta ValueError se a
+        transformação crescer demais.
+        """
+        with self.estatisticas.fase('normalizacao'):
+            normal = forma_normal(self.gramatica, etapa)
+        resultado = []
+        for indice, (variavel, corpo) in enumerate(normal.producoes):
+            original = normal.producao_original(indice)
+            if original is not None:
+                gramatica, i = original
+                v, c = gramatica.producoes[i]
+                original = f"{gramatica.simbolos[v]} → {gramatica.decodificar_corpo(c)}"
+            texto = " ".join([normal.simbolos[s] for s in corpo])
+            resultado.append((normal.simbolos[variavel], texto, original))
+        return resultado
+
+    def _obter_contador(self):
+        """
+        Obtém as tabelas de contagem por comprimento, compartilhadas por todos os
+        geradores que usam a mesma gramática compilada.
+        """
+        return self.gramatica.derivado('contador', ContadorCadeias)
+
+    def instrumentar(self, ativa=True):
+        """
+        Liga ou desliga a medição do tempo gasto em cada fase (ver stats()).
+        """
+        self.estatisticas.ativa = ativa
+
+    def adicionar_gancho(self, gancho):
+        """
+        Registra um gancho de profiling gancho(fase, duracao), chamado ao fim de cada
+        fase medida ('carga', 'busca', 'reconstrucao', 'mais_a_esquerda', ...).
+        Liga a instrumentação.
+        """
+        self.estatisticas.adicionar_gancho(gancho)
+
+    def stats(self):
+        """
+        Retorna um dicionário com os contadores do modo rápido e os tempos por fase.
+
+        Os contadores do enumerador são sempre mantidos; os tempos só são medidos
+        com a instrumentação ligada (instrumentar() ou adicionar_gancho()).
+        """
+        return {
+            **self.enumerador.contadores(),
+            'ordem': self.ordem,
+            'cadeias_geradas': self.cadeias_geradas,
+            'deduplicacao': self.deduplicacao,
+            'instrumentacao': self.estatisticas.ativa,
+            'tempos': self.estatisticas.resumo(),
+        }
+
+    def _gerar_mais_a_esquerda(self, forma_sentencial, derivacao=None, comprimento=None, max_passos=1000):
+        """
+        Gera uma cadeia com a derivação mais à esquerda.
+        Recebe uma forma sentencial e retorna a cadeia gerada e a derivação completa.
         
-        while fila and contador < max_iteracoes:
-            # Obtém a próxima forma sentencial e sua derivação
-            forma_atual, derivacao_atual = fila.popleft()
-            contador += 1
+        As produções são escolhidas ao acaso entre as úteis; depois de max_passos passos
+        a derivação é completada pelo caminho mais curto, então ela sempre termina.
+        Com comprimento, a cadeia é sorteada uniformemente entre as desse comprimento
+        (a partir do símbolo inicial) e a derivação é reconstruída pelo reconhecedor.
+        """
+        with self.estatisticas.fase('mais_a_esquerda'):
+            gramatica = self.gramatica
+            analises = gramatica.analisar()
+        
+            if derivacao is None:
+                derivacao = [forma_sentencial]
+        
+            if comprimento is not None:
+                cadeia = self.amostrar_cadeia(comprimento)
+                if cadeia is None:
+                    raise ValueError(f"A gramática não gera cadeias de comprimento {comprimento}")
+                derivacao.extend(self.reconhecer(cadeia)[1])
+                return cadeia, derivacao
+        
+            forma = list(self._codificar(forma_sentencial))
+            texto = gramatica.decodificar(forma)
+            pos_nao_terminal = 0
+            passos = 0
+        
+            while True:
+                # Encontra o não-terminal mais à esquerda (os símbolos antes de pos são terminais)
+                while pos_nao_terminal < len(forma) and not gramatica.e_variavel[forma[pos_nao_terminal]]:
+                    pos_nao_terminal += 1
             
-            # Verifica se a forma sentencial contém apenas terminais
-            if not any(simbolo in self.variaveis for simbolo in forma_atual):
-                # Encontramos uma cadeia terminal que ainda não foi mostrada
-                derivacao_str = str(derivacao_atual)
-                if derivacao_str not in self.derivacoes_geradas:
-                    self.derivacoes_geradas.add(derivacao_str)
-                    return forma_atual, derivacao_atual
+                # Se não há não-terminais, retornamos a forma sentencial como está
+                if pos_nao_terminal == len(forma):
+                    return texto, derivacao
             
-            # Encontra o não-terminal mais à esquerda
-            pos_nao_terminal = -1
-            for i, simbolo in enumerate(forma_atual):
-                if simbolo in self.variaveis:
-                    pos_nao_terminal = i
-                    break
+                # Obtém o símbolo não-terminal a ser substituído
+                simbolo = forma[pos_nao_terminal]
             
-            if pos_nao_terminal == -1:
-                continue  # Não há não-terminais, mas já verificamos acima
+                # Obtém as produções possíveis para o símbolo
+                producoes_possiveis = analises['producoes_uteis'].get(simbolo, [])
+                if not producoes_possiveis:
+                    raise ValueError(f"Não há produções possíveis para o símbolo {gramatica.simbolos[simbolo]}")
             
-            # Obtém o símbolo não-terminal a ser substituído
-            simbolo = forma_atual[pos_nao_terminal]
+                # Escolhe uma produção ao acaso ou, após max_passos, a do caminho mais curto
+                if passos < max_passos:
+                    indice = producoes_possiveis[random.randint(0, len(producoes_possiveis) - 1)]
+                else:
+                    indice = analises['producao_minima'][simbolo]
+                corpo = gramatica.producoes[indice][1]
+                passos += 1
             
-            # Obtém as produções possíveis para o símbolo
-            producoes_possiveis = self.producoes.get(simbolo, [])
+                # Substitui o não-terminal pela produção escolhida
+                forma[pos_nao_terminal:pos_nao_terminal+1] = corpo
+                novo_texto = gramatica.decodificar(forma)
             
-            # Para cada produção possível, gera uma nova forma sentencial
-            for producao in producoes_possiveis:
-                # Substitui o não-terminal pela produção
-                if producao == "epsilon":
-                    nova_forma = forma_atual[:pos_nao_terminal] + forma_atual[pos_nao_terminal+1:]
-                else:
-                    nova_forma = forma_atual[:pos_nao_terminal] + producao + forma_atual[pos_nao_terminal+1:]
-                
-                # Se esta forma sentencial ainda não foi visitada, adiciona à fila
-                if nova_forma not in visitados:
-                    visitados.add(nova_forma)
-                    
-                    # Cria uma cópia da derivação atual e adiciona o novo passo
-                    nova_derivacao = derivacao_atual.copy()
-                    nova_derivacao.append((forma_atual, simbolo, producao, nova_forma))
-                    
-                    # Adiciona a nova forma sentencial e sua derivação à fila
-                    fila.append((nova_forma, nova_derivacao))
-        
-        # Se não encontramos nenhuma nova cadeia terminal
-        return "Todas as derivações possíveis já foram mostradas.", []
-
-    def _gerar_mais_a_esquerda(self, forma_sentencial, derivacao=None):
-        """
-        Gera uma cadeia com a derivação mais à esquerda.
-        Recebe uma forma sentencial e retorna a cadeia gerada e a derivação completa.
-        """
-        if derivacao is None:
-            derivacao = [forma_sentencial]
-        
-        # Se não há não-terminais, retornamos a forma sentencial como está
-        if not any(simbolo in self.variaveis for simbolo in forma_sentencial):
-            return forma_sentencial, derivacao
-        
-        # Encontra o não-terminal mais à esquerda
-        pos_nao_terminal = -1
-        for i, simbolo in enumerate(forma_sentencial):
-            if simbolo in self.variaveis:
-                pos_nao_terminal = i
-                break
-        
-        if pos_nao_terminal == -1:  # Não há não-terminais
-            return forma_sentencial, derivacao
-        
-        # Obtém o símbolo não-terminal a ser substituído
-        simbolo = forma_sentencial[pos_nao_terminal]
-        
-        # Obtém as produções possíveis para o símbolo
-        producoes_possiveis = self.producoes.get(simbolo, [])
-        if not producoes_possiveis:
-            raise ValueError(f"Não há produções possíveis para o símbolo {simbolo}")
-        
-        # Escolhe uma produção de forma sistemática (não aleatória)
-        import random
-        producao = producoes_possiveis[random.randint(0, len(producoes_possiveis) - 1)]
-        
-        # Substitui o não-terminal pela produção escolhida
-        if producao == "epsilon":
-            nova_forma = forma_sentencial[:pos_nao_terminal] + forma_sentencial[pos_nao_terminal+1:]
-        else:
-            nova_forma = forma_sentencial[:pos_nao_terminal] + producao + forma_sentencial[pos_nao_terminal+1:]
-        
-        # Adiciona a nova forma sentencial à derivação
-        derivacao.append((forma_sentencial, simbolo, producao, nova_forma))
-        
-        # Continua a derivação recursivamente
-        return self._gerar_mais_a_esquerda(nova_forma, derivacao)
+                # Adiciona a nova forma sentencial à derivação
+                derivacao.append((texto, gramatica.simbolos[simbolo], gramatica.decodificar_corpo(corpo), novo_texto))
+                texto = novo_texto
     
     def gerar_cadeia_detalhado(self):
         """
         Gera uma cadeia no modo detalhado, permitindo que o usuário escolha as produções.
         """
+        gramatica = self.gramatica
+        
         # Inicia a derivação com o símbolo inicial
-        forma_sentencial = self.inicial
-        derivacao = []
+        forma = self.forma_inicial()
+        derivacao = Derivacao()
         
         print(f"\nModo Detalhado - Derivação mais à esquerda")
-        print(f"Forma sentencial inicial: {forma_sentencial}")
+        print(f"Forma sentencial inicial: {self.inicial}")
         
         # Enquanto houver não-terminais na forma sentencial
-        while any(simbolo in self.variaveis for simbolo in forma_sentencial):
-            # Encontra o não-terminal mais à esquerda
-            pos_nao_terminal = -1
-            for i, simbolo in enumerate(forma_sentencial):
-                if simbolo in self.variaveis:
-                    pos_nao_terminal = i
-                    break
-            
-            if pos_nao_terminal == -1:
+        while True:
+            # O não-terminal mais à esquerda vem logo após o prefixo de terminais
+            if forma.terminal:
                 break  # Não há mais não-terminais
             
-            simbolo = forma_sentencial[pos_nao_terminal]
-            producoes_possiveis = self.producoes.get(simbolo, [])
+            simbolo = gramatica.simbolos[forma.variavel]
+            producoes_possiveis = gramatica.producoes_por_variavel.get(forma.variavel, [])
             
             if not producoes_possiveis:
                 raise ValueError(f"Não há produções possíveis para o símbolo {simbolo}")
             
             # Destaca o símbolo não-terminal a ser substituído
-            forma_destacada = forma_sentencial[:pos_nao_terminal] + '[' + simbolo + ']' + forma_sentencial[pos_nao_terminal+1:]
+            forma_destacada = forma.destacada()
             print(f"\nForma sentencial atual (com destaque): {forma_destacada}")
             
-            # Exibe as opções para o usuário
+            # Exibe as opções para o usuário, com o comprimento da menor cadeia a que cada uma leva
             print(f"Escolha uma produção para o símbolo '{simbolo}':")
-            for i, prod in enumerate(producoes_possiveis):
-                print(f"{i + 1}. {simbolo} -> {prod}")
+            for i, anotacao in enumerate(self.anotar_opcoes(forma)):
+                if anotacao['termina']:
+                    nota = f"menor cadeia: {anotacao['comprimento_minimo']}" + (", mais curta" if anotacao['minima'] else "")
+                else:
+                    nota = "não termina"
+                print(f"{i + 1}. {simbolo} -> {anotacao['producao']} ({nota})")
+            completar = len(producoes_possiveis) + 1
+            print(f"{completar}. Completar pelo caminho mais curto")
             
             # Obtém a escolha do usuário
-            escolha = int(input(f"Digite o número da produção (1-{len(producoes_possiveis)}): "))
-            producao_escolhida = producoes_possiveis[escolha - 1]
+            escolha = int(input(f"Digite o número da produção (1-{completar}): "))
+            if escolha == completar:
+                try:
+                    forma, _ = self.completar_mais_curta(forma, derivacao)
+                except ValueError as e:
+                    print(e)
+                    continue
+                print(f"Nova forma sentencial: {forma}")
+                break
+            indice = producoes_possiveis[escolha - 1]
             
             # Substitui o não-terminal pela produção escolhida
-            if producao_escolhida == "epsilon":
-                nova_forma = forma_sentencial[:pos_nao_terminal] + forma_sentencial[pos_nao_terminal+1:]
-            else:
-                nova_forma = forma_sentencial[:pos_nao_terminal] + producao_escolhida + forma_sentencial[pos_nao_terminal+1:]
+            nova_forma = forma.aplicar(indice)
             
             # Adiciona o passo de derivação
-            derivacao.append((forma_sentencial, simbolo, producao_escolhida, nova_forma))
+            derivacao.adicionar(str(forma), simbolo, gramatica.decodificar_corpo(gramatica.producoes[indice][1]),
+                                str(nova_forma), forma.inicio_variavel())
             
             # Atualiza a forma sentencial
-            forma_sentencial = nova_forma
-            print(f"Nova forma sentencial: {forma_sentencial}")
+            forma = nova_forma
+            print(f"Nova forma sentencial: {forma}")
         
         print("\nDerivação completa:")
         print(f"Forma inicial: {self.inicial}")
-        for i, (forma_antiga, simbolo, producao, forma_nova) in enumerate(derivacao):
-            # Encontra a posição do símbolo na forma antiga
-            pos = forma_antiga.find(simbolo)
-            forma_destacada = forma_antiga[:pos] + '[' + simbolo + ']' + forma_antiga[pos+1:]
-            print(f"Passo {i+1}: {forma_destacada} => {forma_nova} (substituindo [{simbolo}] por {producao})")
+        imprimir_derivacao(derivacao)
         
-        return forma_sentencial
+        return str(forma)
     
     def _gerar_detalhado(self, simbolo, derivacao):
         """
@@ -236,90 +617,238 @@ class GeradorGLC:
         """
         Retorna as opções de produção para o não-terminal mais à esquerda na forma sentencial atual.
         Usado para implementação do modo detalhado em interfaces web.
+        A forma pode ser texto, tupla de ids ou FormaSentencial; com FormaSentencial
+        a variável mais à esquerda é obtida sem varrer a forma.
         
         Retorna:
             - simbolo: O símbolo não-terminal a ser substituído
-            - pos_nao_terminal: A posição do símbolo na forma sentencial
+            - pos_nao_terminal: A posição do símbolo na forma sentencial (em símbolos)
             - producoes_possiveis: Lista de produções possíveis para o símbolo
             - forma_destacada: A forma sentencial com o símbolo destacado
             - is_terminal: True se a forma sentencial só contém terminais
         """
-        # Verifica se a forma sentencial só contém terminais
-        if not any(simbolo in self.variaveis for simbolo in forma_sentencial):
-            return None, -1, [], forma_sentencial, True
+        gramatica = self.gramatica
+        forma = self._forma(forma_sentencial)
         
-        # Encontra o não-terminal mais à esquerda
-        pos_nao_terminal = -1
-        for i, simbolo in enumerate(forma_sentencial):
-            if simbolo in self.variaveis:
-                pos_nao_terminal = i
-                break
-        
-        if pos_nao_terminal == -1:  # Não há não-terminais
-            return None, -1, [], forma_sentencial, True
+        if forma.terminal:  # Não há não-terminais
+            return None, -1, [], str(forma), True
         
         # Obtém o símbolo não-terminal a ser substituído
-        simbolo = forma_sentencial[pos_nao_terminal]
-        producoes_possiveis = self.producoes.get(simbolo, [])
+        variavel = forma.variavel
+        producoes_possiveis = [
+            gramatica.decodificar_corpo(gramatica.producoes[i][1])
+            for i in gramatica.producoes_por_variavel.get(variavel, [])
+        ]
         
         # Destaca o símbolo não-terminal a ser substituído
-        forma_destacada = forma_sentencial[:pos_nao_terminal] + '[' + simbolo + ']' + forma_sentencial[pos_nao_terminal+1:]
+        forma_destacada = forma.destacada()
         
-        return simbolo, pos_nao_terminal, producoes_possiveis, forma_destacada, False
+        return gramatica.simbolos[variavel], forma.posicao_variavel, producoes_possiveis, forma_destacada, False
+
+    def anotar_opcoes(self, forma_sentencial, alvo=None):
+        """
+        Anota as opções do modo detalhado (as produções da variável mais à esquerda,
+        na ordem de gerar_opcoes_detalhado()). As anotações só são calculadas quando
+        pedidas e ficam guardadas para a última forma e alvo consultados, então as
+        atualizações da página não as refazem. Retorna uma lista de dicionários:
+
+            - producao: o corpo da produção, em texto
+            - termina: True se a forma resultante ainda deriva alguma cadeia terminal
+            - comprimento_minimo: comprimento da menor cadeia derivável da forma
+              resultante (None se ela não termina)
+            - compativel: com uma cadeia alvo, False se a escolha certamente não leva
+              a ela (a forma resultante não termina, os terminais que passam a iniciá-la
+              não são prefixo do alvo ou a menor cadeia já é mais longa que ele); sem
+              alvo, None. True não garante que o alvo seja derivável
+            - minima: True para a produção escolhida por completar_mais_curta()
+        """
+        forma = self._forma(forma_sentencial)
+        anotacoes = self._anotacoes
+        if anotacoes is not None and anotacoes[0] is forma and anotacoes[1] == alvo:
+            return anotacoes[2]
+        if forma.terminal:
+            return []
+
+        with self.estatisticas.fase('detalhado'):
+            gramatica = self.gramatica
+            analises = gramatica.analisar()
+            rendimento_producoes = analises['rendimento_producoes']
+            primeira_variavel = analises['primeira_variavel']
+            variavel = forma.variavel
+            minima = analises['producao_minima'].get(variavel)
+            # Rendimento do resto da forma, sem a variável substituída
+            rendimento_resto = forma.rendimento_minimo
+            if rendimento_resto != INFINITO:
+                rendimento_resto -= analises['rendimento'][variavel]
+
+            if alvo is not None:
+                tokens = gramatica.tokenizar(alvo, internar=False)
+                # Os terminais do prefixo da forma já precisam iniciar o alvo
+                prefixo = []
+                no = forma.prefixo
+                while no is not None:
+                    prefixo.append(no[0])
+                    no = no[1]
+                prefixo.reverse()
+                inicio = len(prefixo)
+                prefixo_valido = -1 not in tokens and tuple(prefixo) == tokens[:inicio]
+                # Terminais que seguem a variável, até a próxima variável da forma
+                seguintes = []
+                no = forma.resto[1]
+                while no is not None and not gramatica.e_variavel[no[0]]:
+                    seguintes.append(no[0])
+                    no = no[1]
+                forma_acaba = no is None
+
+            resultado = []
+            for indice in gramatica.producoes_por_variavel.get(variavel, []):
+                corpo = gramatica.producoes[indice][1]
+                comprimento = rendimento_resto + rendimento_producoes[indice]
+                termina = comprimento != INFINITO
+                compativel = None
+                if alvo is not None:
+                    compativel = termina and prefixo_valido and comprimento <= len(tokens)
+                    if compativel:
+                        primeira = primeira_variavel[indice]
+                        if primeira < len(corpo):
+                            iniciais = corpo[:primeira]
+                        else:
+                            # O corpo só tem terminais: os que o seguem também passam ao prefixo
+                            iniciais = corpo + tuple(seguintes)
+                            if forma_acaba and comprimento != len(tokens):
+                                compativel = False
+                        if iniciais != tokens[inicio:inicio + len(iniciais)]:
+                            compativel = False
+                resultado.append({
+                    'producao': gramatica.decodificar_corpo(corpo),
+                    'termina': termina,
+                    'comprimento_minimo': comprimento if termina else None,
+                    'compativel': compativel,
+                    'minima': indice == minima,
+                })
+
+        self._anotacoes = (forma, alvo, resultado)
+        return resultado
+
+    def completar_mais_curta(self, forma_sentencial, derivacao=None):
+        """
+        Completa a derivação mais à esquerda da forma de uma vez, aplicando a cada
+        variável a sua produção mínima (ver GramaticaCompilada.analisar()); a cadeia
+        obtida é a menor derivável da forma.
+
+        Os passos são acrescentados a derivacao (uma Derivacao nova, se não for dada).
+        Retorna a forma final (FormaSentencial) e a derivação. Lança ValueError se a
+        forma contém uma variável que não gera cadeias.
+        """
+        forma = self._forma(forma_sentencial)
+        if derivacao is None:
+            derivacao = Derivacao()
+        if forma.rendimento_minimo == INFINITO:
+            raise ValueError(f"A forma sentencial {forma} não deriva nenhuma cadeia terminal")
+
+        with self.estatisticas.fase('detalhado'):
+            gramatica = self.gramatica
+            producao_minima = gramatica.analisar()['producao_minima']
+            texto = str(forma)
+            while not forma.terminal:
+                variavel = forma.variavel
+                indice = producao_minima[variavel]
+                nova_forma = forma.aplicar(indice)
+                novo_texto = str(nova_forma)
+                derivacao.adicionar(texto, gramatica.simbolos[variavel],
+                                    gramatica.decodificar_corpo(gramatica.producoes[indice][1]),
+                                    novo_texto, forma.inicio_variavel())
+                forma, texto = nova_forma, novo_texto
+        return forma, derivacao
         
     def aplicar_producao(self, forma_sentencial, pos_nao_terminal, producao_escolhida):
         """
         Aplica a produção escolhida à forma sentencial atual.
+        A forma pode ser texto, tupla de ids ou FormaSentencial; a nova forma é retornada
+        no mesmo formato. Uma FormaSentencial só aceita a variável mais à esquerda.
         
         Retorna:
             - nova_forma: A nova forma sentencial após a substituição
             - simbolo: O símbolo que foi substituído
             - producao_escolhida: A produção que foi aplicada
         """
-        simbolo = forma_sentencial[pos_nao_terminal]
+        gramatica = self.gramatica
+        
+        if isinstance(forma_sentencial, FormaSentencial):
+            if pos_nao_terminal != forma_sentencial.posicao_variavel:
+                raise ValueError("Numa FormaSentencial só a variável mais à esquerda pode ser substituída")
+            variavel = forma_sentencial.variavel
+            nova_forma = forma_sentencial.aplicar(self._producao_por_texto(variavel, producao_escolhida))
+            return nova_forma, gramatica.simbolos[variavel], producao_escolhida
+        
+        forma = self._codificar(forma_sentencial)
+        variavel = forma[pos_nao_terminal]
         
         # Substitui o não-terminal pela produção escolhida
-        if producao_escolhida == "epsilon":
-            nova_forma = forma_sentencial[:pos_nao_terminal] + forma_sentencial[pos_nao_terminal+1:]
-        else:
-            nova_forma = forma_sentencial[:pos_nao_terminal] + producao_escolhida + forma_sentencial[pos_nao_terminal+1:]
+        corpo = gramatica.producoes[self._producao_por_texto(variavel, producao_escolhida)][1]
+        nova_forma = forma[:pos_nao_terminal] + corpo + forma[pos_nao_terminal+1:]
+        
+        if not isinstance(forma_sentencial, tuple):
+            nova_forma = gramatica.decodificar(nova_forma)
             
-        return nova_forma, simbolo, producao_escolhida
+        return nova_forma, gramatica.simbolos[variavel], producao_escolhida
+
+
+def imprimir_derivacao(derivacao, lote=1000):
+    """
+    Imprime os passos de uma derivação com a variável substituída destacada, em
+    lotes de linhas (uma escrita por lote em vez de uma por passo).
+    """
+    for inicio in range(0, len(derivacao), lote):
+        linhas = []
+        for i in range(inicio, min(inicio + lote, len(derivacao))):
+            forma_antiga, simbolo, producao, forma_nova = derivacao[i]
+            linhas.append(f"Passo {i+1}: {passo_destacado(derivacao, i)} => {forma_nova} "
+                          f"(substituindo [{simbolo}] por {producao})")
+        print("\n".join(linhas))
 
 
 # Exemplo de uso
 if __name__ == "__main__":
+    # Com argumentos, gera cadeias em lote (ex.: python gerador.py gramatica.txt --count 100 --max-len 10)
+    if len(sys.argv) > 1:
+        from lote import executar
+        sys.exit(executar())
+    
     arquivo = 'gramatica_teste.txt'  # Caminho para o arquivo da gramática
-    gerador = GeradorGLC(arquivo)
+    gerador = GeradorGLC(arquivo, instrumentar=True)
+    
+    # Avisa logo na carga se a gramática é ambígua (cadeias curtas com mais de uma derivação)
+    ambiguidade = gerador.verificar_ambiguidade()
+    if ambiguidade['ambigua']:
+        cadeia, derivacoes = ambiguidade['cadeias'][0]
+        print(f"Aviso: a gramática é ambígua; '{cadeia}' tem {derivacoes} derivações mais à esquerda "
+              f"({ambiguidade['total_ambiguas']} cadeias ambíguas até o comprimento "
+              f"{ambiguidade['comprimento_verificado']}). As contagens e a amostragem "
+              f"consideram árvores de derivação e favorecem as cadeias com mais derivações.")
     
     while True:
         print("\n==== Gerador de Cadeias para Gramáticas Livres de Contexto ====")
         print("1. Modo Rápido")
         print("2. Modo Detalhado")
-        print("3. Sair")
+        print("3. Reconhecer Cadeia")
+        print("4. Estatísticas")
+        print("5. Gravar checkpoint do modo rápido")
+        print("6. Retomar de um checkpoint")
+        print("7. Sair")
         
-        opcao = input("\nEscolha uma opção (1-3): ")
+        opcao = input("\nEscolha uma opção (1-7): ")
         
         if opcao == "1":
             # Modo rápido
             print("\nModo Rápido:")
             cadeia, derivacao = gerador.gerar_cadeia_rapido()
-            if isinstance(cadeia, str) and not cadeia.startswith("Todas as"):
+            # Sem derivação, a cadeia é uma mensagem (enumeração esgotada ou limite atingido)
+            if derivacao:
                 print("Cadeia gerada:", cadeia)
                 print("\nDerivação mais à esquerda:")
                 print(f"Forma inicial: {gerador.inicial}")
-                # Verifica o formato da derivação
-                if derivacao and isinstance(derivacao[0], tuple) and len(derivacao[0]) == 4:
-                    # Formato novo: tuplas (forma_antiga, simbolo, producao, forma_nova)
-                    for i, (forma_antiga, simbolo, producao, forma_nova) in enumerate(derivacao):
-                        # Encontra a posição do símbolo na forma antiga
-                        pos = forma_antiga.find(simbolo)
-                        forma_destacada = forma_antiga[:pos] + '[' + simbolo + ']' + forma_antiga[pos+1:]
-                        print(f"Passo {i+1}: {forma_destacada} => {forma_nova} (substituindo [{simbolo}] por {producao})")
-                else:
-                    # Formato antigo ou outro formato
-                    for i, passo in enumerate(derivacao):
-                        print(f"  Passo {i+1}: {passo}")
+                imprimir_derivacao(derivacao)
             else:
                 print(cadeia)  # Mensagem de que todas as derivações foram mostradas
             
@@ -332,6 +861,51 @@ if __name__ == "__main__":
             input("\nPressione Enter para continuar...")
             
         elif opcao == "3":
+            # Reconhecimento de uma cadeia (algoritmo de Earley)
+            cadeia = input("\nDigite a cadeia (Enter para a cadeia vazia): ")
+            pertence, derivacao = gerador.reconhecer(cadeia)
+            if pertence:
+                print(f"A cadeia '{cadeia}' pertence à linguagem.")
+                print("\nDerivação mais à esquerda:")
+                print(f"Forma inicial: {gerador.inicial}")
+                imprimir_derivacao(derivacao)
+            else:
+                print(f"A cadeia '{cadeia}' não pertence à linguagem.")
+            
+            input("\nPressione Enter para continuar...")
+            
+        elif opcao == "4":
+            # Contadores do modo rápido e tempo gasto em cada fase
+            estatisticas = gerador.stats()
+            print("\nEstatísticas:")
+            for chave, valor in estatisticas.items():
+                if chave != 'tempos':
+                    print(f"  {chave}: {valor}")
+            print("  Tempo por fase:")
+            for fase, medida in estatisticas['tempos'].items():
+                print(f"    {fase}: {medida['segundos'] * 1000:.1f} ms em {medida['chamadas']} chamadas")
+            input("\nPressione Enter para continuar...")
+            
+        elif opcao == "5":
+            # Estado da enumeração do modo rápido, para continuar depois
+            caminho = input("\nArquivo do checkpoint: ").strip()
+            try:
+                gerador.salvar_checkpoint(caminho)
+                print(f"Checkpoint gravado em {caminho}.")
+            except OSError as e:
+                print(f"Erro ao gravar o checkpoint: {e}")
+            input("\nPressione Enter para continuar...")
+            
+        elif opcao == "6":
+            caminho = input("\nArquivo do checkpoint: ").strip()
+            try:
+                gerador.carregar_checkpoint(caminho)
+                print(f"Enumeração retomada: {gerador.enumerador.emitidas} cadeias já mostradas.")
+            except (OSError, ValueError) as e:
+                print(f"Erro ao ler o checkpoint: {e}")
+            input("\nPressione Enter para continuar...")
+            
+        elif opcao == "7":
             print("Saindo...")
             break
             
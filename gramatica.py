@@ -0,0 +1,812 @@
+import bisect
+import collections
+import hashlib
+import io
+import threading
+
+EPSILON = "epsilon"
+
+# Rendimento mínimo de uma variável que não gera nenhuma cadeia terminal
+INFINITO = float('inf')
+
+# Caracteres que separam nomes e alternativas no arquivo e não podem fazer parte de um símbolo
+RESERVADOS = ':,|'
+
+# Erros listados na mensagem de ErroGramatica (a lista completa fica em erros)
+MAX_ERROS_EXIBIDOS = 20
+
+
+class ErroGramatica(ValueError):
+    """
+    Erros encontrados ao ler o arquivo de uma gramática.
+
+    erros é a lista de todos os pares (número da linha, mensagem), na ordem do
+    arquivo; a linha é None para os erros que não pertencem a uma linha.
+    """
+
+    def __init__(self, erros):
+        self.erros = erros
+        linhas = [mensagem if numero is None else f"Linha {numero}: {mensagem}"
+                  for numero, mensagem in erros[:MAX_ERROS_EXIBIDOS]]
+        if len(erros) > MAX_ERROS_EXIBIDOS:
+            linhas.append(f"... e mais {len(erros) - MAX_ERROS_EXIBIDOS} erros")
+        super().__init__("\n".join(linhas))
+
+
+class GramaticaCompilada:
+    """
+    Representação compilada de uma gramática livre de contexto.
+
+    Cada símbolo é internado como um inteiro; as produções são tuplas de ids
+    (epsilon é a tupla vazia) e a verificação "é variável?" é uma consulta direta
+    a um vetor indexado pelo id. As cadeias só são decodificadas na saída.
+    """
+
+    def __init__(self):
+        self.simbolos = []            # id -> nome do símbolo
+        self.indices = {}             # nome do símbolo -> id
+        self.e_variavel = bytearray() # id -> 1 se o símbolo é variável
+        self.variaveis = []           # ids das variáveis, na ordem de declaração
+        self.terminais = []           # ids dos terminais, na ordem de declaração
+        self.inicial = None           # id do símbolo inicial
+
+        # Produções numeradas: (id da variável, tupla de ids do corpo)
+        self.producoes = []
+        # id da variável -> lista de índices de produções
+        self.producoes_por_variavel = {}
+
+        # Gramáticas transformadas (formas normais) guardam a gramática original e,
+        # para cada produção, o índice da produção original de onde ela veio (None
+        # para as produções auxiliares criadas pela transformação)
+        self.original = None
+        self.origens = []
+        # A gramática da etapa anterior e, para cada produção, o molde da árvore que
+        # ela representa nas produções daquela (None para as auxiliares), usados para
+        # levar as árvores de volta à gramática original (ver normalizacao.arvore_original)
+        self.anterior = None
+        self.passos = []
+
+        # Separador usado para decodificar formas sentenciais
+        self.separador = ''
+        self._maior_simbolo = 1
+
+        # Análises calculadas sob demanda (ver analisar())
+        self._analises = None
+        # Estruturas derivadas da gramática, criadas sob demanda (ver derivado())
+        self._derivados = {}
+        # chave -> (versão de uma estrutura derivada anterior às edições, variáveis
+        # afetadas desde então) (ver derivado_anterior())
+        self._anteriores = {}
+        # id da variável -> {variável que a usa num corpo: número de ocorrências},
+        # mantido só depois da primeira edição (ver afetadas())
+        self._usuarios = None
+        self._trava = threading.RLock()  # Reentrante: um derivado pode depender de outro
+
+    def simbolo(self, nome, variavel=False):
+        """
+        Retorna o id do símbolo, internando-o se ainda não existir.
+        """
+        indice = self.indices.get(nome)
+        if indice is None:
+            indice = len(self.simbolos)
+            self.indices[nome] = indice
+            self.simbolos.append(nome)
+            self.e_variavel.append(0)
+            if len(nome) > 1:
+                self._maior_simbolo = max(self._maior_simbolo, len(nome))
+                self.separador = ' '
+        if variavel and not self.e_variavel[indice]:
+            self.e_variavel[indice] = 1
+            self.variaveis.append(indice)
+            self.producoes_por_variavel.setdefault(indice, [])
+        return indice
+
+    def derivada(self):
+        """
+        Retorna uma nova gramática com a mesma tabela de símbolos e sem produções.
+        Usada pelas transformações, que mantêm os ids dos símbolos originais.
+        """
+        nova = GramaticaCompilada()
+        nova.original = self.original if self.original is not None else self
+        nova.anterior = self
+        nova.simbolos = list(self.simbolos)
+        nova.indices = dict(self.indices)
+        nova.e_variavel = bytearray(self.e_variavel)
+        nova.variaveis = list(self.variaveis)
+        nova.terminais = list(self.terminais)
+        nova.inicial = self.inicial
+        nova.separador = self.separador
+        nova._maior_simbolo = self._maior_simbolo
+        nova.producoes_por_variavel = {v: [] for v in self.variaveis}
+        return nova
+
+    def copiar(self):
+        """
+        Retorna uma cópia independente da gramática, que pode ser editada sem afetar
+        quem compartilha esta (ver CacheGramaticas). As análises são copiadas; as
+        estruturas derivadas não, mas continuam disponíveis como versões anteriores
+        para serem aproveitadas (ver derivado_anterior()).
+        """
+        nova = GramaticaCompilada()
+        nova.simbolos = list(self.simbolos)
+        nova.indices = dict(self.indices)
+        nova.e_variavel = bytearray(self.e_variavel)
+        nova.variaveis = list(self.variaveis)
+        nova.terminais = list(self.terminais)
+        nova.inicial = self.inicial
+        nova.producoes = list(self.producoes)
+        nova.producoes_por_variavel = {v: list(indices) for v, indices in self.producoes_por_variavel.items()}
+        nova.original = self.original
+        nova.origens = list(self.origens)
+        nova.anterior = self.anterior
+        nova.passos = list(self.passos)
+        nova.separador = self.separador
+        nova._maior_simbolo = self._maior_simbolo
+        if self._analises is not None:
+            analises = self._analises
+            nova._analises = {
+                'anulaveis': set(analises['anulaveis']),
+                'rendimento': list(analises['rendimento']),
+                'geradoras': set(analises['geradoras']),
+                'alcancaveis': set(analises['alcancaveis']),
+                'producoes_uteis': {v: list(indices) for v, indices in analises['producoes_uteis'].items()},
+                'rendimento_producoes': list(analises['rendimento_producoes']),
+                'producao_minima': dict(analises['producao_minima']),
+                'primeira_variavel': list(analises['primeira_variavel']),
+            }
+        nova._anteriores = dict(self._anteriores)
+        nova._anteriores.update((chave, (valor, frozenset())) for chave, valor in self._derivados.items())
+        return nova
+
+    def adicionar_producao(self, variavel, corpo, origem=None, passo=None):
+        """
+        Adiciona a produção variavel -> corpo (ids) e retorna o seu índice.
+        origem é o índice da produção da gramática original que ela representa
+        (numa gramática original, a própria produção) e passo, numa gramática
+        transformada, o seu molde na gramática da etapa anterior.
+
+        Se as análises já foram calculadas, elas são atualizadas só para a variável
+        e as que dependem dela (ver afetadas()), e as estruturas derivadas passam a
+        ser versões anteriores.
+        """
+        indice = len(self.producoes)
+        if origem is None and self.original is None:
+            origem = indice
+        corpo = tuple(corpo)
+        self.producoes.append((variavel, corpo))
+        self.origens.append(origem)
+        self.passos.append(passo)
+        self.producoes_por_variavel.setdefault(variavel, []).append(indice)
+        if self._usuarios is not None:
+            self._registrar_usos(variavel, corpo, 1)
+
+        if self._analises is None:
+            self._derivados = {}
+            return indice
+
+        analises = self._analises
+        e_variavel = self.e_variavel
+        # Símbolos internados depois da análise
+        rendimento = analises['rendimento']
+        for simbolo in range(len(rendimento), len(self.simbolos)):
+            rendimento.append(INFINITO if e_variavel[simbolo] else 1)
+        analises['rendimento_producoes'].append(sum(rendimento[s] for s in corpo))
+        analises['primeira_variavel'].append(
+            next((i for i, s in enumerate(corpo) if e_variavel[s]), len(corpo)))
+        self._atualizar_analises(self.afetadas([variavel]))
+        return indice
+
+    def remover_producao(self, indice):
+        """
+        Remove a produção com o índice dado; as produções seguintes são renumeradas.
+        Como em adicionar_producao(), as análises são atualizadas só para as
+        variáveis afetadas.
+        """
+        variavel, corpo = self.producoes.pop(indice)
+        del self.origens[indice]
+        del self.passos[indice]
+        if self.original is None:
+            self.origens[indice:] = range(indice, len(self.producoes))
+        _renumerar(self.producoes_por_variavel, indice)
+        if self._usuarios is not None:
+            self._registrar_usos(variavel, corpo, -1)
+
+        if self._analises is None:
+            self._derivados = {}
+            return
+
+        analises = self._analises
+        del analises['rendimento_producoes'][indice]
+        del analises['primeira_variavel'][indice]
+        _renumerar(analises['producoes_uteis'], indice)
+        producao_minima = analises['producao_minima']
+        for v, i in producao_minima.items():
+            if i > indice:
+                producao_minima[v] = i - 1
+        self._atualizar_analises(self.afetadas([variavel]))
+
+    def _registrar_usos(self, variavel, corpo, incremento):
+        e_variavel = self.e_variavel
+        for simbolo in corpo:
+            if e_variavel[simbolo]:
+                usos = self._usuarios.setdefault(simbolo, {})
+                usos[variavel] = usos.get(variavel, 0) + incremento
+                if not usos[variavel]:
+                    del usos[variavel]
+
+    def afetadas(self, variaveis):
+        """
+        Retorna o conjunto das variáveis dadas e de todas as que as usam, direta ou
+        indiretamente: as únicas cujas análises mudam quando as produções das
+        variáveis dadas mudam. O índice de usos é montado na primeira chamada e
+        depois mantido pelas edições.
+        """
+        if self._usuarios is None:
+            self._usuarios = {}
+            for variavel, corpo in self.producoes:
+                self._registrar_usos(variavel, corpo, 1)
+        afetadas = set(variaveis)
+        pilha = list(afetadas)
+        while pilha:
+            for usuaria in self._usuarios.get(pilha.pop(), ()):
+                if usuaria not in afetadas:
+                    afetadas.add(usuaria)
+                    pilha.append(usuaria)
+        return afetadas
+
+    def _atualizar_analises(self, afetadas):
+        """
+        Recalcula as análises das variáveis afetadas por uma edição. As demais não
+        alcançam nenhuma variável afetada, então os seus valores continuam válidos e
+        os pontos fixos só percorrem as produções das afetadas. A alcançabilidade é
+        refeita com uma única busca a partir do símbolo inicial.
+        """
+        analises = self._analises
+        e_variavel = self.e_variavel
+        rendimento = analises['rendimento']
+        rendimento_producoes = analises['rendimento_producoes']
+        producao_minima = analises['producao_minima']
+        indices = sorted(i for v in afetadas for i in self.producoes_por_variavel.get(v, []))
+
+        for variavel in afetadas:
+            rendimento[variavel] = INFINITO
+        mudou = True
+        while mudou:
+            mudou = False
+            for indice in indices:
+                variavel, corpo = self.producoes[indice]
+                total = 0
+                for simbolo in corpo:
+                    total += rendimento[simbolo]
+                if total < rendimento[variavel]:
+                    rendimento[variavel] = total
+                    mudou = True
+
+        anulaveis = analises['anulaveis']
+        geradoras = analises['geradoras']
+        for variavel in afetadas:
+            anulaveis.discard(variavel)
+            geradoras.discard(variavel)
+            if rendimento[variavel] == 0:
+                anulaveis.add(variavel)
+            if rendimento[variavel] != INFINITO:
+                geradoras.add(variavel)
+        for indice in indices:
+            rendimento_producoes[indice] = sum(rendimento[s] for s in self.producoes[indice][1])
+
+        for variavel in afetadas:
+            producao_minima.pop(variavel, None)
+        mudou = True
+        while mudou:
+            mudou = False
+            for indice in indices:
+                variavel, corpo = self.producoes[indice]
+                if (variavel not in producao_minima
+                        and rendimento_producoes[indice] == rendimento[variavel]
+                        and all(not e_variavel[s] or s in producao_minima for s in corpo)):
+                    producao_minima[variavel] = indice
+                    mudou = True
+
+        def geradora(indice):
+            variavel, corpo = self.producoes[indice]
+            return variavel in geradoras and all(not e_variavel[s] or s in geradoras for s in corpo)
+
+        # As produções úteis das variáveis não afetadas só dependem de variáveis não
+        # afetadas e são aproveitadas (os índices já foram renumerados na remoção)
+        anteriores = analises['producoes_uteis']
+        alcancaveis = set()
+        producoes_uteis = {}
+        if self.inicial in geradoras:
+            alcancaveis.add(self.inicial)
+            pilha = [self.inicial]
+            while pilha:
+                variavel = pilha.pop()
+                uteis = anteriores.get(variavel) if variavel not in afetadas else None
+                if uteis is None:
+                    uteis = [i for i in self.producoes_por_variavel.get(variavel, []) if geradora(i)]
+                producoes_uteis[variavel] = uteis
+                for indice in uteis:
+                    for simbolo in self.producoes[indice][1]:
+                        if e_variavel[simbolo] and simbolo not in alcancaveis:
+                            alcancaveis.add(simbolo)
+                            pilha.append(simbolo)
+
+        analises['alcancaveis'] = alcancaveis
+        analises['producoes_uteis'] = producoes_uteis
+
+        # As estruturas derivadas ficam como versões anteriores, para serem
+        # aproveitadas por quem souber atualizar só a parte afetada
+        for chave, (valor, anteriores) in self._anteriores.items():
+            self._anteriores[chave] = (valor, anteriores | afetadas)
+        for chave, valor in self._derivados.items():
+            self._anteriores[chave] = (valor, frozenset(afetadas))
+        self._derivados = {}
+
+    def tokenizar(self, texto, internar=True):
+        """
+        Converte um texto numa tupla de ids de símbolos.
+
+        Se o texto contém espaços, cada palavra é um símbolo; caso contrário usa o
+        casamento mais longo entre os símbolos conhecidos, de modo que símbolos de
+        vários caracteres (S1, id) funcionem sem separadores. Caracteres desconhecidos
+        viram terminais de um caractere. "epsilon" é a sequência vazia.
+        Com internar=False a gramática não é alterada e símbolos desconhecidos viram -1.
+        """
+        texto = texto.strip()
+        if texto == EPSILON or not texto:
+            return ()
+        nomes = texto.split()
+        if len(nomes) > 1:
+            if not internar:
+                indices = self.indices
+                return tuple([indices.get(nome, -1) for nome in nomes])
+            return tuple([self.simbolo(nome) for nome in nomes])
+        indice = self.indices.get(texto)
+        if indice is not None:
+            return (indice,)
+
+        ids = []
+        i = 0
+        while i < len(texto):
+            for tamanho in range(min(self._maior_simbolo, len(texto) - i), 0, -1):
+                indice = self.indices.get(texto[i:i+tamanho])
+                if indice is not None:
+                    break
+            else:
+                tamanho = 1
+                indice = self.simbolo(texto[i]) if internar else -1
+            ids.append(indice)
+            i += tamanho
+        return tuple(ids)
+
+    def decodificar(self, ids):
+        """
+        Converte uma sequência de ids de volta para texto.
+        """
+        return self.separador.join([self.simbolos[s] for s in ids])
+
+    def decodificar_corpo(self, corpo):
+        """
+        Converte o corpo de uma produção para texto ("epsilon" se for vazio).
+        """
+        if not corpo:
+            return EPSILON
+        return self.decodificar(corpo)
+
+    def posicao_variavel(self, forma):
+        """
+        Retorna a posição da variável mais à esquerda na forma, ou -1 se não houver.
+        """
+        e_variavel = self.e_variavel
+        for i, simbolo in enumerate(forma):
+            if e_variavel[simbolo]:
+                return i
+        return -1
+
+    def analisar(self):
+        """
+        Calcula (uma única vez) as análises usadas para podar a busca:
+
+            - anulaveis: variáveis que derivam a cadeia vazia
+            - rendimento: id -> comprimento da menor cadeia terminal derivável
+              (1 para terminais, INFINITO para variáveis que não geram cadeias)
+            - geradoras: variáveis que derivam alguma cadeia terminal
+            - alcancaveis: variáveis alcançáveis a partir do símbolo inicial
+              usando apenas produções de variáveis geradoras
+            - producoes_uteis: id da variável -> índices das produções que só usam
+              símbolos úteis (geradores e alcançáveis); as demais são descartadas
+            - rendimento_producoes: índice da produção -> rendimento mínimo do corpo
+            - producao_minima: variável geradora -> produção que inicia uma derivação
+              da sua menor cadeia (sem ciclos); para as anuláveis, deriva a cadeia vazia
+            - primeira_variavel: índice da produção -> posição da primeira variável do
+              corpo (o tamanho do corpo se ele só tem terminais)
+        """
+        if self._analises is not None:
+            return self._analises
+
+        e_variavel = self.e_variavel
+
+        # Rendimento mínimo por ponto fixo; cobre também as variáveis anuláveis
+        # (rendimento 0) e as geradoras (rendimento finito). Na última passada nada
+        # muda, então os totais dela são os rendimentos das produções
+        rendimento = [INFINITO if e_variavel[s] else 1 for s in range(len(self.simbolos))]
+        mudou = True
+        while mudou:
+            mudou = False
+            rendimento_producoes = []
+            for variavel, corpo in self.producoes:
+                total = 0
+                for simbolo in corpo:
+                    total += rendimento[simbolo]
+                rendimento_producoes.append(total)
+                if total < rendimento[variavel]:
+                    rendimento[variavel] = total
+                    mudou = True
+
+        anulaveis = set(v for v in self.variaveis if rendimento[v] == 0)
+        geradoras = set(v for v in self.variaveis if rendimento[v] != INFINITO)
+
+        # Produções cujos símbolos são todos geradores: as de rendimento finito
+        def geradora(indice):
+            return rendimento_producoes[indice] != INFINITO
+
+        # Alcançabilidade a partir do símbolo inicial usando só produções geradoras
+        alcancaveis = set()
+        if self.inicial in geradoras:
+            alcancaveis.add(self.inicial)
+            pilha = [self.inicial]
+            while pilha:
+                variavel = pilha.pop()
+                for indice in self.producoes_por_variavel.get(variavel, []):
+                    if not geradora(indice):
+                        continue
+                    for simbolo in self.producoes[indice][1]:
+                        if e_variavel[simbolo] and simbolo not in alcancaveis:
+                            alcancaveis.add(simbolo)
+                            pilha.append(simbolo)
+
+        producoes_uteis = {}
+        for variavel in alcancaveis:
+            producoes_uteis[variavel] = [
+                indice for indice in self.producoes_por_variavel.get(variavel, []) if geradora(indice)
+            ]
+
+        primeira_variavel = []
+        for _, corpo in self.producoes:
+            for i, simbolo in enumerate(corpo):
+                if e_variavel[simbolo]:
+                    primeira_variavel.append(i)
+                    break
+            else:
+                primeira_variavel.append(len(corpo))
+
+        # Escolhe para cada variável geradora uma produção que realiza o seu rendimento
+        # mínimo e cujo corpo só tem variáveis já resolvidas antes dela, o que evita
+        # ciclos como A: B, B: A
+        producao_minima = {}
+        mudou = True
+        while mudou:
+            mudou = False
+            for indice, (variavel, corpo) in enumerate(self.producoes):
+                if (variavel not in producao_minima
+                        and rendimento_producoes[indice] == rendimento[variavel]
+                        and all(not e_variavel[s] or s in producao_minima for s in corpo)):
+                    producao_minima[variavel] = indice
+                    mudou = True
+
+        self._analises = {
+            'anulaveis': anulaveis,
+            'rendimento': rendimento,
+            'geradoras': geradoras,
+            'alcancaveis': alcancaveis,
+            'producoes_uteis': producoes_uteis,
+            'rendimento_producoes': rendimento_producoes,
+            'producao_minima': producao_minima,
+            'primeira_variavel': primeira_variavel,
+        }
+        return self._analises
+
+    def derivado(self, chave, criar):
+        """
+        Retorna a estrutura derivada da gramática identificada pela chave (tabelas
+        de contagem, formas normais...), criando-a com criar(self) na primeira vez.
+        Como as gramáticas podem ser compartilhadas entre sessões, a criação é
+        feita sob uma trava.
+        """
+        valor = self._derivados.get(chave)
+        if valor is None:
+            with self._trava:
+                valor = self._derivados.get(chave)
+                if valor is None:
+                    valor = criar(self)
+                    self._derivados[chave] = valor
+                    self._anteriores.pop(chave, None)
+        return valor
+
+    def derivado_anterior(self, chave):
+        """
+        Retorna (versão anterior às edições da estrutura derivada, variáveis afetadas
+        pelas edições desde então), ou None. Usada por estruturas que conseguem
+        aproveitar as partes não afetadas (ver ContadorCadeias); a versão anterior
+        pode ser compartilhada com outras gramáticas e não deve ser alterada.
+        """
+        return self._anteriores.get(chave)
+
+    def variavel_auxiliar(self, base):
+        """
+        Cria uma variável nova, com nome derivado de base que ainda não exista
+        (base', base'', ...). Usada pelas transformações para formas normais; não
+        altera o separador usado para decodificar as cadeias.
+        """
+        nome = base
+        while nome in self.indices:
+            nome += "'"
+        separador = self.separador
+        indice = self.simbolo(nome, variavel=True)
+        self.separador = separador
+        return indice
+
+    def producao_original(self, indice):
+        """
+        Retorna (gramática original, índice da produção original) para a produção
+        dada, ou None se ela é auxiliar.
+        """
+        if self.original is None:
+            return self, indice
+        origem = self.origens[indice]
+        return None if origem is None else (self.original, origem)
+
+    def simbolos_inuteis(self):
+        """
+        Retorna os nomes das variáveis removidas por não gerarem cadeias terminais
+        ou por não serem alcançáveis a partir do símbolo inicial.
+        """
+        alcancaveis = self.analisar()['alcancaveis']
+        return [self.simbolos[v] for v in self.variaveis if v not in alcancaveis]
+
+    def posicao_texto(self, forma, pos):
+        """
+        Posição, no texto decodificado da forma, do símbolo da posição pos.
+        """
+        simbolos = self.simbolos
+        return sum([len(simbolos[s]) for s in forma[:pos]]) + len(self.separador) * pos
+
+    def destacar(self, forma, pos):
+        """
+        Decodifica a forma com o símbolo da posição pos entre colchetes.
+        """
+        nomes = [self.simbolos[s] for s in forma]
+        nomes[pos] = '[' + nomes[pos] + ']'
+        return self.separador.join(nomes)
+
+
+def _renumerar(listas, removida):
+    """
+    Tira o índice da produção removida das listas ordenadas de índices e decrementa
+    os maiores que ele.
+    """
+    for indices in listas.values():
+        for i in range(len(indices) - 1, -1, -1):
+            if indices[i] < removida:
+                break
+            if indices[i] == removida:
+                del indices[i]
+            else:
+                indices[i] -= 1
+
+
+def ler_gramatica(arquivo=None, texto=None):
+    """
+    Lê a gramática com o formato especificado e retorna a GramaticaCompilada correspondente.
+
+    A gramática pode vir de um caminho de arquivo, de um objeto de arquivo já aberto
+    (texto ou binário) ou diretamente do seu conteúdo em texto (str ou bytes). Os
+    arquivos são lidos linha a linha, sem carregar o conteúdo inteiro.
+
+    Formato: as declarações "variaveis:", "inicial:" e "terminais:" (nomes separados
+    por vírgula, com um ou mais caracteres), a linha "producoes" e uma linha por
+    variável ou por produção, "A: corpo | corpo". As alternativas podem ser
+    separadas por "|" ou por vírgula; "epsilon" é o corpo vazio. Os símbolos de um
+    corpo podem ser separados por espaços; sem espaços, o corpo é dividido pelo
+    casamento mais longo entre os símbolos declarados.
+
+    Todo símbolo usado numa produção precisa ter sido declarado antes dela, e a
+    mesma produção não pode aparecer duas vezes. Se o arquivo tiver erros, lança
+    ErroGramatica com todos eles e as suas linhas.
+    """
+    if texto is not None:
+        if isinstance(texto, bytes):
+            texto = texto.decode('utf-8-sig')
+        return _ler_linhas(texto.splitlines())
+    if hasattr(arquivo, 'read'):
+        if isinstance(arquivo, io.TextIOBase):
+            return _ler_linhas(arquivo)
+        if isinstance(arquivo, io.IOBase):
+            linhas = io.TextIOWrapper(arquivo, encoding='utf-8-sig')
+            try:
+                return _ler_linhas(linhas)
+            finally:
+                linhas.detach()  # O arquivo é de quem chamou e continua aberto
+        conteudo = arquivo.read()
+        if isinstance(conteudo, bytes):
+            conteudo = conteudo.decode('utf-8-sig')
+        return _ler_linhas(conteudo.splitlines())
+    with open(arquivo, 'r', encoding='utf-8-sig') as f:
+        return _ler_linhas(f)
+
+
+def _nome_invalido(nome):
+    """
+    Retorna a mensagem de erro para um nome de símbolo declarado, ou None se ele é válido.
+    """
+    if nome == EPSILON:
+        return f"'{EPSILON}' é reservado para o corpo vazio e não pode ser um símbolo"
+    if any(c.isspace() or c in RESERVADOS for c in nome):
+        return f"Nome de símbolo inválido: '{nome}'"
+    return None
+
+
+def _desconhecidos(gramatica, texto, corpo):
+    """
+    Nomes dos símbolos não declarados de um corpo tokenizado com internar=False.
+    """
+    nomes = texto.split()
+    if len(nomes) > 1:
+        return [nome for nome, simbolo in zip(nomes, corpo) if simbolo == -1]
+    # Casamento mais longo: cada símbolo desconhecido ocupa um caractere
+    desconhecidos = []
+    inicio = 0
+    for simbolo in corpo:
+        if simbolo == -1:
+            desconhecidos.append(texto[inicio])
+            inicio += 1
+        else:
+            inicio += len(gramatica.simbolos[simbolo])
+    return desconhecidos
+
+
+def _ler_linhas(linhas):
+    """
+    Monta a GramaticaCompilada a partir de um iterável de linhas, numa única passada.
+
+    Cada produção é tokenizada e indexada na sua variável assim que é lida, e os
+    erros são acumulados com o número da linha para serem lançados juntos no fim.
+    """
+    gramatica = GramaticaCompilada()
+    indices = gramatica.indices
+    e_variavel = gramatica.e_variavel
+    producoes = gramatica.producoes
+    origens = gramatica.origens
+    passos = gramatica.passos
+    producoes_por_variavel = gramatica.producoes_por_variavel
+    tokenizar = gramatica.tokenizar
+    erros = []
+    inicial = None
+    linha_inicial = None
+    corpos = {}  # variável -> corpos já lidos, para recusar produções repetidas
+
+    for numero, linha in enumerate(linhas, 1):
+        linha = linha.strip()
+        if not linha or linha == 'producoes':
+            continue
+        cabecalho, dois_pontos, resto = linha.partition(':')
+        if not dois_pontos:
+            erros.append((numero, f"Linha não reconhecida: '{linha}' (esperava 'variavel: corpo')"))
+            continue
+        cabecalho = cabecalho.strip()
+
+        if cabecalho == 'variaveis' or cabecalho == 'terminais':
+            variavel = cabecalho == 'variaveis'
+            for nome in resto.split(','):
+                nome = nome.strip()
+                if not nome:
+                    continue
+                erro = _nome_invalido(nome)
+                if erro is not None:
+                    erros.append((numero, erro))
+                    continue
+                indice = indices.get(nome)
+                if indice is None:
+                    indice = gramatica.simbolo(nome, variavel=variavel)
+                    if not variavel:
+                        gramatica.terminais.append(indice)
+                elif e_variavel[indice] != variavel:
+                    erros.append((numero, f"'{nome}' foi declarado como variável e como terminal"))
+        elif cabecalho == 'inicial':
+            inicial = resto.strip()
+            linha_inicial = numero
+        else:
+            variavel = indices.get(cabecalho)
+            if variavel is None or not e_variavel[variavel]:
+                erros.append((numero, f"'{cabecalho}' não é uma variável declarada"))
+                continue
+            indices_variavel = producoes_por_variavel[variavel]
+            corpos_variavel = corpos.setdefault(variavel, set())
+            alternativas = resto.replace(',', '|').split('|') if '|' in resto or ',' in resto else (resto,)
+            for alternativa in alternativas:
+                # Caso comum (símbolos separados por espaços) tokenizado aqui mesmo
+                nomes = alternativa.split()
+                if len(nomes) > 1:
+                    corpo = tuple([indices.get(nome, -1) for nome in nomes])
+                elif nomes:
+                    alternativa = nomes[0]
+                    corpo = tokenizar(alternativa, internar=False)
+                else:
+                    erros.append((numero, f"Alternativa vazia na produção de {cabecalho} (use '{EPSILON}')"))
+                    continue
+                if -1 in corpo:
+                    alternativa = " ".join(nomes)
+                    desconhecidos = ", ".join(f"'{nome}'" for nome in _desconhecidos(gramatica, alternativa, corpo))
+                    erros.append((numero, f"Símbolo não declarado em {cabecalho} -> {alternativa}: {desconhecidos}"))
+                    continue
+                if corpo in corpos_variavel:
+                    alternativa = " ".join(nomes)
+                    erros.append((numero, f"A produção {cabecalho} -> {alternativa} já existe na gramática"))
+                    continue
+                corpos_variavel.add(corpo)
+                indice = len(producoes)
+                producoes.append((variavel, corpo))
+                origens.append(indice)
+                passos.append(None)
+                indices_variavel.append(indice)
+
+    if not inicial:
+        erros.append((None, "A gramática não define o símbolo inicial"))
+    elif inicial not in indices or not e_variavel[indices[inicial]]:
+        # Na posição da linha 'inicial:', para manter os erros na ordem do arquivo
+        posicao = bisect.bisect_right([n for n, _ in erros], linha_inicial)
+        erros.insert(posicao, (linha_inicial, f"O símbolo inicial '{inicial}' não é uma variável declarada"))
+    if erros:
+        raise ErroGramatica(erros)
+    gramatica.inicial = indices[inicial]
+
+    # Calcula as análises e elimina os símbolos inúteis já no carregamento
+    gramatica.analisar()
+
+    return gramatica
+
+
+class CacheGramaticas:
+    """
+    Cache de gramáticas compiladas compartilhado por todo o processo.
+
+    A chave é o hash SHA-256 do conteúdo do arquivo, então o mesmo texto enviado
+    por sessões diferentes é compilado e analisado uma única vez. Quando o cache
+    passa da capacidade, a gramática usada há mais tempo é descartada (LRU).
+    As gramáticas do cache não devem ser alteradas; quem precisar editar uma
+    gramática deve trabalhar sobre uma cópia (ver GramaticaCompilada.copiar()).
+    """
+
+    def __init__(self, capacidade=32):
+        self.capacidade = capacidade
+        self._gramaticas = collections.OrderedDict()
+        self._trava = threading.Lock()
+
+    def obter(self, conteudo):
+        """
+        Retorna a gramática compilada (com as análises já calculadas) para o conteúdo dado.
+        """
+        if isinstance(conteudo, str):
+            conteudo = conteudo.encode('utf-8')
+        chave = hashlib.sha256(conteudo).hexdigest()
+
+        with self._trava:
+            gramatica = self._gramaticas.get(chave)
+            if gramatica is not None:
+                self._gramaticas.move_to_end(chave)
+                return gramatica
+
+        # A compilação é feita fora da trava para não bloquear as outras sessões
+        gramatica = ler_gramatica(texto=conteudo)
+
+        with self._trava:
+            # Outra sessão pode ter compilado o mesmo conteúdo enquanto isso
+            gramatica = self._gramaticas.setdefault(chave, gramatica)
+            self._gramaticas.move_to_end(chave)
+            while len(self._gramaticas) > self.capacidade:
+                self._gramaticas.popitem(last=False)
+        return gramatica
+
+
+# Cache usado pela aplicação web
+cache_gramaticas = CacheGramaticas()
@@ -0,0 +1,361 @@
+import argparse
+import collections
+import gc
+import json
+import multiprocessing
+import os
+import random
+import sys
+
+from ambiguidade import INFINITAS
+from deduplicacao import EXATO, MODOS, criar_conjunto
+from enumerador_shortlex import EnumeradorShortlex
+from normalizacao import arvore_original
+from reconhecedor import arvore_vazia, derivacao_da_arvore
+
+# Gerador usado por cada processo do pool (criado por _inicializar_processo)
+_gerador = None
+# Enumerador do modo enumerar, com as linguagens por comprimento já calculadas
+# pelo processo principal e herdadas pelos processos do pool (ver _enumerar_fatia)
+_enumerador = None
+
+# Número de cadeias sorteadas por tarefa no modo de amostragem
+TAMANHO_LOTE_AMOSTRAS = 1000
+# Número máximo de concatenações (e de cadeias) por tarefa do modo enumerar
+TAMANHO_LOTE_CADEIAS = 10000
+
+
+def _inteiro_positivo(texto):
+    """
+    Tipo dos argumentos que precisam ser inteiros maiores que zero.
+    """
+    try:
+        valor = int(texto)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"inteiro inválido: '{texto}'")
+    if valor < 1:
+        raise argparse.ArgumentTypeError(f"deve ser pelo menos 1: {valor}")
+    return valor
+
+
+def criar_parser():
+    """
+    Cria o parser dos argumentos da geração em lote.
+    """
+    parser = argparse.ArgumentParser(
+        description="Gera cadeias de uma gramática livre de contexto em lote.")
+    parser.add_argument("arquivo", help="arquivo da gramática")
+    parser.add_argument("--count", "-n", type=_inteiro_positivo, default=None,
+                        help="número máximo de cadeias a gerar (padrão: todas no modo enumerar)")
+    parser.add_argument("--max-len", "-L", type=int, required=True,
+                        help="comprimento máximo das cadeias")
+    parser.add_argument("--min-len", type=int, default=0,
+                        help="comprimento mínimo das cadeias (padrão: 0)")
+    parser.add_argument("--modo", choices=["enumerar", "amostrar"], default="enumerar",
+                        help="enumerar todas as cadeias por comprimento ou sortear cadeias uniformemente")
+    parser.add_argument("--format", "-f", dest="formato", choices=["texto", "jsonl"], default="texto",
+                        help="formato da saída (padrão: texto, uma cadeia por linha)")
+    parser.add_argument("--derivacoes", action="store_true",
+                        help="inclui a derivação mais à esquerda de cada cadeia")
+    parser.add_argument("--saida", "-o", default=None,
+                        help="arquivo de saída (padrão: saída padrão)")
+    parser.add_argument("--processos", "-j", type=_inteiro_positivo, default=os.cpu_count() or 1,
+                        help="número de processos (padrão: número de núcleos)")
+    parser.add_argument("--semente", type=int, default=None,
+                        help="semente do sorteio no modo amostrar")
+    parser.add_argument("--comprimentos", choices=["arvores", "uniforme"], default="arvores",
+                        help="peso de cada comprimento no modo amostrar: o seu número de árvores de "
+                             "derivação (sorteio uniforme sobre todas as árvores) ou o mesmo para todos "
+                             "os comprimentos com cadeias (padrão: arvores)")
+    parser.add_argument("--max-concatenacoes", type=int, default=None,
+                        help="orçamento de concatenações de cada comprimento do modo enumerar "
+                             "(padrão: sem limite); a geração para com erro se ele for excedido")
+    parser.add_argument("--deduplicacao", choices=MODOS, default=EXATO,
+                        help="estrutura usada para não repetir formas e cadeias: exato, hash "
+                             "(hashes de 64 bits) ou bloom (memória fixa, pode omitir cadeias)")
+    return parser
+
+
+def _inicializar_processo(arquivo, deduplicacao=EXATO, comprimento=None):
+    """
+    Prepara um processo do pool: carrega a gramática e, no modo enumerar, calcula
+    as linguagens até o comprimento dado. Num processo criado por fork, o gerador e
+    o enumerador do processo principal já estão prontos e são aproveitados.
+    """
+    global _gerador, _enumerador
+    if _gerador is None:
+        from gerador import GeradorGLC
+        _gerador = GeradorGLC(arquivo, deduplicacao=deduplicacao)
+    if comprimento is not None and (_enumerador is None or _enumerador.comprimento < comprimento):
+        _enumerador = EnumeradorShortlex(_gerador)
+        for _ in _enumerador.calcular_ate(comprimento):
+            pass
+
+
+def _derivacao(cadeia, producao=None):
+    """
+    Derivação mais à esquerda de uma cadeia (tupla de ids) na gramática original,
+    montada a partir das linguagens por comprimento, sem reconhecer a cadeia de novo
+    (ver EnumeradorShortlex.arvore()). producao é a produção do símbolo inicial na
+    forma reduzida que a deriva, se já é conhecida.
+    """
+    gramatica = _gerador.gramatica
+    if not cadeia:
+        return derivacao_da_arvore(gramatica, arvore_vazia(gramatica, gramatica.inicial))
+    arvore = arvore_original(_enumerador.normal, _enumerador.arvore(cadeia, producao))
+    return derivacao_da_arvore(gramatica, arvore)
+
+
+def _enumerar_fatia(tarefa):
+    """
+    Gera, uma a uma, as cadeias do último comprimento derivadas por uma produção
+    do símbolo inicial na forma reduzida, com o primeiro símbolo do corpo de um
+    comprimento dado e só para uma fatia das suas cadeias. Produz pares (cadeia,
+    derivacao); a derivação é None se não foi pedida.
+
+    As linguagens dos comprimentos menores já estão calculadas (ver
+    _inicializar_processo()), então a tarefa só concatena: cada uma faz no máximo
+    TAMANHO_LOTE_CADEIAS concatenações e devolve no máximo esse número de cadeias.
+    """
+    comprimento, producao, divisao, inicio, fim, com_derivacao = tarefa
+    gramatica = _gerador.gramatica
+    for cadeia in _enumerador.cadeias_da_divisao(producao, comprimento, divisao, inicio, fim):
+        yield gramatica.decodificar(cadeia), _derivacao(cadeia, producao) if com_derivacao else None
+
+
+def _comprimentos_calculados(enumerador, args):
+    """
+    Calcula as linguagens dos comprimentos menores que --max-len no processo
+    principal e produz pares (cadeia, derivacao) das cadeias daqueles a partir de
+    --min-len, em ordem shortlex. As cadeias já estão nos conjuntos calculados, que
+    também servem às tarefas do último comprimento. Se o orçamento de um comprimento
+    for excedido, lança ValueError.
+    """
+    gramatica = _gerador.gramatica
+    orcamento = args.max_concatenacoes
+    if args.min_len == 0 and gramatica.inicial in gramatica.analisar()['anulaveis']:
+        yield '', _derivacao(()) if args.derivacoes else None
+    for comprimento in range(1, args.max_len):
+        trabalho = 0
+        for passo in enumerador.calcular_ate(comprimento):
+            trabalho += passo
+            if orcamento is not None and trabalho > orcamento:
+                raise ValueError(f"Orçamento de {orcamento} concatenações excedido no comprimento {comprimento}")
+        if comprimento < args.min_len:
+            continue
+        for cadeia in enumerador.em_ordem(enumerador.linguagens[enumerador.normal.inicial][comprimento]):
+            yield gramatica.decodificar(cadeia), _derivacao(cadeia) if args.derivacoes else None
+
+
+def _amostrar_fatia(tarefa):
+    """
+    Sorteia um lote de cadeias com comprimentos entre os limites dados. Cada
+    comprimento tem peso igual ao seu número de árvores de derivação na gramática
+    original ('arvores') ou o mesmo peso que os demais que têm cadeias ('uniforme');
+    dentro do comprimento, o sorteio é uniforme sobre as árvores. Numa gramática
+    ambígua as árvores não são cadeias distintas, e o sorteio favorece as cadeias
+    com mais derivações.
+    """
+    quantidade, minimo, maximo, pesos_comprimentos, semente, com_derivacao = tarefa
+    gerador_aleatorio = random.Random(semente)
+    comprimentos = list(range(minimo, maximo + 1))
+    pesos = [_gerador.contar_cadeias(n) for n in comprimentos]
+    if pesos_comprimentos == "uniforme":
+        pesos = [1 if peso else 0 for peso in pesos]
+
+    for _ in range(quantidade):
+        comprimento = _escolher_ponderado(gerador_aleatorio, comprimentos, pesos)
+        cadeia = _gerador.amostrar_cadeia(comprimento, gerador_aleatorio)
+        yield cadeia, _gerador.reconhecer(cadeia)[1] if com_derivacao else None
+
+
+def _em_lista(tarefa):
+    """
+    Executa a tarefa num processo do pool e devolve os seus resultados de uma vez
+    (as tarefas dos dois modos são pequenas: TAMANHO_LOTE_CADEIAS e TAMANHO_LOTE_AMOSTRAS).
+    """
+    trabalhar, argumentos = tarefa
+    return list(trabalhar(argumentos))
+
+
+def _escolher_ponderado(gerador_aleatorio, valores, pesos):
+    """
+    Escolhe um valor com probabilidade proporcional ao peso (inteiros exatos).
+    """
+    sorteio = gerador_aleatorio.randrange(sum(pesos))
+    for valor, peso in zip(valores, pesos):
+        if sorteio < peso:
+            return valor
+        sorteio -= peso
+
+
+def _tarefas_enumeracao(enumerador, args):
+    """
+    Divide o último comprimento (--max-len) por produção do símbolo inicial na forma
+    reduzida, pelo comprimento do primeiro símbolo do corpo e em fatias das cadeias
+    desse símbolo, com no máximo TAMANHO_LOTE_CADEIAS concatenações por tarefa.
+    Os comprimentos menores já estão calculados. Se o orçamento do comprimento for
+    excedido, lança ValueError antes de criar qualquer tarefa.
+    """
+    comprimento = args.max_len
+    if comprimento == 0 or comprimento < args.min_len:
+        return []
+    normal = enumerador.normal
+    tarefas = []
+    total = 0
+    for indice in normal.producoes_por_variavel.get(normal.inicial, []):
+        for divisao, esquerda, direita in enumerador.divisoes(indice, comprimento):
+            total += esquerda * direita
+            passo = max(1, TAMANHO_LOTE_CADEIAS // direita)
+            for inicio in range(0, esquerda, passo):
+                tarefas.append((comprimento, indice, divisao, inicio, inicio + passo, args.derivacoes))
+    if args.max_concatenacoes is not None and total > args.max_concatenacoes:
+        raise ValueError(f"Orçamento de {args.max_concatenacoes} concatenações excedido no comprimento {comprimento}")
+    return tarefas
+
+
+def _tarefas_amostragem(args):
+    """
+    Divide a amostragem em lotes independentes, cada um com a sua semente.
+    """
+    sementes = random.Random(args.semente)
+    restantes = args.count
+    while restantes > 0:
+        quantidade = min(TAMANHO_LOTE_AMOSTRAS, restantes)
+        restantes -= quantidade
+        yield (quantidade, args.min_len, args.max_len, args.comprimentos, sementes.getrandbits(64), args.derivacoes)
+
+
+def _mapear_em_janela(pool, funcao, tarefas, janela):
+    """
+    Como pool.imap, mas com no máximo janela tarefas em andamento, de modo que
+    nem as tarefas nem os resultados ainda não escritos se acumulam na memória.
+    Os resultados são entregues na ordem das tarefas.
+    """
+    pendentes = collections.deque()
+    for tarefa in tarefas:
+        pendentes.append(pool.apply_async(funcao, (tarefa,)))
+        if len(pendentes) >= janela:
+            yield pendentes.popleft().get()
+    while pendentes:
+        yield pendentes.popleft().get()
+
+
+def _escrever(saida, formato, cadeia, derivacao):
+    """
+    Escreve uma cadeia (e opcionalmente a sua derivação) no formato pedido.
+    """
+    if formato == "jsonl":
+        registro = {"cadeia": cadeia}
+        if derivacao is not None:
+            registro["derivacao"] = [list(passo) for passo in derivacao]
+        saida.write(json.dumps(registro, ensure_ascii=False) + "\n")
+    else:
+        saida.write(cadeia + "\n")
+        if derivacao is not None:
+            for i, (forma_antiga, simbolo, producao, forma_nova) in enumerate(derivacao):
+                saida.write(f"  Passo {i+1}: {forma_antiga} => {forma_nova} (substituindo [{simbolo}] por {producao})\n")
+
+
+def executar(argv=None):
+    """
+    Ponto de entrada da geração em lote. Retorna o código de saída do processo.
+
+    No modo enumerar, o processo principal calcula as linguagens por comprimento
+    e escreve as cadeias dos comprimentos menores que --max-len em ordem shortlex;
+    as do último comprimento, o mais caro, são divididas entre os processos do pool,
+    que recebem as linguagens já calculadas, e saem na ordem das tarefas.
+    """
+    global _gerador, _enumerador
+    parser = criar_parser()
+    args = parser.parse_args(argv)
+
+    if args.modo == "amostrar" and args.count is None:
+        parser.error("o modo amostrar exige --count")
+
+    _gerador = _enumerador = None
+    try:
+        _inicializar_processo(args.arquivo, args.deduplicacao)
+    except ValueError as e:
+        # Erros do arquivo da gramática, um por linha
+        for linha in str(e).splitlines():
+            print(f"{args.arquivo}: {linha}", file=sys.stderr)
+        return 1
+    gerador = _gerador
+
+    enumerar = args.modo == "enumerar"
+    if enumerar:
+        _enumerador = EnumeradorShortlex(gerador)
+        trabalhar = _enumerar_fatia
+    else:
+        contagens = [gerador.contar_cadeias(n) for n in range(args.min_len, args.max_len + 1)]
+        if not any(contagens):
+            print("A gramática não gera cadeias com esses comprimentos.", file=sys.stderr)
+            return 1
+        if INFINITAS in contagens:
+            print(f"As cadeias de comprimento {args.min_len + contagens.index(INFINITAS)} têm infinitas "
+                  "árvores de derivação (ciclos de produções unitárias ou anuláveis); o sorteio "
+                  "uniforme sobre as árvores não é definido.", file=sys.stderr)
+            return 1
+        if gerador.verificar_ambiguidade()['ambigua']:
+            print("Aviso: a gramática é ambígua; o sorteio é uniforme sobre as árvores de derivação, "
+                  "não sobre as cadeias, e favorece as cadeias com mais derivações.", file=sys.stderr)
+        tarefas = list(_tarefas_amostragem(args))
+        trabalhar = _amostrar_fatia
+
+    saida = open(args.saida, "w") if args.saida else sys.stdout
+    pool = None
+    escritas = 0
+    try:
+        if enumerar:
+            for cadeia, derivacao in _comprimentos_calculados(_enumerador, args):
+                _escrever(saida, args.formato, cadeia, derivacao)
+                escritas += 1
+                if args.count is not None and escritas >= args.count:
+                    return 0
+            saida.flush()
+            tarefas = _tarefas_enumeracao(_enumerador, args)
+
+        if args.processos > 1 and tarefas:
+            # Com fork, os processos herdam o gerador e as linguagens já calculadas sem
+            # copiá-los; gc.freeze() evita que a coleta de lixo toque nesses objetos e
+            # force a cópia das suas páginas
+            if "fork" in multiprocessing.get_all_start_methods():
+                contexto = multiprocessing.get_context("fork")
+            else:
+                contexto = multiprocessing.get_context()
+            gc.freeze()
+            pool = contexto.Pool(args.processos, initializer=_inicializar_processo,
+                                 initargs=(args.arquivo, args.deduplicacao, args.max_len - 1 if enumerar else None))
+            # Mantém a ordem das tarefas e entrega cada resultado assim que fica pronto
+            resultados = _mapear_em_janela(pool, _em_lista, ((trabalhar, t) for t in tarefas), 2 * args.processos)
+        else:
+            # Num só processo cada cadeia é escrita assim que é gerada
+            resultados = map(trabalhar, tarefas)
+
+        # Cadeias já escritas do último comprimento, que uma cadeia pode alcançar por
+        # mais de uma produção do símbolo inicial ou divisão do corpo
+        vistas = criar_conjunto(args.deduplicacao)
+        for lote in resultados:
+            for cadeia, derivacao in lote:
+                if enumerar:
+                    if cadeia in vistas:
+                        continue
+                    vistas.add(cadeia)
+                _escrever(saida, args.formato, cadeia, derivacao)
+                escritas += 1
+                if args.count is not None and escritas >= args.count:
+                    return 0
+            saida.flush()
+    except ValueError as e:
+        # Orçamento de concatenações excedido
+        print(e, file=sys.stderr)
+        return 1
+    finally:
+        if pool is not None:
+            pool.terminate()
+            gc.unfreeze()
+        if saida is not sys.stdout:
+            saida.close()
+
+    return 0
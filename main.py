@@ -1,6 +1,22 @@
 import streamlit as st
+from formas import Derivacao, passo_destacado
 from gerador import GeradorGLC
+from gramatica import cache_gramaticas
+from tarefas import CONCLUIDA, TarefaGeracao
+import hashlib
 import os
+import tempfile
+import time
+
+# Intervalo (em segundos) entre as atualizações da página durante uma geração
+INTERVALO_ATUALIZACAO = 0.5
+
+# Passos de derivação exibidos por página; só a página atual é formatada
+PASSOS_POR_PAGINA = 50
+
+# Rótulos das opções do modo rápido
+MODOS_DEDUPLICACAO = {"Exata": "exato", "Hashes de 64 bits": "hash", "Filtro de Bloom (visitados em memória fixa)": "bloom"}
+ORDENS = {"Derivações (busca em largura)": "derivacoes", "Shortlex (comprimento, depois alfabética)": "shortlex"}
 
 st.set_page_config(page_title="Gerador de Cadeias", page_icon=":robot_face:")
 st.title("Gerador de Cadeias para Gramáticas Livres de Contexto")
@@ -9,11 +25,9 @@ st.title("Gerador de Cadeias para Gramáticas Livres de Contexto")
 if 'forma_sentencial' not in st.session_state:
     st.session_state.forma_sentencial = ""
 if 'derivacao' not in st.session_state:
-    st.session_state.derivacao = []
+    st.session_state.derivacao = Derivacao()
 if 'is_terminal' not in st.session_state:
     st.session_state.is_terminal = False
-if 'derivacoes_geradas' not in st.session_state:
-    st.session_state.derivacoes_geradas = set()
 if 'modo_detalhado_ativo' not in st.session_state:
     st.session_state.modo_detalhado_ativo = False
 if 'producao_selecionada' not in st.session_state:
@@ -22,11 +36,54 @@ if 'gerador_inicializado' not in st.session_state:
     st.session_state.gerador_inicializado = False
 if 'gerador' not in st.session_state:
     st.session_state.gerador = None
+if 'hash_gramatica' not in st.session_state:
+    st.session_state.hash_gramatica = None
+if 'tarefa' not in st.session_state:
+    st.session_state.tarefa = None
+if 'ambiguidade' not in st.session_state:
+    st.session_state.ambiguidade = None
+if 'erro_edicao' not in st.session_state:
+    st.session_state.erro_edicao = None
+if 'opcao_comprimento' not in st.session_state:
+    st.session_state.opcao_comprimento = 0
+if 'checkpoint_temporario' not in st.session_state:
+    st.session_state.checkpoint_temporario = None
+if 'erro_checkpoint' not in st.session_state:
+    st.session_state.erro_checkpoint = None
+if 'reconhecimento' not in st.session_state:
+    st.session_state.reconhecimento = None
+if 'erro_gramatica' not in st.session_state:
+    st.session_state.erro_gramatica = None
+if 'erro_detalhado' not in st.session_state:
+    st.session_state.erro_detalhado = None
+
+# Exibe uma derivação como uma tabela paginada. O custo de cada atualização da
+# página depende só de PASSOS_POR_PAGINA, não do comprimento da derivação, e a
+# variável substituída é destacada pela posição guardada em cada passo
+def exibir_derivacao(derivacao, chave):
+    st.write(f"Forma inicial: {st.session_state.gerador.inicial}")
+    paginas = max(1, -(-len(derivacao) // PASSOS_POR_PAGINA))
+    pagina = 1
+    if paginas > 1:
+        pagina = st.number_input(f"Página (de {paginas})", min_value=1, max_value=paginas, step=1,
+                                 key=f"pagina_{chave}")
+    inicio = (pagina - 1) * PASSOS_POR_PAGINA
+    linhas = []
+    for i in range(inicio, min(inicio + PASSOS_POR_PAGINA, len(derivacao))):
+        forma_antiga, simbolo, producao, forma_nova = derivacao[i]
+        linhas.append({"Passo": i + 1, "Forma": passo_destacado(derivacao, i),
+                       "Substituição": f"{simbolo} → {producao or 'ε'}", "Nova forma": forma_nova or "ε"})
+    st.dataframe(linhas, hide_index=True, use_container_width=True)
+    if paginas > 1:
+        st.caption(f"Passos {inicio + 1} a {inicio + len(linhas)} de {len(derivacao)}")
 
 # Função para reiniciar o modo detalhado
 def reiniciar_modo_detalhado():
-    st.session_state.forma_sentencial = st.session_state.gerador.inicial
-    st.session_state.derivacao = []
+    # A forma é guardada como FormaSentencial, que acha a variável mais à esquerda sem varrer a forma
+    st.session_state.forma_sentencial = st.session_state.gerador.forma_inicial()
+    st.session_state.derivacao = Derivacao()
+    st.session_state.pop("pagina_detalhado", None)
+    st.session_state.erro_detalhado = None
     st.session_state.is_terminal = False
     st.session_state.modo_detalhado_ativo = True
 
@@ -46,34 +103,129 @@ def aplicar_producao_callback():
         st.session_state.forma_sentencial, pos_nao_terminal, producao
     )
     
-    # Adiciona o passo de derivação
-    st.session_state.derivacao.append((st.session_state.forma_sentencial, simbolo, producao_escolhida, nova_forma))
+    # Adiciona o passo de derivação (em texto, para exibição, com a posição da variável substituída)
+    forma = st.session_state.forma_sentencial
+    st.session_state.derivacao.adicionar(str(forma), simbolo, producao_escolhida, str(nova_forma), forma.inicio_variavel())
     
     # Atualiza a forma sentencial
     st.session_state.forma_sentencial = nova_forma
     
     # Verifica se a forma sentencial só contém terminais
-    st.session_state.is_terminal = not any(s in st.session_state.gerador.variaveis for s in nova_forma)
+    st.session_state.is_terminal = nova_forma.terminal
+
+# Função para completar a derivação pelo caminho mais curto (produções mínimas)
+def completar_derivacao_callback():
+    try:
+        forma, _ = st.session_state.gerador.completar_mais_curta(
+            st.session_state.forma_sentencial, st.session_state.derivacao)
+    except ValueError as e:
+        st.session_state.erro_detalhado = str(e)
+        return
+    st.session_state.erro_detalhado = None
+    st.session_state.forma_sentencial = forma
+    st.session_state.is_terminal = True
+
+# Funções do editor: alteram a gramática do gerador da sessão sem recarregar o arquivo.
+# Só as análises das variáveis afetadas são refeitas (ver GeradorGLC.adicionar_producao)
+def editar_gramatica(editar, variavel, producao):
+    try:
+        editar(variavel, producao)
+    except ValueError as e:
+        st.session_state.erro_edicao = str(e)
+        return
+    st.session_state.erro_edicao = None
+    # Os resultados e a derivação em andamento são da gramática anterior
+    st.session_state.tarefa = None
+    st.session_state.modo_detalhado_ativo = False
+    st.session_state.ambiguidade = st.session_state.gerador.verificar_ambiguidade()
+    st.session_state.reconhecimento = None
+
+def adicionar_producao_callback():
+    editar_gramatica(st.session_state.gerador.adicionar_producao,
+                     st.session_state.editor_variavel, st.session_state.editor_corpo)
+
+def remover_producao_callback():
+    variavel, producao = st.session_state.editor_remover.split("→")
+    editar_gramatica(st.session_state.gerador.remover_producao, variavel.strip(), producao.strip())
+
+# Checkpoints do modo rápido, gravados e lidos de arquivos temporários: a
+# enumeração retomada mapeia o arquivo em memória em vez de lê-lo todo de uma vez
+def _novo_checkpoint_temporario():
+    anterior = st.session_state.checkpoint_temporario
+    if anterior is not None:
+        try:
+            os.unlink(anterior)
+        except OSError:
+            pass  # Ainda mapeado (Windows) ou já removido
+    descritor, caminho = tempfile.mkstemp(suffix='.ckpt')
+    os.close(descritor)
+    st.session_state.checkpoint_temporario = caminho
+    return caminho
+
+def gravar_checkpoint_callback():
+    st.session_state.gerador.salvar_checkpoint(_novo_checkpoint_temporario())
+    st.session_state.erro_checkpoint = None
+
+def carregar_checkpoint_callback():
+    arquivo = st.session_state.arquivo_checkpoint
+    if arquivo is None:
+        return
+    caminho = _novo_checkpoint_temporario()
+    with open(caminho, 'wb') as f:
+        f.write(arquivo.getvalue())
+    gerador = st.session_state.gerador
+    try:
+        gerador.carregar_checkpoint(caminho)
+    except ValueError as e:
+        st.session_state.erro_checkpoint = str(e)
+        return
+    st.session_state.erro_checkpoint = None
+    st.session_state.tarefa = None
+    # As opções passam a ser as do checkpoint, para que os controles não reiniciem a enumeração
+    st.session_state.opcao_comprimento = gerador.comprimento_maximo or 0
+    st.session_state.opcao_deduplicacao = next(r for r, m in MODOS_DEDUPLICACAO.items() if m == gerador.deduplicacao)
+    st.session_state.opcao_ordem = next(r for r, o in ORDENS.items() if o == gerador.ordem)
 
 # Função para processar o arquivo carregado
 def processar_arquivo_carregado(uploaded_file):
     if uploaded_file is not None:
-        # Salva o arquivo carregado temporariamente
-        with open("gramatica_temp.txt", "wb") as f:
-            f.write(uploaded_file.getbuffer())
+        # A gramática é lida direto do conteúdo enviado; a versão compilada e as suas
+        # análises ficam no cache do processo e são compartilhadas entre as sessões
+        conteudo = uploaded_file.getvalue()
+        try:
+            gramatica = cache_gramaticas.obter(conteudo)
+        except ValueError as e:
+            # Todos os erros do arquivo, com as linhas, são mostrados de uma vez
+            st.session_state.erro_gramatica = str(e)
+            st.session_state.gerador = None
+            st.session_state.gerador_inicializado = False
+            return False
+        st.session_state.erro_gramatica = None
         
-        # Inicializa o gerador com o arquivo carregado
-        st.session_state.gerador = GeradorGLC("gramatica_temp.txt")
+        # A sessão guarda apenas o seu próprio estado de enumeração
+        if st.session_state.tarefa is not None:
+            st.session_state.tarefa.cancelar()
+            st.session_state.tarefa = None
+        st.session_state.gerador = GeradorGLC(gramatica=gramatica, instrumentar=True)
+        # As tabelas da verificação ficam no cache da gramática, então ela só é feita uma vez por gramática
+        st.session_state.ambiguidade = st.session_state.gerador.verificar_ambiguidade()
+        st.session_state.reconhecimento = None
+        st.session_state.hash_gramatica = hashlib.sha256(conteudo).hexdigest()
         st.session_state.gerador_inicializado = True
+        st.session_state.modo_detalhado_ativo = False
         return True
     return False
 
 # Upload do arquivo de gramática
 uploaded_file = st.file_uploader("Faça upload do arquivo de gramática", type="txt")
 
-# Processa o arquivo se foi carregado
-if uploaded_file and (st.session_state.gerador is None or not st.session_state.gerador_inicializado):
+# Processa o arquivo se foi carregado ou se o conteúdo mudou
+if uploaded_file and (st.session_state.gerador is None or not st.session_state.gerador_inicializado
+                      or hashlib.sha256(uploaded_file.getvalue()).hexdigest() != st.session_state.hash_gramatica):
     processar_arquivo_carregado(uploaded_file)
+if uploaded_file and st.session_state.erro_gramatica:
+    st.error("O arquivo da gramática tem erros:\n\n" + "\n".join(
+        f"- {linha}" for linha in st.session_state.erro_gramatica.splitlines()))
 
 # Exibe informações da gramática se o gerador foi inicializado
 if st.session_state.gerador_inicializado:
@@ -87,37 +239,191 @@ if st.session_state.gerador_inicializado:
     for var, prods in st.session_state.gerador.producoes.items():
         st.write(f"{var} → {' | '.join(prods)}")
     
+    # Editor de produções; desabilitado enquanto uma geração está em andamento
+    tarefa = st.session_state.tarefa
+    with st.expander("Editar gramática"):
+        editando = tarefa is None or not tarefa.ativa
+        col1, col2 = st.columns([1, 3])
+        col1.text_input("Variável", key="editor_variavel", disabled=not editando)
+        col2.text_input("Corpo (epsilon para a produção vazia)", key="editor_corpo", disabled=not editando)
+        st.button("Adicionar produção", on_click=adicionar_producao_callback, disabled=not editando)
+        opcoes = [f"{var} → {prod}" for var, prods in st.session_state.gerador.producoes.items() for prod in prods]
+        st.selectbox("Produção", opcoes, key="editor_remover", disabled=not editando)
+        st.button("Remover produção", on_click=remover_producao_callback, disabled=not editando or not opcoes)
+        if st.session_state.erro_edicao:
+            st.error(st.session_state.erro_edicao)
+    
+    # Variáveis que não geram cadeias ou não são alcançáveis não participam da geração
+    inuteis = st.session_state.gerador.gramatica.simbolos_inuteis()
+    if inuteis:
+        st.warning(f"Símbolos inúteis ignorados na geração: {', '.join(inuteis)}")
+    
+    # Cadeias curtas com mais de uma derivação mais à esquerda
+    ambiguidade = st.session_state.ambiguidade
+    if ambiguidade is not None and ambiguidade['ambigua']:
+        cadeia, primeira, segunda = ambiguidade['testemunha']
+        st.warning(f"A gramática é ambígua: {ambiguidade['total_ambiguas']} cadeias de comprimento até "
+                   f"{ambiguidade['comprimento_verificado']} têm mais de uma derivação mais à esquerda. "
+                   "As contagens e a amostragem uniforme (geração em lote) consideram árvores de "
+                   "derivação e favorecem as cadeias com mais derivações.")
+        with st.expander("Cadeias ambíguas"):
+            st.table([
+                {"Cadeia": c or "ε", "Derivações": "infinitas" if k == float('inf') else k}
+                for c, k in ambiguidade['cadeias']
+            ])
+            st.write(f"Duas derivações de '{cadeia or 'ε'}':")
+            col1, col2 = st.columns(2)
+            for coluna, derivacao in ((col1, primeira), (col2, segunda)):
+                coluna.write(" ⇒ ".join([st.session_state.gerador.inicial] + [passo[3] or "ε" for passo in derivacao]))
+    elif ambiguidade is not None:
+        st.caption(f"Nenhuma cadeia ambígua até o comprimento {ambiguidade['comprimento_verificado']}.")
+    
+    # Gramática transformada por uma etapa do pipeline de normalização
+    with st.expander("Formas normais"):
+        etapas = {
+            "Sem produções vazias": 'sem_epsilon',
+            "Sem produções vazias e unitárias": 'sem_epsilon_unitarias',
+            "Reduzida (sem símbolos inúteis)": 'reduzida',
+            "Chomsky": 'chomsky',
+            "Sem recursão à esquerda": 'sem_recursao_esquerda',
+            "Greibach": 'greibach',
+        }
+        rotulo = st.selectbox("Etapa", list(etapas), index=3)
+        try:
+            producoes = st.session_state.gerador.forma_normal(etapas[rotulo])
+        except ValueError as e:
+            st.error(str(e))
+        else:
+            st.caption(f"{len(producoes)} produções; a cadeia vazia não é gerada por nenhuma forma normal.")
+            st.dataframe(
+                [{"Variável": v, "Corpo": c, "Produção original": o or "—"} for v, c, o in producoes],
+                use_container_width=True,
+            )
+
     # Seleção do modo
-    modo = st.radio("Selecione o modo", ["Rápido", "Detalhado"])
+    modo = st.radio("Selecione o modo", ["Rápido", "Detalhado", "Reconhecer"])
     
     if modo == "Rápido":
         # Desativa o modo detalhado se estava ativo
         if st.session_state.modo_detalhado_ativo:
             st.session_state.modo_detalhado_ativo = False
         
-        if st.button("Gerar Cadeia"):
-            cadeia, derivacao = st.session_state.gerador.gerar_cadeia_rapido()
+        tarefa = st.session_state.tarefa
+        executando = tarefa is not None and tarefa.ativa
+        
+        # Limite de comprimento das cadeias geradas; mudar o limite reinicia a enumeração
+        comprimento = st.number_input("Comprimento máximo das cadeias (0 = sem limite)", min_value=0, step=1,
+                                      key="opcao_comprimento", disabled=executando)
+        comprimento_maximo = int(comprimento) or None
+        if not executando and comprimento_maximo != st.session_state.gerador.comprimento_maximo:
+            st.session_state.gerador.definir_comprimento_maximo(comprimento_maximo)
+        
+        # Estrutura usada para não repetir formas e cadeias; trocar reinicia a enumeração
+        rotulo = st.selectbox("Deduplicação", list(MODOS_DEDUPLICACAO), disabled=executando, key="opcao_deduplicacao",
+                              help="Hashes e o filtro de Bloom economizam a memória do conjunto de formas "
+                                   "visitadas; a fronteira e as derivações guardadas continuam crescendo com a "
+                                   "busca. O filtro de Bloom pode omitir algumas cadeias (falsos positivos).")
+        if not executando and MODOS_DEDUPLICACAO[rotulo] != st.session_state.gerador.deduplicacao:
+            st.session_state.gerador.definir_deduplicacao(MODOS_DEDUPLICACAO[rotulo])
+
+        # Ordem das cadeias; trocar reinicia a enumeração
+        rotulo = st.selectbox("Ordem", list(ORDENS), disabled=executando, key="opcao_ordem",
+                              help="Em ordem shortlex cada cadeia aparece uma só vez e, se a linguagem for finita, "
+                                   "o gerador avisa quando todas já foram mostradas.")
+        if not executando and ORDENS[rotulo] != st.session_state.gerador.ordem:
+            st.session_state.gerador.definir_ordem(ORDENS[rotulo])
+
+        # Orçamento de cada pedido de geração
+        col1, col2, col3 = st.columns(3)
+        quantidade = col1.number_input("Quantidade de cadeias", min_value=1, value=1, step=1, disabled=executando)
+        tempo_maximo = col2.number_input("Tempo máximo (s)", min_value=1, value=10, step=1, disabled=executando)
+        memoria_maxima = col3.number_input("Memória estimada máxima (MB)", min_value=1, value=256, step=16,
+                                           disabled=executando,
+                                           help="Limite para a estimativa de memória do enumerador, calculada pelo "
+                                                "número de itens guardados; a memória real do processo pode ser maior.")
+        
+        if not executando:
+            if st.button("Gerar Cadeia"):
+                # A busca roda em segundo plano; a página é atualizada enquanto ela avança
+                st.session_state.tarefa = TarefaGeracao(
+                    st.session_state.gerador, int(quantidade), float(tempo_maximo), int(memoria_maxima) * 1024 * 1024
+                ).iniciar()
+                st.rerun()
+        elif st.button("Cancelar"):
+            tarefa.cancelar()
+        
+        # Contadores da busca e tempo gasto em cada fase
+        with st.expander("Estatísticas do gerador"):
+            estatisticas = st.session_state.gerador.stats()
+            col1, col2, col3, col4 = st.columns(4)
+            col1.metric("Expansões", estatisticas['expansoes'])
+            col2.metric("Duplicadas", estatisticas['duplicadas'])
+            col3.metric("Pico da fronteira", estatisticas['pico_fronteira'])
+            col4.metric("Cadeias geradas", estatisticas['cadeias_geradas'])
+            st.write(f"Fronteira atual: {estatisticas['fronteira']} formas - "
+                     f"visitadas: {estatisticas['visitados']} - "
+                     f"memória estimada: {estatisticas['memoria_estimada'] / (1024 * 1024):.1f} MB")
+            if estatisticas['tempos']:
+                st.table([
+                    {"Fase": fase, "Tempo (ms)": f"{medida['segundos'] * 1000:.1f}", "Chamadas": medida['chamadas']}
+                    for fase, medida in estatisticas['tempos'].items()
+                ])
+        
+        # Gravação e retomada da enumeração em outro momento ou em outra máquina
+        with st.expander("Checkpoint"):
+            st.button("Gravar checkpoint", on_click=gravar_checkpoint_callback, disabled=executando)
+            caminho = st.session_state.checkpoint_temporario
+            if caminho is not None and os.path.exists(caminho) and os.path.getsize(caminho):
+                with open(caminho, 'rb') as f:
+                    st.download_button("Baixar checkpoint", f, file_name="enumeracao.ckpt")
+            st.file_uploader("Retomar de um checkpoint", type="ckpt", key="arquivo_checkpoint",
+                             on_change=carregar_checkpoint_callback, disabled=executando)
+            if st.session_state.erro_checkpoint:
+                st.error(st.session_state.erro_checkpoint)
+        
+        if tarefa is not None:
+            progresso = tarefa.progresso()
+            if executando:
+                st.progress(min(progresso['cadeias'] / tarefa.quantidade, 1.0),
+                            text=f"{progresso['cadeias']} de {tarefa.quantidade} cadeias - "
+                                 f"{progresso['expansoes']} expansões - {progresso['tempo']:.1f}s")
+            elif tarefa.estado == CONCLUIDA:
+                st.caption(f"{tarefa.mensagem} ({progresso['tempo']:.1f}s)")
+            else:
+                st.warning(tarefa.mensagem)  # Cancelamento, orçamento esgotado ou fim da enumeração
             
-            if isinstance(cadeia, str) and not cadeia.startswith("Todas as"):
+            # Resultados (parciais, se a busca ainda está em andamento)
+            for indice, (cadeia, derivacao) in enumerate(tarefa.resultados):
                 st.success(f"Cadeia gerada: {cadeia}")
                 
-                st.subheader("Derivação mais à esquerda:")
-                st.write(f"Forma inicial: {st.session_state.gerador.inicial}")
+                with st.expander("Derivação mais à esquerda", expanded=len(tarefa.resultados) == 1):
+                    exibir_derivacao(derivacao, f"rapido_{id(tarefa)}_{indice}")
+            
+            # Enquanto a busca avança, a página é recarregada periodicamente
+            if executando:
+                time.sleep(INTERVALO_ATUALIZACAO)
+                st.rerun()
+    elif modo == "Reconhecer":
+        # Desativa o modo detalhado se estava ativo
+        if st.session_state.modo_detalhado_ativo:
+            st.session_state.modo_detalhado_ativo = False
+        
+        cadeia = st.text_input("Cadeia a reconhecer (deixe vazio para a cadeia vazia)")
+        
+        if st.button("Reconhecer"):
+            # O resultado fica na sessão para que a troca de página da derivação não o perca
+            st.session_state.reconhecimento = (cadeia, *st.session_state.gerador.reconhecer(cadeia))
+            st.session_state.pop("pagina_reconhecimento", None)
+        
+        if st.session_state.reconhecimento is not None:
+            cadeia_reconhecida, pertence, derivacao = st.session_state.reconhecimento
+            if pertence:
+                st.success(f"A cadeia '{cadeia_reconhecida}' pertence à linguagem da gramática.")
                 
-                # Verifica o formato da derivação
-                if derivacao and isinstance(derivacao[0], tuple) and len(derivacao[0]) == 4:
-                    # Formato novo: tuplas (forma_antiga, simbolo, producao, forma_nova)
-                    for i, (forma_antiga, simbolo, producao, forma_nova) in enumerate(derivacao):
-                        # Encontra a posição do símbolo na forma antiga
-                        pos = forma_antiga.find(simbolo)
-                        forma_destacada = forma_antiga[:pos] + '[' + simbolo + ']' + forma_antiga[pos+1:]
-                        st.write(f"Passo {i+1}: {forma_destacada} => {forma_nova} (substituindo [{simbolo}] por {producao})")
-                else:
-                    # Formato antigo ou outro formato
-                    for i, passo in enumerate(derivacao):
-                        st.write(f"Passo {i+1}: {passo}")
+                st.subheader("Derivação mais à esquerda:")
+                exibir_derivacao(derivacao, "reconhecimento")
             else:
-                st.warning(cadeia)  # Mensagem de que todas as derivações foram mostradas
+                st.error(f"A cadeia '{cadeia_reconhecida}' não pertence à linguagem da gramática.")
     else:  # Modo Detalhado
         # Botão para iniciar/reiniciar o modo detalhado
         if st.button("Iniciar Derivação Detalhada"):
@@ -155,19 +461,34 @@ if st.session_state.gerador_inicializado:
                 
                 # Botão para aplicar a produção
                 st.button("Aplicar Produção", on_click=aplicar_producao_callback)
+                
+                # Sugestões: calculadas só quando pedidas e guardadas pelo gerador para a forma atual
+                if st.checkbox("Mostrar sugestões", key="sugestoes_detalhado"):
+                    alvo = st.text_input("Cadeia alvo (opcional)", key="alvo_detalhado")
+                    anotacoes = st.session_state.gerador.anotar_opcoes(st.session_state.forma_sentencial, alvo or None)
+                    linhas = []
+                    for anotacao in anotacoes:
+                        linha = {
+                            "Produção": f"{simbolo} → {anotacao['producao']}",
+                            "Termina": "sim" if anotacao['termina'] else "não",
+                            "Menor cadeia": anotacao['comprimento_minimo'] if anotacao['termina'] else "—",
+                            "Mais curta": "✓" if anotacao['minima'] else "",
+                        }
+                        if alvo:
+                            linha["Leva ao alvo"] = "talvez" if anotacao['compativel'] else "não"
+                        linhas.append(linha)
+                    st.dataframe(linhas, hide_index=True, use_container_width=True)
+                
+                st.button("Completar pelo caminho mais curto", on_click=completar_derivacao_callback)
+                if st.session_state.erro_detalhado:
+                    st.error(st.session_state.erro_detalhado)
             else:
                 st.success(f"Derivação completa! Cadeia gerada: {st.session_state.forma_sentencial}")
             
             # Exibe os passos da derivação
             if st.session_state.derivacao:
                 st.subheader("Passos da Derivação:")
-                st.write(f"Forma inicial: {st.session_state.gerador.inicial}")
-                
-                for i, (forma_antiga, simbolo, producao, forma_nova) in enumerate(st.session_state.derivacao):
-                    # Encontra a posição do símbolo na forma antiga
-                    pos = forma_antiga.find(simbolo)
-                    forma_destacada = forma_antiga[:pos] + '[' + simbolo + ']' + forma_antiga[pos+1:]
-                    st.write(f"Passo {i+1}: {forma_destacada} => {forma_nova} (substituindo [{simbolo}] por {producao})")
+                exibir_derivacao(st.session_state.derivacao, "detalhado")
 else:
     st.info("Faça o upload de um arquivo de gramática para começar.")
     st.markdown("""
@@ -177,11 +498,13 @@ else:
     inicial:S
     terminais:a,b,c,d
     producoes
-    S: aA
-    S: bB
+    S: aA | bB
     A: epsilon
     B: c
     ```
+    Os nomes podem ter vários caracteres; nesse caso, separe os símbolos dos corpos
+    por espaços (ex.: `Expr: Expr + Termo | Termo`). Todo símbolo usado nas produções
+    precisa estar declarado, e os erros do arquivo são listados com as suas linhas.
     """)
     
     # Exemplo de uso
@@ -190,7 +513,10 @@ else:
     1. Faça o upload de um arquivo de gramática no formato especificado acima.
     2. Escolha o modo de derivação:
        - **Modo Rápido**: Gera automaticamente uma cadeia e mostra a derivação completa.
-       - **Modo Detalhado**: Permite que você escolha cada produção usando menus dropdown.
+       - **Modo Detalhado**: Permite que você escolha cada produção usando menus dropdown,
+         com sugestões opcionais (quais produções terminam ou podem levar a uma cadeia alvo)
+         e a opção de completar a derivação pelo caminho mais curto.
+       - **Reconhecer**: Verifica se uma cadeia pertence à linguagem e mostra a sua derivação.
     3. No modo detalhado, você verá a forma sentencial atual com o não-terminal mais à esquerda destacado.
     4. Selecione uma produção no menu dropdown e clique em "Aplicar Produção".
     5. Continue até obter uma cadeia composta apenas por símbolos terminais.
@@ -0,0 +1,427 @@
+import itertools
+
+from reconhecedor import arvore_vazia
+
+# Limite de produções para as transformações que podem crescer exponencialmente
+# (remoção da recursão à esquerda e forma de Greibach)
+MAX_PRODUCOES = 200000
+
+# Nos moldes (ver arvore_original), filho anulável omitido pela remoção de epsilon
+_VAZIA = -1
+
+
+def _molde(indice, corpo, e_variavel):
+    """
+    Molde da produção de índice dado com os filhos das variáveis nas mesmas posições.
+    """
+    return indice, tuple(i if e_variavel[s] else None for i, s in enumerate(corpo))
+
+
+def remover_epsilon(gramatica):
+    """
+    Retorna uma gramática equivalente sem produções vazias, a menos da cadeia vazia.
+
+    Cada produção útil é substituída por todas as variantes obtidas omitindo
+    algumas das suas variáveis anuláveis (exceto a variante vazia). A linguagem
+    resultante é L(G) sem a cadeia vazia; use a análise 'anulaveis' da gramática
+    original para saber se ela pertencia a L(G).
+    """
+    analises = gramatica.analisar()
+    anulaveis = analises['anulaveis']
+    e_variavel = gramatica.e_variavel
+    nova = gramatica.derivada()
+    vistas = set()
+
+    for variavel, indices in analises['producoes_uteis'].items():
+        for indice in indices:
+            corpo = gramatica.producoes[indice][1]
+            opcionais = [i for i, s in enumerate(corpo) if s in anulaveis]
+            for omitir in itertools.product((False, True), repeat=len(opcionais)):
+                omitidos = set(i for i, o in zip(opcionais, omitir) if o)
+                novo_corpo = tuple(s for i, s in enumerate(corpo) if i not in omitidos)
+                if novo_corpo and (variavel, novo_corpo) not in vistas:
+                    vistas.add((variavel, novo_corpo))
+                    # Os filhos mantidos passam às posições do novo corpo; os omitidos derivam epsilon
+                    filhos = []
+                    j = 0
+                    for i, s in enumerate(corpo):
+                        if i in omitidos:
+                            filhos.append(_VAZIA)
+                            continue
+                        filhos.append(j if e_variavel[s] else None)
+                        j += 1
+                    nova.adicionar_producao(variavel, novo_corpo, gramatica.origens[indice], (indice, tuple(filhos)))
+
+    return nova
+
+
+def remover_unitarias(gramatica):
+    """
+    Retorna uma gramática equivalente sem produções unitárias (A: B).
+
+    Para cada variável A, as produções não unitárias de toda variável B alcançável
+    de A por produções unitárias passam a ser produções de A.
+    """
+    e_variavel = gramatica.e_variavel
+    nova = gramatica.derivada()
+
+    def unitaria(corpo):
+        return len(corpo) == 1 and e_variavel[corpo[0]]
+
+    for variavel in gramatica.variaveis:
+        # Fecho unitário de A, incluindo a própria A, com a produção unitária pela
+        # qual cada variável foi alcançada
+        fecho = [variavel]
+        caminho = {variavel: None}  # variável -> (variável anterior, produção unitária)
+        i = 0
+        while i < len(fecho):
+            for indice in gramatica.producoes_por_variavel.get(fecho[i], []):
+                corpo = gramatica.producoes[indice][1]
+                if unitaria(corpo) and corpo[0] not in caminho:
+                    caminho[corpo[0]] = (fecho[i], indice)
+                    fecho.append(corpo[0])
+            i += 1
+
+        vistos = set()
+        for alvo in fecho:
+            for indice in gramatica.producoes_por_variavel.get(alvo, []):
+                corpo = gramatica.producoes[indice][1]
+                if not unitaria(corpo) and corpo not in vistos:
+                    vistos.add(corpo)
+                    # O molde desce pelas produções unitárias de A até a produção de alvo
+                    molde = _molde(indice, corpo, e_variavel)
+                    passo = caminho[alvo]
+                    while passo is not None:
+                        anterior, unitaria_usada = passo
+                        molde = (unitaria_usada, (molde,))
+                        passo = caminho[anterior]
+                    nova.adicionar_producao(variavel, corpo, gramatica.origens[indice], molde)
+
+    return nova
+
+
+def remover_inuteis(gramatica):
+    """
+    Retorna a gramática só com as produções úteis (de variáveis alcançáveis a
+    partir do símbolo inicial e cujos símbolos geram cadeias terminais). As
+    variáveis removidas deixam a lista de variáveis; o símbolo inicial fica sempre.
+    """
+    analises = gramatica.analisar()
+    uteis = set(itertools.chain.from_iterable(analises['producoes_uteis'].values()))
+    e_variavel = gramatica.e_variavel
+    nova = gramatica.derivada()
+    nova.variaveis = [
+        v for v in gramatica.variaveis if v in analises['producoes_uteis'] or v == gramatica.inicial
+    ]
+    nova.producoes_por_variavel = {v: [] for v in nova.variaveis}
+
+    for indice, (variavel, corpo) in enumerate(gramatica.producoes):
+        if indice in uteis:
+            nova.adicionar_producao(variavel, corpo, gramatica.origens[indice], _molde(indice, corpo, e_variavel))
+
+    return nova
+
+
+def _verificar_tamanho(total):
+    if total > MAX_PRODUCOES:
+        raise ValueError(f"A transformação passou de {MAX_PRODUCOES} produções; a gramática é grande demais para esta forma normal")
+
+
+class _Terminais:
+    """
+    Variáveis auxiliares T_a -> a, criadas sob demanda para tirar os terminais de
+    corpos com mais de um símbolo.
+    """
+
+    def __init__(self, gramatica):
+        self.gramatica = gramatica
+        self.variaveis = {}
+
+    def __call__(self, terminal):
+        variavel = self.variaveis.get(terminal)
+        if variavel is None:
+            variavel = self.gramatica.variavel_auxiliar('T_' + self.gramatica.simbolos[terminal])
+            self.gramatica.adicionar_producao(variavel, (terminal,))
+            self.variaveis[terminal] = variavel
+        return variavel
+
+
+def em_chomsky(gramatica):
+    """
+    Converte para a forma normal de Chomsky: todo corpo é um terminal ou duas
+    variáveis. A entrada não pode ter produções vazias nem unitárias (ver reduzida).
+
+    Os terminais de corpos longos passam para variáveis T_a -> a, e cada corpo
+    A -> X1 X2 ... Xk vira a cadeia A -> X1 A_1, A_1 -> X2 A_2, ..., A_k-2 -> Xk-1 Xk.
+    As produções da cadeia têm a origem da produção que a criou; as de T_a, nenhuma.
+    Só a primeira produção da cadeia tem molde: as auxiliares são desfeitas na
+    reconstrução das árvores (ver arvore_original).
+    """
+    e_variavel = gramatica.e_variavel
+    nova = gramatica.derivada()
+    terminal = _Terminais(nova)
+
+    for indice, (variavel, corpo) in enumerate(gramatica.producoes):
+        origem = gramatica.origens[indice]
+        molde = _molde(indice, corpo, e_variavel)
+        if len(corpo) == 1:
+            nova.adicionar_producao(variavel, corpo, origem, molde)
+            continue
+
+        corpo = [s if e_variavel[s] else terminal(s) for s in corpo]
+        atual = variavel
+        for i in range(len(corpo) - 2):
+            auxiliar = nova.variavel_auxiliar(f"{gramatica.simbolos[variavel]}_{indice}_{i + 1}")
+            nova.adicionar_producao(atual, (corpo[i], auxiliar), origem, molde)
+            atual = auxiliar
+            molde = None
+        nova.adicionar_producao(atual, tuple(corpo[-2:]), origem, molde)
+
+    return nova
+
+
+def remover_recursao_esquerda(gramatica):
+    """
+    Retorna uma gramática equivalente sem recursão à esquerda, direta ou indireta.
+    A entrada não pode ter produções vazias nem unitárias (ver reduzida).
+
+    Algoritmo clássico: com as variáveis numa ordem A1..An, as produções Ai -> Aj γ
+    com j < i recebem os corpos de Aj até que todo corpo de Ai comece por um
+    terminal ou por Aj com j >= i; a recursão direta Ai -> Ai α | β vira
+    Ai -> β | β Ai' e Ai' -> α | α Ai'. O número de produções pode crescer
+    exponencialmente; passando de MAX_PRODUCOES, levanta ValueError.
+
+    As produções guardam só a origem: as árvores desta forma (e da de Greibach,
+    calculada a partir dela) não são levadas de volta à gramática original.
+    """
+    e_variavel = gramatica.e_variavel
+    ordem = [v for v in gramatica.variaveis if gramatica.producoes_por_variavel.get(v)]
+    posicao = {v: i for i, v in enumerate(ordem)}
+
+    # variável -> {corpo: origem}, na ordem em que os corpos aparecem
+    corpos = {v: {} for v in ordem}
+    for indice, (variavel, corpo) in enumerate(gramatica.producoes):
+        corpos[variavel].setdefault(corpo, gramatica.origens[indice])
+
+    nova = gramatica.derivada()
+    nova.anterior = None  # Sem moldes (ver arvore_original)
+    auxiliares = {}
+    total = len(gramatica.producoes)
+    for i, variavel in enumerate(ordem):
+        # Substitui as variáveis anteriores no início dos corpos
+        while True:
+            substituidos = {}
+            mudou = False
+            for corpo, origem in corpos[variavel].items():
+                primeiro = corpo[0]
+                if e_variavel[primeiro] and posicao.get(primeiro, i) < i:
+                    for inicio in corpos[primeiro]:
+                        substituidos.setdefault(inicio + corpo[1:], origem)
+                    mudou = True
+                    _verificar_tamanho(total + len(substituidos))
+                else:
+                    substituidos.setdefault(corpo, origem)
+            total += len(substituidos) - len(corpos[variavel])
+            corpos[variavel] = substituidos
+            if not mudou:
+                break
+
+        # Recursão direta
+        recursivos = {c[1:]: o for c, o in corpos[variavel].items() if c[0] == variavel}
+        if not recursivos:
+            continue
+        outros = {c: o for c, o in corpos[variavel].items() if c[0] != variavel}
+        auxiliar = nova.variavel_auxiliar(gramatica.simbolos[variavel] + "'")
+        corpos[variavel] = dict(outros)
+        for corpo, origem in outros.items():
+            corpos[variavel].setdefault(corpo + (auxiliar,), origem)
+        auxiliares[auxiliar] = dict(recursivos)
+        for corpo, origem in recursivos.items():
+            auxiliares[auxiliar].setdefault(corpo + (auxiliar,), origem)
+        total += len(outros) + len(recursivos)
+        _verificar_tamanho(total)
+
+    for tabela in (corpos, auxiliares):
+        for variavel, corpos_variavel in tabela.items():
+            for corpo, origem in corpos_variavel.items():
+                nova.adicionar_producao(variavel, corpo, origem)
+
+    return nova
+
+
+def em_greibach(gramatica):
+    """
+    Converte para a forma normal de Greibach: todo corpo é um terminal seguido de
+    zero ou mais variáveis. A entrada não pode ter produções vazias, unitárias nem
+    recursão à esquerda (ver remover_recursao_esquerda).
+
+    Sem recursão à esquerda, o grafo "A tem um corpo que começa por B" não tem
+    ciclos; as variáveis são tratadas das que não começam por variável para as
+    demais, e a variável no início de cada corpo é trocada pelos corpos dela, que
+    já começam por terminal. Os terminais que sobram fora do início passam para
+    variáveis T_a -> a. Como na remoção da recursão à esquerda, levanta
+    ValueError se o número de produções passar de MAX_PRODUCOES.
+    """
+    e_variavel = gramatica.e_variavel
+    producoes = gramatica.producoes
+    variaveis = [v for v in gramatica.variaveis if gramatica.producoes_por_variavel.get(v)]
+
+    # Ordem topológica pelo primeiro símbolo dos corpos
+    dependencias = {
+        v: {producoes[i][1][0] for i in gramatica.producoes_por_variavel[v] if e_variavel[producoes[i][1][0]]}
+        for v in variaveis
+    }
+    corpos = {}
+    total = 0
+    while len(corpos) < len(variaveis):
+        prontas = [v for v in variaveis if v not in corpos and dependencias[v].issubset(corpos)]
+        if not prontas:
+            raise ValueError("A gramática tem recursão à esquerda; remova-a antes de converter para a forma de Greibach")
+        for variavel in prontas:
+            corpos[variavel] = {}
+            for indice in gramatica.producoes_por_variavel[variavel]:
+                corpo = producoes[indice][1]
+                origem = gramatica.origens[indice]
+                if e_variavel[corpo[0]]:
+                    for inicio in corpos[corpo[0]]:
+                        corpos[variavel].setdefault(inicio + corpo[1:], origem)
+                else:
+                    corpos[variavel].setdefault(corpo, origem)
+            total += len(corpos[variavel])
+            _verificar_tamanho(total)
+
+    nova = gramatica.derivada()
+    nova.anterior = None  # Sem moldes, como a etapa anterior (ver arvore_original)
+    terminal = _Terminais(nova)
+    for variavel in variaveis:
+        for corpo, origem in corpos[variavel].items():
+            resto = tuple(s if e_variavel[s] else terminal(s) for s in corpo[1:])
+            nova.adicionar_producao(variavel, corpo[:1] + resto, origem)
+
+    return nova
+
+
+# Etapas do pipeline de formas normais: nome -> (etapa anterior, transformação)
+ETAPAS = {
+    'sem_epsilon': (None, remover_epsilon),
+    'sem_epsilon_unitarias': ('sem_epsilon', remover_unitarias),
+    'reduzida': ('sem_epsilon_unitarias', remover_inuteis),
+    'chomsky': ('reduzida', em_chomsky),
+    'sem_recursao_esquerda': ('reduzida', remover_recursao_esquerda),
+    'greibach': ('sem_recursao_esquerda', em_greibach),
+}
+
+
+def forma_normal(gramatica, etapa):
+    """
+    Retorna a gramática transformada até a etapa dada do pipeline:
+
+        'sem_epsilon'             - sem produções vazias
+        'sem_epsilon_unitarias'   - e sem produções unitárias
+        'reduzida'                - e sem símbolos inúteis
+        'chomsky'                 - forma normal de Chomsky
+        'sem_recursao_esquerda'   - reduzida e sem recursão à esquerda
+        'greibach'                - forma normal de Greibach
+
+    Todas descrevem L(G) sem a cadeia vazia (ver a análise 'anulaveis' da original).
+    Cada etapa é calculada uma única vez a partir da anterior e fica no cache da
+    gramática (ver derivado()), compartilhada por quem usa a mesma gramática. As
+    produções guardam em origens o índice da produção original correspondente e,
+    até a forma de Chomsky, os moldes usados por arvore_original().
+    """
+    if etapa not in ETAPAS:
+        raise ValueError(f"Etapa de normalização desconhecida: {etapa}")
+    anterior, transformar = ETAPAS[etapa]
+
+    def criar(g):
+        return transformar(g if anterior is None else forma_normal(g, anterior))
+
+    return gramatica.derivado(('forma_normal', etapa), criar)
+
+
+def sem_epsilon_unitarias(gramatica):
+    """
+    Retorna a forma da gramática sem produções vazias e sem produções unitárias.
+    """
+    return forma_normal(gramatica, 'sem_epsilon_unitarias')
+
+
+def arvore_original(gramatica, arvore):
+    """
+    Reescreve uma árvore de derivação de uma forma normal (no formato do
+    reconhecedor: [produção, filhos]) como a árvore correspondente da gramática
+    original, etapa por etapa do pipeline, de modo que a derivação possa ser
+    mostrada nas produções do usuário (ver derivacao_da_arvore).
+
+    Cada produção de uma etapa guarda em passos um molde: a árvore que ela
+    representa nas produções da etapa anterior, em que cada filho é None (um
+    terminal), a posição de um filho da produção (cuja árvore é reescrita no
+    lugar), _VAZIA (variável anulável omitida, que deriva epsilon pela árvore de
+    arvore_vazia) ou outro molde (as produções unitárias removidas). As produções
+    auxiliares não têm molde: T_a vira o próprio terminal e as da cadeia da forma de
+    Chomsky devolvem os seus filhos à produção que a começou.
+
+    Levanta ValueError para as formas sem recursão à esquerda e de Greibach, que
+    não guardam moldes.
+    """
+    while gramatica.original is not None:
+        if gramatica.anterior is None:
+            raise ValueError("As árvores desta forma normal não podem ser levadas de volta à gramática original")
+        arvore = _reescrever(gramatica, arvore)
+        gramatica = gramatica.anterior
+    return arvore
+
+
+def _reescrever(gramatica, arvore):
+    """
+    Reescreve a árvore de uma etapa na gramática da etapa anterior. A construção
+    é iterativa, como no reconhecedor, para não esbarrar no limite de recursão.
+    """
+    anterior = gramatica.anterior
+    raiz = [None, None]
+    pendentes = [(raiz, arvore)]
+    while pendentes:
+        destino, no = pendentes.pop()
+        filhos = _filhos_achatados(gramatica, no)
+
+        moldes = [(destino, gramatica.passos[no[0]])]
+        while moldes:
+            destino, (indice, filhos_molde) = moldes.pop()
+            corpo = anterior.producoes[indice][1]
+            novos = []
+            for posicao, filho in enumerate(filhos_molde):
+                if filho is None:
+                    novos.append(None)
+                elif filho == _VAZIA:
+                    novos.append(arvore_vazia(anterior, corpo[posicao]))
+                elif isinstance(filho, int):
+                    sub = [None, None]
+                    pendentes.append((sub, filhos[filho]))
+                    novos.append(sub)
+                else:
+                    sub = [None, None]
+                    moldes.append((sub, filho))
+                    novos.append(sub)
+            destino[0] = indice
+            destino[1] = novos
+    return raiz
+
+
+def _filhos_achatados(gramatica, no):
+    """
+    Filhos do nó com os das produções auxiliares desfeitos: um nó de T_a vira o
+    terminal (None) e um da cadeia da forma de Chomsky, os seus próprios filhos.
+    """
+    passos = gramatica.passos
+    producoes = gramatica.producoes
+    filhos = []
+    pilha = list(reversed(no[1]))
+    while pilha:
+        filho = pilha.pop()
+        if filho is None or passos[filho[0]] is not None:
+            filhos.append(filho)
+        elif len(producoes[filho[0]][1]) == 1:
+            filhos.append(None)
+        else:
+            pilha.extend(reversed(filho[1]))
+    return filhos
@@ -0,0 +1,173 @@
+from formas import Derivacao
+
+
+def reconhecer(gramatica, tokens):
+    """
+    Reconhecedor de Earley sobre a gramática compilada.
+
+    Recebe a cadeia já tokenizada (tupla de ids) e retorna a árvore de derivação
+    de uma das análises da cadeia, ou None se ela não pertence à linguagem. O
+    tempo é polinomial (cúbico no pior caso) no comprimento da cadeia.
+
+    Os itens são tuplas (produção, ponto, origem). As variáveis anuláveis são
+    tratadas como em Aycock e Horspool: ao prever uma variável anulável o ponto
+    avança imediatamente sobre ela. Cada item guarda o primeiro caminho pelo qual
+    foi criado (item anterior e filho reconhecido); esses ponteiros sempre apontam
+    para itens criados antes, então a árvore reconstruída não tem ciclos.
+    """
+    analises = gramatica.analisar()
+    producoes = gramatica.producoes
+    producoes_uteis = analises['producoes_uteis']
+    anulaveis = analises['anulaveis']
+    e_variavel = gramatica.e_variavel
+    n = len(tokens)
+
+    if gramatica.inicial not in producoes_uteis:
+        return None
+
+    # conjuntos[j]: item -> (posição do item anterior, item anterior, filho)
+    # O filho é None para um terminal, ('v', item completo em j) para uma variável
+    # reconhecida e ('e', variável) para uma variável anulável pulada.
+    conjuntos = [{} for _ in range(n + 1)]
+    # espera[j]: variável -> itens de conjuntos[j] com o ponto antes dela
+    espera = [{} for _ in range(n + 1)]
+    agendas = [[] for _ in range(n + 1)]
+
+    def adicionar(j, item, origem):
+        if item in conjuntos[j]:
+            return
+        conjuntos[j][item] = origem
+        agendas[j].append(item)
+        corpo = producoes[item[0]][1]
+        if item[1] < len(corpo) and e_variavel[corpo[item[1]]]:
+            espera[j].setdefault(corpo[item[1]], []).append(item)
+
+    for indice in producoes_uteis[gramatica.inicial]:
+        adicionar(0, (indice, 0, 0), None)
+
+    for j in range(n + 1):
+        agenda = agendas[j]
+        previstas = set()
+        i = 0
+        while i < len(agenda):
+            item = agenda[i]
+            i += 1
+            indice, ponto, origem = item
+            variavel, corpo = producoes[indice]
+
+            if ponto < len(corpo):
+                simbolo = corpo[ponto]
+                if e_variavel[simbolo]:
+                    # Previsão
+                    if simbolo not in previstas:
+                        previstas.add(simbolo)
+                        for proxima in producoes_uteis.get(simbolo, ()):
+                            adicionar(j, (proxima, 0, j), None)
+                    if simbolo in anulaveis:
+                        adicionar(j, (indice, ponto + 1, origem), (j, item, ('e', simbolo)))
+                elif j < n and tokens[j] == simbolo:
+                    # Leitura
+                    adicionar(j + 1, (indice, ponto + 1, origem), (j, item, None))
+            else:
+                # Conclusão: avança os itens de conjuntos[origem] que esperavam a variável
+                for anterior in espera[origem].get(variavel, ()):
+                    adicionar(j, (anterior[0], anterior[1] + 1, anterior[2]), (origem, anterior, ('v', item)))
+
+    # Procura um item completo do símbolo inicial cobrindo a cadeia toda
+    for item in conjuntos[n]:
+        indice, ponto, origem = item
+        variavel, corpo = producoes[indice]
+        if origem == 0 and variavel == gramatica.inicial and ponto == len(corpo):
+            return _construir_arvore(gramatica, conjuntos, n, item)
+
+    return None
+
+
+def _construir_arvore(gramatica, conjuntos, j, item):
+    """
+    Reconstrói a árvore de derivação a partir dos ponteiros dos itens de Earley.
+
+    Cada nó é uma lista [produção, filhos], com um filho por símbolo do corpo:
+    None para terminais e outro nó para variáveis. A construção é iterativa para
+    não esbarrar no limite de recursão em derivações longas.
+    """
+    producoes = gramatica.producoes
+    raiz = [item[0], None]
+    pendentes = [(raiz, j, item)]
+
+    while pendentes:
+        no, j, item = pendentes.pop()
+        filhos = [None] * len(producoes[item[0]][1])
+
+        # Percorre os ponteiros do item completo de volta até o ponto zero
+        while item[1] > 0:
+            anterior_j, anterior, filho = conjuntos[j][item]
+            if filho is not None:
+                tipo, valor = filho
+                if tipo == 'v':
+                    sub = [valor[0], None]
+                    pendentes.append((sub, j, valor))
+                else:
+                    sub = arvore_vazia(gramatica, valor)
+                filhos[item[1] - 1] = sub
+            j, item = anterior_j, anterior
+
+        no[1] = filhos
+
+    return raiz
+
+
+def arvore_vazia(gramatica, variavel):
+    """
+    Retorna a árvore da derivação mais curta da cadeia vazia a partir de uma variável anulável.
+    """
+    producao_minima = gramatica.analisar()['producao_minima']
+    producoes = gramatica.producoes
+
+    raiz = [producao_minima[variavel], None]
+    pendentes = [raiz]
+    while pendentes:
+        no = pendentes.pop()
+        filhos = []
+        for simbolo in producoes[no[0]][1]:
+            sub = [producao_minima[simbolo], None]
+            pendentes.append(sub)
+            filhos.append(sub)
+        no[1] = filhos
+    return raiz
+
+
+def derivacao_da_arvore(gramatica, arvore):
+    """
+    Converte uma árvore de derivação na derivação mais à esquerda correspondente,
+    uma Derivacao de passos (forma_antiga, simbolo, producao, forma_nova).
+    """
+    producoes = gramatica.producoes
+    e_variavel = gramatica.e_variavel
+
+    derivacao = Derivacao()
+    forma = [producoes[arvore[0]][0]]
+    texto = gramatica.decodificar(forma)
+    pos = 0
+
+    # Os nós pendentes estão na mesma ordem das variáveis da forma, da direita para a esquerda
+    pendentes = [arvore]
+    while pendentes:
+        no = pendentes.pop()
+        variavel, corpo = producoes[no[0]]
+
+        # A variável mais à esquerda está em pos ou depois (os símbolos antes são terminais)
+        while not e_variavel[forma[pos]]:
+            pos += 1
+
+        inicio = gramatica.posicao_texto(forma, pos)
+        forma[pos:pos+1] = corpo
+        novo_texto = gramatica.decodificar(forma)
+        derivacao.adicionar(texto, gramatica.simbolos[variavel], gramatica.decodificar_corpo(corpo), novo_texto, inicio)
+        texto = novo_texto
+
+        for filho in reversed(no[1]):
+            if filho is not None:
+                pendentes.append(filho)
+
+    return derivacao
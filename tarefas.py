@@ -0,0 +1,135 @@
+import threading
+import time
+
+# Número de expansões entre duas verificações de cancelamento e de orçamento
+EXPANSOES_POR_PASSO = 200
+
+# Estados de uma tarefa
+EXECUTANDO = "executando"
+CONCLUIDA = "concluida"
+ESGOTADA = "esgotada"
+CANCELADA = "cancelada"
+TEMPO_ESGOTADO = "tempo_esgotado"
+MEMORIA_ESGOTADA = "memoria_esgotada"
+ERRO = "erro"
+
+MENSAGENS = {
+    EXECUTANDO: "Gerando cadeias...",
+    CONCLUIDA: "Geração concluída.",
+    ESGOTADA: "Todas as derivações possíveis já foram mostradas.",
+    CANCELADA: "Geração cancelada.",
+    TEMPO_ESGOTADO: "Tempo máximo atingido. Gere novamente para continuar a busca.",
+    MEMORIA_ESGOTADA: "Limite de memória estimada atingido. Reinicie a enumeração ou aumente o limite.",
+}
+
+
+class TarefaGeracao:
+    """
+    Executa o modo rápido numa thread separada, para que a página continue
+    respondendo enquanto a busca avança.
+
+    A busca roda em passos de EXPANSOES_POR_PASSO expansões; entre dois passos a
+    tarefa verifica o pedido de cancelamento, o tempo máximo e a memória estimada
+    do enumerador. Na ordem shortlex um passo pode passar do orçamento em no
+    máximo PEDACO_COMBINACAO concatenações, porque o enumerador devolve o controle
+    também no meio da combinação de uma sequência. As cadeias encontradas ficam
+    disponíveis em resultados assim que aparecem, então a interface pode exibir
+    resultados parciais.
+
+    memoria_maxima limita a estimativa do enumerador (memoria_estimada(), calculada
+    a partir do número de itens guardados), não a memória real do processo: as
+    threads do servidor dividem o mesmo processo, e a memória ocupada de fato pelos
+    objetos Python pode passar bastante da estimativa.
+    """
+
+    def __init__(self, gerador, quantidade=1, tempo_maximo=10.0, memoria_maxima=None):
+        self.gerador = gerador
+        self.quantidade = quantidade
+        self.tempo_maximo = tempo_maximo        # em segundos (None = sem limite)
+        self.memoria_maxima = memoria_maxima    # em bytes de memória estimada (None = sem limite)
+
+        self.resultados = []                    # pares (cadeia, derivacao)
+        self.estado = EXECUTANDO
+        self.erro = None
+        self.mensagem_final = None              # mensagem do gerador ao esgotar a enumeração
+        self.inicio = None
+        self.fim = None
+
+        self._cancelar = threading.Event()
+        self._thread = threading.Thread(target=self._executar, daemon=True)
+
+    def iniciar(self):
+        """
+        Inicia a geração em segundo plano.
+        """
+        self.inicio = time.monotonic()
+        self._thread.start()
+        return self
+
+    def cancelar(self):
+        """
+        Pede o cancelamento; a tarefa para no fim do passo atual.
+        """
+        self._cancelar.set()
+
+    @property
+    def ativa(self):
+        return self.estado == EXECUTANDO
+
+    @property
+    def tempo_decorrido(self):
+        if self.inicio is None:
+            return 0.0
+        return (self.fim if self.fim is not None else time.monotonic()) - self.inicio
+
+    @property
+    def mensagem(self):
+        if self.estado == ERRO:
+            return f"Erro durante a geração: {self.erro}"
+        if self.estado == ESGOTADA and self.mensagem_final is not None:
+            return self.mensagem_final
+        return MENSAGENS[self.estado]
+
+    def progresso(self):
+        """
+        Retorna um dicionário com o andamento da busca.
+        """
+        enumerador = self.gerador.enumerador
+        return {
+            'cadeias': len(self.resultados),
+            'expansoes': enumerador.expansoes,
+            'fronteira': len(enumerador.fila),
+            'memoria': enumerador.memoria_estimada(),
+            'tempo': self.tempo_decorrido,
+        }
+
+    def _executar(self):
+        try:
+            self.estado = self._buscar()
+        except Exception as e:
+            self.erro = e
+            self.estado = ERRO
+        self.fim = time.monotonic()
+
+    def _buscar(self):
+        gerador = self.gerador
+        while len(self.resultados) < self.quantidade:
+            if self._cancelar.is_set():
+                return CANCELADA
+            if self.tempo_maximo is not None and self.tempo_decorrido > self.tempo_maximo:
+                return TEMPO_ESGOTADO
+            if self.memoria_maxima is not None and gerador.enumerador.memoria_estimada() > self.memoria_maxima:
+                return MEMORIA_ESGOTADA
+
+            cadeia, derivacao = gerador.gerar_cadeia_rapido(EXPANSOES_POR_PASSO)
+            if derivacao:
+                self.resultados.append((cadeia, derivacao))
+            elif gerador.enumerador.esgotado:
+                # Sem derivação, a cadeia é a mensagem do gerador (ex.: linguagem finita)
+                self.mensagem_final = cadeia
+                return ESGOTADA
+
+            # Cede a vez às outras threads do servidor entre os passos
+            time.sleep(0)
+
+        return CONCLUIDA
@@ -0,0 +1,64 @@
+import itertools
+import os
+import sys
+
+import pytest
+
+# Os módulos do projeto ficam na raiz do repositório, sem pacote
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gerador import GeradorGLC  # noqa: E402
+
+# Gramáticas pequenas usadas pelos testes, sem ciclos de produções anuláveis
+# (a busca em largura das derivações não termina com eles)
+GRAMATICAS = {
+    'unitaria': (
+        "variaveis:S,A,B\ninicial:S\nterminais:a,b,c\nproducoes\n"
+        "S: aA\nS: bB\nA: epsilon\nB: S\nB: c\n"
+    ),
+    'palindromos': (
+        "variaveis:S,A,B,C\ninicial:S\nterminais:0,1\nproducoes\n"
+        "S: CSC\nS: A\nA: 0B1\nA: 1B0\nB: CBC\nB: C\nB: epsilon\nC: 0\nC: 1\n"
+    ),
+    'anulavel': (
+        "variaveis:S,A\ninicial:S\nterminais:a,b\nproducoes\n"
+        "S: AA\nS: b\nA: a\nA: b\nA: epsilon\n"
+    ),
+    'parenteses': (
+        "variaveis:S\ninicial:S\nterminais:a,b\nproducoes\n"
+        "S: aSbS\nS: epsilon\n"
+    ),
+    'expressoes': (
+        "variaveis:E,T,F\ninicial:E\nterminais:x,+,*\nproducoes\n"
+        "E: E+T\nE: T\nT: T*F\nT: F\nF: x\n"
+    ),
+}
+
+
+@pytest.fixture(params=sorted(GRAMATICAS))
+def texto(request):
+    """
+    Texto de cada uma das gramáticas de GRAMATICAS.
+    """
+    return GRAMATICAS[request.param]
+
+
+def linguagem(gerador, comprimento_maximo):
+    """
+    Cadeias de comprimento até comprimento_maximo, pela busca em largura das derivações.
+    """
+    return {cadeia for cadeia, _ in gerador.gerar_cadeias_ate(comprimento_maximo)}
+
+
+def todas_as_cadeias(gerador, comprimento_maximo):
+    """
+    Todas as cadeias sobre os terminais com comprimento até comprimento_maximo.
+    """
+    for n in range(comprimento_maximo + 1):
+        for simbolos in itertools.product(gerador.terminais, repeat=n):
+            yield "".join(simbolos)
+
+
+@pytest.fixture
+def gerador(texto):
+    return GeradorGLC(texto=texto)
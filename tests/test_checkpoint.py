@@ -0,0 +1,73 @@
+import pytest
+
+from deduplicacao import MODOS
+from gerador import ORDEM_DERIVACOES, ORDEM_SHORTLEX, GeradorGLC
+
+QUANTIDADE = 40
+COMPRIMENTO_MAXIMO = 8
+
+
+def gerar(gerador, quantidade, max_iteracoes=None):
+    """
+    Cadeias e derivações das próximas `quantidade` gerações do modo rápido, ou
+    menos se a enumeração acabar antes.
+    """
+    resultados = []
+    while len(resultados) < quantidade:
+        cadeia, derivacao = gerador.gerar_cadeia_rapido(max_iteracoes)
+        if derivacao:
+            resultados.append((cadeia, derivacao))
+        elif gerador.enumerador.esgotado:
+            break
+    return resultados
+
+
+def criar(texto, ordem, deduplicacao):
+    return GeradorGLC(texto=texto, ordem=ordem, deduplicacao=deduplicacao,
+                      comprimento_maximo=COMPRIMENTO_MAXIMO)
+
+
+@pytest.mark.parametrize('ordem, deduplicacao', [(ORDEM_DERIVACOES, modo) for modo in MODOS]
+                         + [(ORDEM_SHORTLEX, MODOS[0])])
+@pytest.mark.parametrize('corte', [0, 1, 7, 25])
+def test_retomada_continua_como_execucao_sem_interrupcao(texto, ordem, deduplicacao, corte, tmp_path):
+    esperado = gerar(criar(texto, ordem, deduplicacao), QUANTIDADE)
+
+    gerador = criar(texto, ordem, deduplicacao)
+    antes = gerar(gerador, corte)
+    caminho = tmp_path / "checkpoint.bin"
+    gerador.salvar_checkpoint(caminho)
+
+    # A configuração vem do checkpoint, não do gerador que o carrega
+    retomado = GeradorGLC(texto=texto)
+    retomado.carregar_checkpoint(caminho)
+    assert (retomado.ordem, retomado.deduplicacao) == (ordem, deduplicacao)
+    assert antes + gerar(retomado, QUANTIDADE - len(antes)) == esperado
+
+
+def test_checkpoint_gravado_durante_a_retomada_shortlex(texto, tmp_path):
+    esperado = gerar(criar(texto, ORDEM_SHORTLEX, MODOS[0]), QUANTIDADE)
+
+    gerador = criar(texto, ORDEM_SHORTLEX, MODOS[0])
+    antes = gerar(gerador, 25)
+    gerador.salvar_checkpoint(tmp_path / "primeiro.bin")
+
+    # As tabelas são recalculadas aos poucos, sob o orçamento de cada chamada
+    retomado = GeradorGLC(texto=texto)
+    retomado.carregar_checkpoint(tmp_path / "primeiro.bin")
+    cadeia, derivacao = retomado.gerar_cadeia_rapido(1)
+    if derivacao:
+        antes.append((cadeia, derivacao))
+    retomado.salvar_checkpoint(tmp_path / "segundo.bin")
+
+    novamente = GeradorGLC(texto=texto)
+    novamente.carregar_checkpoint(tmp_path / "segundo.bin")
+    assert antes + gerar(novamente, QUANTIDADE - len(antes)) == esperado
+
+
+def test_checkpoint_de_outra_gramatica_e_recusado(tmp_path):
+    gerador = GeradorGLC(texto="variaveis:S\ninicial:S\nterminais:a\nproducoes\nS: a\n")
+    gerador.salvar_checkpoint(tmp_path / "checkpoint.bin")
+    outro = GeradorGLC(texto="variaveis:S\ninicial:S\nterminais:b\nproducoes\nS: b\n")
+    with pytest.raises(ValueError):
+        outro.carregar_checkpoint(tmp_path / "checkpoint.bin")
@@ -0,0 +1,41 @@
+import math
+import random
+
+import pytest
+from conftest import linguagem
+
+from gerador import GeradorGLC
+
+COMPRIMENTO = 6
+
+
+def test_contagem_soma_as_derivacoes_de_cada_cadeia(gerador):
+    cadeias = linguagem(gerador, COMPRIMENTO)
+    resultado = gerador.verificar_ambiguidade(COMPRIMENTO, max_exemplos=len(cadeias))
+    assert resultado['comprimento_verificado'] == COMPRIMENTO
+    assert len(resultado['cadeias']) == resultado['total_ambiguas']
+    for n in range(COMPRIMENTO + 1):
+        # Uma árvore por cadeia, mais as derivações extras das ambíguas
+        esperado = sum(1 for c in cadeias if len(c) == n)
+        esperado += sum(k - 1 for c, k in resultado['cadeias'] if len(c) == n)
+        assert gerador.contar_cadeias(n) == esperado, n
+
+
+def test_amostra_pertence_a_linguagem(gerador):
+    cadeias = linguagem(gerador, COMPRIMENTO)
+    aleatorio = random.Random(0)
+    for n in range(COMPRIMENTO + 1):
+        for _ in range(20):
+            cadeia = gerador.amostrar_cadeia(n, aleatorio)
+            if gerador.contar_cadeias(n):
+                assert cadeia in cadeias and len(cadeia) == n
+            else:
+                assert cadeia is None
+
+
+def test_ciclo_anulavel_tem_infinitas_arvores():
+    gerador = GeradorGLC(texto="variaveis:S\ninicial:S\nterminais:a\nproducoes\nS: SS\nS: a\nS: epsilon\n")
+    assert gerador.contar_cadeias(2) == math.inf
+    assert dict(gerador.verificar_ambiguidade(2)['cadeias'])['aa'] == math.inf
+    with pytest.raises(ValueError):
+        gerador.amostrar_cadeia(2)
@@ -0,0 +1,67 @@
+import pytest
+from conftest import GRAMATICAS, linguagem
+
+from gerador import GeradorGLC
+from normalizacao import forma_normal
+
+COMPRIMENTO = 5
+
+# (gramática, edições (operação, variável, corpo), texto equivalente carregado do zero)
+EDICOES = [
+    ('palindromos', [('adicionar', 'S', 'epsilon')],
+     GRAMATICAS['palindromos'] + "S: epsilon\n"),
+    ('unitaria', [('remover', 'B', 'S')],
+     GRAMATICAS['unitaria'].replace("B: S\n", "")),
+    ('anulavel', [('adicionar', 'A', 'Ab'), ('remover', 'S', 'b')],
+     GRAMATICAS['anulavel'].replace("S: b\n", "") + "A: Ab\n"),
+    ('expressoes', [('adicionar', 'F', 'y')],
+     GRAMATICAS['expressoes'].replace("terminais:x,+,*", "terminais:x,+,*,y") + "F: y\n"),
+    ('parenteses', [('adicionar', 'C', 'ab'), ('adicionar', 'S', 'C')],
+     GRAMATICAS['parenteses'].replace("variaveis:S", "variaveis:S,C") + "S: C\nC: ab\n"),
+]
+
+
+def resumo(gerador):
+    """
+    Resultados das análises do gerador que não dependem dos ids dos símbolos.
+    """
+    ambiguidade = gerador.verificar_ambiguidade(COMPRIMENTO, max_exemplos=1000)
+    return {
+        'producoes': {v: sorted(c) for v, c in gerador.producoes.items()},
+        'linguagem': linguagem(gerador, COMPRIMENTO),
+        'contagens': [gerador.contar_cadeias(n) for n in range(COMPRIMENTO + 1)],
+        'ambiguas': sorted(ambiguidade['cadeias']),
+        'reconhecidas': {c for c in linguagem(gerador, COMPRIMENTO) if gerador.reconhecer(c)[0]},
+        'chomsky': linguagem(GeradorGLC(gramatica=forma_normal(gerador.gramatica, 'chomsky')), COMPRIMENTO),
+        'greibach': linguagem(GeradorGLC(gramatica=forma_normal(gerador.gramatica, 'greibach')), COMPRIMENTO),
+    }
+
+
+@pytest.mark.parametrize('nome, edicoes, editado', EDICOES)
+def test_edicao_equivale_a_carregar_a_gramatica_editada(nome, edicoes, editado):
+    gerador = GeradorGLC(texto=GRAMATICAS[nome])
+    antes = resumo(gerador)  # Preenche os caches que a edição reaproveita
+
+    for operacao, variavel, corpo in edicoes:
+        if operacao == 'adicionar':
+            gerador.adicionar_producao(variavel, corpo)
+        else:
+            gerador.remover_producao(variavel, corpo)
+
+    depois = resumo(gerador)
+    assert depois == resumo(GeradorGLC(texto=editado))
+    assert depois != antes
+
+
+def test_edicao_nao_altera_gramatica_compartilhada():
+    original = GeradorGLC(texto=GRAMATICAS['anulavel'])
+    compartilhado = GeradorGLC(gramatica=original.gramatica)
+    antes = resumo(original)
+    compartilhado.adicionar_producao('A', 'Ab')
+    assert resumo(original) == antes
+
+
+def test_producao_repetida_e_recusada():
+    gerador = GeradorGLC(texto=GRAMATICAS['anulavel'])
+    with pytest.raises(ValueError):
+        gerador.adicionar_producao('A', 'a')
@@ -0,0 +1,32 @@
+import pytest
+from conftest import linguagem
+
+from gerador import GeradorGLC
+from normalizacao import ETAPAS, forma_normal
+
+COMPRIMENTO = 6
+
+
+@pytest.mark.parametrize('etapa', sorted(ETAPAS))
+def test_etapa_preserva_a_linguagem_sem_a_cadeia_vazia(gerador, etapa):
+    esperada = linguagem(gerador, COMPRIMENTO) - {""}
+    normal = GeradorGLC(gramatica=forma_normal(gerador.gramatica, etapa))
+    assert linguagem(normal, COMPRIMENTO) == esperada
+
+
+def test_forma_de_chomsky(gerador):
+    for _, corpo, _ in gerador.forma_normal('chomsky'):
+        simbolos = corpo.split()
+        if len(simbolos) == 1:
+            assert simbolos[0] in gerador.terminais
+        else:
+            assert len(simbolos) == 2 and not set(simbolos) & set(gerador.terminais)
+
+
+def test_forma_de_greibach(gerador):
+    for _, corpo, _ in gerador.forma_normal('greibach'):
+        assert corpo.split()[0] in gerador.terminais
+
+
+def test_etapas_ficam_no_cache_da_gramatica(gerador):
+    assert forma_normal(gerador.gramatica, 'greibach') is forma_normal(gerador.gramatica, 'greibach')
@@ -0,0 +1,25 @@
+from conftest import linguagem, todas_as_cadeias
+
+COMPRIMENTO = 6
+
+
+def test_reconhecer_aceita_exatamente_as_cadeias_enumeradas(gerador):
+    enumeradas = linguagem(gerador, COMPRIMENTO)
+    assert enumeradas
+    for cadeia in todas_as_cadeias(gerador, COMPRIMENTO):
+        pertence, _ = gerador.reconhecer(cadeia)
+        assert pertence == (cadeia in enumeradas), cadeia
+
+
+def test_derivacao_reconhecida_leva_do_inicial_a_cadeia(gerador):
+    for cadeia in linguagem(gerador, COMPRIMENTO):
+        pertence, derivacao = gerador.reconhecer(cadeia)
+        assert pertence
+        assert derivacao[0][0] == gerador.inicial
+        assert derivacao[-1][3] == cadeia
+        for passo, seguinte in zip(derivacao, derivacao[1:]):
+            assert passo[3] == seguinte[0]
+
+
+def test_cadeia_com_simbolo_desconhecido_nao_pertence(gerador):
+    assert gerador.reconhecer("?") == (False, [])